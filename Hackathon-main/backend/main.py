@@ -1,4 +1,4 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 from dotenv import load_dotenv
@@ -9,15 +9,22 @@ load_dotenv()
 from routes.anomaly import router as anomaly_router
 from routes.phishing import router as phishing_router
 from routes.agent import router as agent_router
-from services.anomaly_engine import load_and_train, tick_live_traffic
+from routes.admin import router as admin_router
+from services.anomaly_engine import load_and_train, refresh_blocklist_snapshot, tick_live_traffic
+from services.phishing_model import load_and_train_phishing
+from services.admission import get_admission_stats
+from services.circuit_breaker import groq_breaker, OPEN
+from services import shadow, sharding, tracing
 
+API_PREFIX = "/api"
 
 async def _live_traffic_loop():
     """Background task: drip normal transactions every 8s to keep dashboard alive."""
     await asyncio.sleep(5)  # wait for startup to finish
     while True:
         try:
-            tick_live_traffic()
+            # Off the event loop: in sharded mode scoring and the blocklist refresh wait on worker pipes
+            await asyncio.to_thread(tick_live_traffic)
         except Exception as e:
             print(f"[LiveTraffic] tick error: {e}")
         await asyncio.sleep(8)
@@ -27,10 +34,18 @@ async def _live_traffic_loop():
 async def lifespan(app: FastAPI):
     print("[Z-Shield] Loading anomaly detection model...")
     load_and_train()
+    print("[Z-Shield] Training local phishing classifier...")
+    load_and_train_phishing()
+    if sharding.SHARD_WORKERS > 0:
+        print(f"[Z-Shield] Starting {sharding.SHARD_WORKERS} account-sharded scoring workers...")
+        await asyncio.to_thread(sharding.start)
+        await asyncio.to_thread(refresh_blocklist_snapshot)
     print("[Z-Shield] System online.")
     task = asyncio.create_task(_live_traffic_loop())
     yield
     task.cancel()
+    sharding.stop()
+    shadow.stop()
     print("[Z-Shield] Shutting down.")
 
 
@@ -49,9 +64,31 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-app.include_router(anomaly_router, prefix="/api", tags=["Anomaly Detection"])
-app.include_router(phishing_router, prefix="/api", tags=["Phishing Shield"])
-app.include_router(agent_router, prefix="/api", tags=["Agentic Attack Interceptor"])
+
+@app.middleware("http")
+async def trace_requests(request: Request, call_next):
+    """Per-request spans; returned as Server-Timing when asked for (X-Trace: 1) or always-on via env."""
+    trace = tracing.start_trace(request.method, request.url.path)
+    response = await call_next(request)
+    # Bucket by route template (/api/shadow/candidates/{name}), never by concrete URL, so path
+    # parameters and junk URLs cannot grow the per-route table. Included routers' templates
+    # are relative to their prefix; app-level routes are not.
+    matched = request.scope.get("route")
+    if matched is None:
+        route = "<unmatched>"
+    else:
+        route = matched.path if matched in app.router.routes else API_PREFIX + matched.path
+    total_ms = tracing.finish_trace(trace, route, response.status_code)
+    if tracing.SERVER_TIMING_ALWAYS or request.headers.get("x-trace") == "1":
+        response.headers["Server-Timing"] = tracing.server_timing_header(trace, total_ms)
+        response.headers["Timing-Allow-Origin"] = "*"
+    return response
+
+
+app.include_router(anomaly_router, prefix=API_PREFIX, tags=["Anomaly Detection"])
+app.include_router(phishing_router, prefix=API_PREFIX, tags=["Phishing Shield"])
+app.include_router(agent_router, prefix=API_PREFIX, tags=["Agentic Attack Interceptor"])
+app.include_router(admin_router, prefix=API_PREFIX, tags=["Admin"])
 
 
 @app.get("/")
@@ -66,4 +103,14 @@ async def root():
 
 @app.get("/health")
 async def health():
-    return {"status": "healthy"}
+    breaker = groq_breaker.snapshot()
+    return {
+        "status": "degraded" if breaker["state"] == OPEN else "healthy",
+        "llm_circuit": breaker,
+    }
+
+
+@app.get("/admission")
+async def admission():
+    """Admission-control saturation for the LLM-backed endpoints."""
+    return get_admission_stats()
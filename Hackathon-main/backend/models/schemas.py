@@ -12,6 +12,7 @@ class Transaction(BaseModel):
     hour_of_day: int
     unique_recipients_last_10tx: int
     recipient_id: str
+    device_id: Optional[str] = None
 
 
 class FlaggedTransaction(BaseModel):
@@ -41,6 +42,55 @@ class StreamStatusResponse(BaseModel):
     recent_alerts: List[FlaggedTransaction]
     threat_timeline: List[dict]
     total_processed: int = 0
+    short_circuited: int = 0
+    blocklist_size: int = 0
+
+
+class ThreatTimelinePoint(BaseModel):
+    time: str
+    start: float
+    total: int
+    threats: int
+    blocked: int
+    flagged: int
+    by_attack_type: dict
+
+
+class ThreatTimelineResponse(BaseModel):
+    window_seconds: float
+    step_seconds: int
+    resolution_seconds: int
+    points: List[ThreatTimelinePoint]
+    summary: dict
+
+
+class BlocklistEntry(BaseModel):
+    kind: str
+    value: str
+    reason: str
+    risk_score: float
+    attack_type: Optional[str] = None
+    blocked_at: float
+    expires_at: float
+    hits: int
+
+
+class BlocklistResponse(BaseModel):
+    entries: List[BlocklistEntry]
+    size: int
+    short_circuited: int
+    short_circuited_by_kind: dict
+
+
+class UnblockRequest(BaseModel):
+    kind: str   # "account" | "recipient" | "device"
+    value: str
+
+
+class ShadowCandidateRequest(BaseModel):
+    name: str
+    iso_params: dict = {}    # IsolationForest overrides, e.g. {"n_estimators": 200}
+    xgb_params: dict = {}    # XGBClassifier overrides (ignored when XGBoost is not installed)
 
 
 class AnalyzeTextRequest(BaseModel):
@@ -54,6 +104,10 @@ class PhishingAnalysisResponse(BaseModel):
     markers: List[str]
     explanation: str
     recommendation: str
+    served_by: Optional[str] = None          # "local-model" | "rule-based" | "llm"
+    model_probability: Optional[float] = None
+    degraded: bool = False                   # shed by admission control
+    degraded_reason: Optional[str] = None
 
 
 class SimulateAttackResponse(BaseModel):
@@ -0,0 +1,29 @@
+from fastapi import APIRouter, Header, Query
+from typing import Optional
+from routes.auth import check_admin_token
+from services.tracing import get_trace_summary, sample_profile
+import asyncio
+
+router = APIRouter()
+
+MAX_PROFILE_SECONDS = 60
+
+
+@router.get("/admin/traces")
+async def traces(route: Optional[str] = None, slowest: int = Query(10, ge=0, le=100),
+                 x_admin_token: Optional[str] = Header(None)):
+    """Per-route, per-stage span aggregates plus the slowest recent requests."""
+    check_admin_token(x_admin_token)
+    return get_trace_summary(route, slowest)
+
+
+@router.post("/admin/profile")
+async def profile(seconds: float = Query(5.0, gt=0, le=MAX_PROFILE_SECONDS),
+                  interval_ms: float = Query(5.0, ge=1, le=1000),
+                  top: int = Query(25, ge=1, le=200),
+                  include_idle: bool = False,
+                  x_admin_token: Optional[str] = Header(None)):
+    """Sample this worker's stacks for N seconds while it keeps serving; returns hot stacks."""
+    check_admin_token(x_admin_token)
+    # Sampler runs in a thread so the event loop (and its request handlers) stay live and get sampled
+    return await asyncio.to_thread(sample_profile, seconds, interval_ms, top, include_idle)
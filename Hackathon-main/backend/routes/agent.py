@@ -1,12 +1,17 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Request, Response
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from typing import List
-from services.agent_guard import check_agent_message
+from typing import List, Literal
+from collections import OrderedDict
+from services.agent_guard import check_agent_message, llm_configured
+from services.admission import controllers
+from services.circuit_breaker import groq_breaker, LLM_TIMEOUT_SECONDS
 from services.anomaly_engine import score_single_transaction
-import os, json, re
+from services import tracing
+import os, json, re, asyncio, time
 
 try:
-    from groq import Groq
+    from groq import AsyncGroq
     GROQ_AVAILABLE = True
 except ImportError:
     GROQ_AVAILABLE = False
@@ -19,6 +24,18 @@ You NEVER ask for OTPs, PINs, passwords, or card numbers.
 Keep responses under 3 sentences. Be conversational but professional.
 Always mention that for sensitive transactions, OTP verification is required via the official Zindigi app."""
 
+CHAT_FALLBACK_REPLY = "I'm here to help with your Zindigi banking needs. For account queries, please verify via the Zindigi app or call 021-111-747-747."
+CHAT_ERROR_REPLY = "I'm having trouble connecting right now. Please try again or call 021-111-747-747."
+CHAT_BLOCKED_REPLY = "I'm sorry, I cannot process that request. This interaction has been flagged for security review. Please contact JS Bank directly at 021-111-747-747."
+
+# Context is trimmed by an approximate token budget (~4 chars/token), newest messages first
+CHAT_CONTEXT_TOKEN_BUDGET = int(os.getenv("CHAT_CONTEXT_TOKEN_BUDGET", "1200"))
+CHARS_PER_TOKEN = 4
+
+# Guard verdicts for messages already seen (history is resent on every turn)
+_GUARD_CACHE_SIZE = 1024
+_guard_cache: "OrderedDict[str, dict]" = OrderedDict()
+
 class ScoreTransactionRequest(BaseModel):
     account_id: str = "PK-ACC0042"
     amount: float = 5000.0
@@ -39,7 +56,7 @@ class AgentMessageRequest(BaseModel):
 
 
 class ChatMessage(BaseModel):
-    role: str
+    role: Literal["user", "assistant"]   # the system prompt is ours; clients cannot supply one
     content: str
 
 class ChatRequest(BaseModel):
@@ -49,36 +66,212 @@ class ChatRequest(BaseModel):
 @router.post("/score-transaction")
 async def score_transaction(request: ScoreTransactionRequest):
     """Score a single transaction using the Isolation Forest + XGBoost ensemble."""
+    tracing.mark_handler_start()
     tx = request.model_dump()
     result = score_single_transaction(tx)
     return result
 
 
+async def _guarded_check(message: str) -> dict:
+    """check_agent_message behind admission control; sheds to the rule-based check under overload."""
+    if not llm_configured() or groq_breaker.is_open():
+        return check_agent_message(message)  # rule-based; marked circuit_open when the breaker refused
+    return await controllers["check-agent-message"].run(
+        lambda: check_agent_message(message),
+        lambda: check_agent_message(message, use_llm=False),
+    )
+
+
 @router.post("/check-agent-message")
-async def check_agent_message_endpoint(request: AgentMessageRequest):
+async def check_agent_message_endpoint(request: AgentMessageRequest, response: Response):
     """Detect if a message is a prompt injection attack targeting the Zindigi AI agent."""
-    result = check_agent_message(request.message)
+    result = await _guarded_check(request.message)
+    response.headers["X-Served-By"] = result["served_by"]
     return result
 
 
-@router.post("/chat")
-async def chat_endpoint(request: ChatRequest):
-    """Groq-powered Zindigi banking chatbot."""
-    api_key = os.getenv("GROQ_API_KEY")
-    if not api_key or not GROQ_AVAILABLE:
-        return {"reply": "I'm here to help with your Zindigi banking needs. For account queries, please verify via the Zindigi app or call 021-111-747-747."}
+def _estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def _build_context(messages: List[ChatMessage], budget: int = None) -> List[dict]:
+    """Keep the newest messages that fit the token budget; the latest one is truncated if it alone overflows."""
+    budget = CHAT_CONTEXT_TOKEN_BUDGET if budget is None else budget
+    context = []
+    used = 0
+    for m in reversed(messages):
+        cost = _estimate_tokens(m.content)
+        if used + cost > budget:
+            if not context:
+                # Keep the tail of an oversized latest message — that is where the question is
+                context.append({"role": m.role, "content": m.content[-budget * CHARS_PER_TOKEN:]})
+            break
+        context.append({"role": m.role, "content": m.content})
+        used += cost
+    context.reverse()
+    return context
+
+
+async def _guard_one(text: str) -> dict:
+    cached = _guard_cache.get(text)
+    if cached is not None:
+        _guard_cache.move_to_end(text)
+        return cached
+    verdict = await _guarded_check(text)
+    if verdict.get("degraded"):
+        return verdict  # don't pin a shed rule-based verdict; retry the LLM next turn
+    _guard_cache[text] = verdict
+    if len(_guard_cache) > _GUARD_CACHE_SIZE:
+        _guard_cache.popitem(last=False)
+    return verdict
+
+
+async def _guard_context(context: List[dict]) -> dict:
+    """Run check_agent_message over every message in the context; return the worst verdict.
+
+    Assistant turns are guarded too: the client resends the history, so it controls them as well.
+    """
+    verdicts = await asyncio.gather(*[_guard_one(m["content"]) for m in context])
+    for verdict in verdicts:
+        if verdict.get("is_injection"):
+            return verdict
+    return verdicts[-1] if verdicts else {"is_injection": False}
+
+
+def _sse(event: str, payload: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+
+
+async def _fallback_chat_events(guard_task: asyncio.Task, degraded_reason: str = None):
+    """No LLM (unconfigured or shed): guard verdict, then the canned reply."""
+    verdict = await guard_task
+    yield "guard", verdict
+    done = {"served_by": "fallback", "degraded": degraded_reason is not None, "degraded_reason": degraded_reason}
+    if verdict.get("is_injection"):
+        yield "done", {"reply": CHAT_BLOCKED_REPLY, "blocked": True, **done}
+        return
+    yield "token", {"token": CHAT_FALLBACK_REPLY}
+    yield "done", {"reply": CHAT_FALLBACK_REPLY, "blocked": False, **done}
+
+
+async def _llm_chat_events(context: List[dict], guard_task: asyncio.Task, api_key: str):
+    """Stream tokens from the LLM, held back until the concurrent guard verdict is in."""
+    reply_parts: List[str] = []
+    pending: List[str] = []
+    guard_sent = False
+    blocked = False
+    llm_failed = False
+    stream = None
+    started = time.perf_counter()
+    first_token_ms = None
+    outcome_recorded = False
     try:
-        client = Groq(api_key=api_key)
-        messages = [{"role": "system", "content": CHAT_SYSTEM_PROMPT}]
-        for m in request.messages[-6:]:  # last 6 messages for context
-            messages.append({"role": m.role, "content": m.content})
-        response = client.chat.completions.create(
+        client = AsyncGroq(api_key=api_key, timeout=LLM_TIMEOUT_SECONDS, max_retries=0)  # honours GROQ_BASE_URL
+        stream = await client.chat.completions.create(
             model="llama-3.1-8b-instant",
-            messages=messages,
+            messages=[{"role": "system", "content": CHAT_SYSTEM_PROMPT}] + context,
             temperature=0.7,
             max_tokens=150,
+            stream=True,
         )
-        return {"reply": response.choices[0].message.content.strip()}
+        async for chunk in stream:
+            token = chunk.choices[0].delta.content if chunk.choices else None
+            if not token:
+                continue
+            if first_token_ms is None:
+                first_token_ms = (time.perf_counter() - started) * 1000
+            reply_parts.append(token)
+            pending.append(token)
+            if not guard_sent and guard_task.done():
+                verdict = guard_task.result()
+                guard_sent = True
+                yield "guard", verdict
+                if verdict.get("is_injection"):
+                    blocked = True
+                    break
+            if guard_sent:
+                for t in pending:
+                    yield "token", {"token": t}
+                pending.clear()
+        groq_breaker.record_success(first_token_ms or (time.perf_counter() - started) * 1000)
+        outcome_recorded = True
     except Exception as e:
         print(f"[Chat] Groq error: {e}")
-        return {"reply": "I'm having trouble connecting right now. Please try again or call 021-111-747-747."}
+        groq_breaker.record_failure(e)
+        outcome_recorded = True
+        llm_failed = True
+    finally:
+        if not outcome_recorded:
+            groq_breaker.abandon()
+        if stream is not None:
+            await stream.close()
+
+    if not guard_sent:
+        verdict = await guard_task
+        yield "guard", verdict
+        blocked = bool(verdict.get("is_injection"))
+    done = {"served_by": "llm", "degraded": False, "degraded_reason": None}
+    if blocked:
+        yield "done", {"reply": CHAT_BLOCKED_REPLY, "blocked": True, **done}
+        return
+    if llm_failed:
+        yield "done", {"reply": CHAT_ERROR_REPLY, "blocked": False, **done, "served_by": "fallback"}
+        return
+    for t in pending:
+        yield "token", {"token": t}
+    yield "done", {"reply": "".join(reply_parts).strip(), "blocked": False, **done}
+
+
+async def _chat_events(context: List[dict]):
+    """Yield (event, payload) pairs: one guard verdict, then tokens, then done.
+
+    The guard runs concurrently with the LLM call; tokens are held back until the
+    verdict arrives, so a safe message pays no extra round trip and an injection
+    never leaks a single token. The LLM stream holds a "chat" admission slot; when
+    none is available within the SLO the canned fallback reply is served instead.
+    """
+    guard_task = asyncio.create_task(_guard_context(context))
+    api_key = os.getenv("GROQ_API_KEY")
+
+    if not api_key or not GROQ_AVAILABLE:
+        async for item in _fallback_chat_events(guard_task):
+            yield item
+        return
+    if groq_breaker.is_open():
+        async for item in _fallback_chat_events(guard_task, degraded_reason="circuit_open"):
+            yield item
+        return
+
+    async with controllers["chat"].admit() as (admitted, reason):
+        if admitted and groq_breaker.allow():
+            async for item in _llm_chat_events(context, guard_task, api_key):
+                yield item
+            return
+        if admitted:
+            reason = "circuit_open"
+    async for item in _fallback_chat_events(guard_task, degraded_reason=reason):
+        yield item
+
+
+@router.post("/chat")
+async def chat_endpoint(request: ChatRequest, http_request: Request):
+    """Groq-powered Zindigi banking chatbot.
+
+    Streams Server-Sent Events (guard / token / done) when the client sends
+    `Accept: text/event-stream`; otherwise returns the assembled {"reply": ...}.
+    """
+    context = _build_context(request.messages)
+    events = _chat_events(context)
+
+    if "text/event-stream" in http_request.headers.get("accept", ""):
+        async def _stream():
+            async for event, payload in events:
+                yield _sse(event, payload)
+        return StreamingResponse(_stream(), media_type="text/event-stream",
+                                 headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+    result = {"reply": CHAT_ERROR_REPLY, "blocked": False, "served_by": "fallback"}
+    async for event, payload in events:
+        if event == "done":
+            result = payload
+    return result
@@ -1,13 +1,24 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Header, HTTPException, Query, Request
+from fastapi.responses import Response
 from models.schemas import (
     AnalyzeTransactionsRequest,
     AnalyzeTransactionsResponse,
     StreamStatusResponse,
     SimulateAttackResponse,
-    FlaggedTransaction
+    FlaggedTransaction,
+    BlocklistResponse,
+    BlocklistEntry,
+    UnblockRequest,
+    ShadowCandidateRequest,
+    ThreatTimelineResponse
 )
-from services.anomaly_engine import analyze_transactions, get_stream_status, inject_attack_burst
-import random
+from services.anomaly_engine import (
+    analyze_transactions, analyze_columns, get_stream_status, inject_attack_burst, register_candidate
+)
+from routes.auth import check_admin_token
+from services import blocklist, columnar, shadow, sharding, threat_aggregator
+from typing import Optional
+import asyncio, random
 
 router = APIRouter()
 
@@ -16,7 +27,11 @@ router = APIRouter()
 async def analyze_transactions_endpoint(request: AnalyzeTransactionsRequest):
     """Run Isolation Forest on a batch of transactions, return flagged ones."""
     transactions = [tx.model_dump() for tx in request.transactions]
-    flagged = analyze_transactions(transactions)
+    if sharding.enabled():
+        # Workers do the scoring; wait for them off the event loop
+        flagged = await asyncio.to_thread(analyze_transactions, transactions)
+    else:
+        flagged = analyze_transactions(transactions)
     return AnalyzeTransactionsResponse(
         flagged=[FlaggedTransaction(**f) for f in flagged],
         total_analyzed=len(transactions),
@@ -24,6 +39,23 @@ async def analyze_transactions_endpoint(request: AnalyzeTransactionsRequest):
     )
 
 
+@router.post("/analyze-transactions/columnar")
+async def analyze_transactions_columnar(request: Request):
+    """Columnar twin of /analyze-transactions: one array per field in, one array per field out.
+
+    Accepts JSON ({"columns": {...}}) or the binary application/x-zshield-columnar format.
+    """
+    try:
+        columns, n, include_scores = columnar.decode(await request.body(), request.headers.get("content-type", ""))
+    except (ValueError, KeyError, TypeError) as e:
+        raise HTTPException(status_code=422, detail=f"Invalid columnar batch: {e}")
+    if sharding.enabled():
+        result = await asyncio.to_thread(analyze_columns, columns, n, include_scores)
+    else:
+        result = analyze_columns(columns, n, include_scores=include_scores)
+    return Response(content=columnar.encode_response(result), media_type="application/json")
+
+
 @router.get("/stream-status", response_model=StreamStatusResponse)
 async def stream_status():
     """Return current live threat metrics for the dashboard (poll every 3s)."""
@@ -36,16 +68,83 @@ async def stream_status():
         risk_level=status["risk_level"],
         recent_alerts=[FlaggedTransaction(**a) for a in status["recent_alerts"]],
         threat_timeline=status["threat_timeline"],
-        total_processed=status.get("total_processed", 0)
+        total_processed=status.get("total_processed", 0),
+        short_circuited=status["blocklist"]["short_circuited"],
+        blocklist_size=status["blocklist"]["size"]
     )
 
 
+@router.get("/threat-timeline", response_model=ThreatTimelineResponse)
+async def threat_timeline(window: float = Query(300, gt=0, le=30 * 86400), points: int = Query(20, ge=1, le=500)):
+    """Threat counts over the last `window` seconds, bucketed into up to `points` steps."""
+    return threat_aggregator.query(window, points)
+
+
 @router.post("/simulate-attack", response_model=SimulateAttackResponse)
 async def simulate_attack():
     """Inject a simulated bot attack burst for demo purposes."""
-    flagged = inject_attack_burst()
+    flagged = await asyncio.to_thread(inject_attack_burst)
     return SimulateAttackResponse(
         message="Bot attack simulation complete. 20 transactions injected.",
         injected_count=20,
         flagged=[FlaggedTransaction(**f) for f in flagged]
     )
+
+
+@router.get("/blocklist", response_model=BlocklistResponse)
+async def get_blocklist(limit: int = 100):
+    """List live hot-blocklist entries and short-circuit counters."""
+    if sharding.enabled():
+        stats = await asyncio.to_thread(sharding.blocklist_view, limit)
+        entries = stats["entries"]
+    else:
+        stats = blocklist.get_blocklist_stats()
+        entries = blocklist.list_entries(limit)
+    return BlocklistResponse(
+        entries=[BlocklistEntry(**e) for e in entries],
+        size=stats["size"],
+        short_circuited=stats["short_circuited"],
+        short_circuited_by_kind=stats["short_circuited_by_kind"]
+    )
+
+
+@router.post("/blocklist/unblock")
+async def unblock(request: UnblockRequest, x_admin_token: Optional[str] = Header(None)):
+    """Manually lift a block on an account, recipient or device. Operators only (X-Admin-Token)."""
+    check_admin_token(x_admin_token)
+    if request.kind not in blocklist.BLOCK_KINDS:
+        raise HTTPException(status_code=400, detail=f"kind must be one of {list(blocklist.BLOCK_KINDS)}")
+    if sharding.enabled():
+        lifted = await asyncio.to_thread(sharding.unblock, request.kind, request.value)
+    else:
+        lifted = blocklist.unblock(request.kind, request.value)
+    if not lifted:
+        raise HTTPException(status_code=404, detail=f"{request.kind} {request.value} is not blocked")
+    return {"unblocked": True, "kind": request.kind, "value": request.value}
+
+
+@router.get("/shadow")
+async def shadow_stats():
+    """Rolling agreement and latency of shadow candidates against the production ensemble."""
+    return await asyncio.to_thread(shadow.get_shadow_stats)
+
+
+@router.post("/shadow/candidates")
+async def add_shadow_candidate(request: ShadowCandidateRequest, x_admin_token: Optional[str] = Header(None)):
+    """Train a candidate with hyperparameter overrides and start shadow-scoring live traffic. Operators only."""
+    check_admin_token(x_admin_token)
+    try:
+        params = await asyncio.to_thread(register_candidate, request.name, request.iso_params, request.xgb_params)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid candidate parameters: {e}")
+    except RuntimeError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    return {"name": request.name, "params": params}
+
+
+@router.delete("/shadow/candidates/{name}")
+async def remove_shadow_candidate(name: str, x_admin_token: Optional[str] = Header(None)):
+    check_admin_token(x_admin_token)
+    if not await asyncio.to_thread(shadow.unregister, name):
+        raise HTTPException(status_code=404, detail=f"No shadow candidate named {name}")
+    return {"removed": name}
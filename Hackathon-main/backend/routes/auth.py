@@ -0,0 +1,16 @@
+from fastapi import HTTPException
+from typing import Optional
+import os, hmac
+
+# Shared secret for operator endpoints (admin surface, blocklist overrides, shadow candidates).
+# Unset disables them: traces leak internals, lifting a block must not be open to the blocked
+# party, and candidate training spends server CPU on request.
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+
+
+def check_admin_token(token: Optional[str]):
+    """Raise unless `token` (the X-Admin-Token header) matches ADMIN_TOKEN."""
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=503, detail="Admin endpoints are disabled; set ADMIN_TOKEN to enable them")
+    if token is None or not hmac.compare_digest(token, ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
@@ -1,12 +1,33 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Response
 from models.schemas import AnalyzeTextRequest, PhishingAnalysisResponse
-from services.phishing_service import analyze_text
+from services.phishing_service import analyze_text, would_escalate
+from services.phishing_model import get_model_metrics, predict_proba
+from services.admission import controllers
+from services.circuit_breaker import groq_breaker
 
 router = APIRouter()
 
 
 @router.post("/analyze-text", response_model=PhishingAnalysisResponse)
-async def analyze_text_endpoint(request: AnalyzeTextRequest):
-    """Analyze a message for phishing using Groq LLM (with rule-based fallback)."""
-    result = analyze_text(request.text)
+async def analyze_text_endpoint(request: AnalyzeTextRequest, response: Response):
+    """Analyze a message for phishing: local classifier, escalating uncertain cases to Groq LLM.
+
+    Escalations pass admission control; when the LLM queue would blow its SLO the
+    local verdict is returned immediately (degraded=true).
+    """
+    prob = predict_proba(request.text)
+    if would_escalate(prob) and not groq_breaker.is_open():
+        result = await controllers["analyze-text"].run(
+            lambda: analyze_text(request.text, prob=prob),
+            lambda: analyze_text(request.text, use_llm=False, prob=prob),
+        )
+    else:
+        result = analyze_text(request.text, prob=prob)
+    response.headers["X-Served-By"] = result["served_by"]
     return PhishingAnalysisResponse(**result)
+
+
+@router.get("/phishing-model/stats")
+async def phishing_model_stats():
+    """Escalation rate, LLM agreement and latency of the local phishing classifier."""
+    return get_model_metrics()
@@ -0,0 +1,85 @@
+"""
+Benchmark: row-of-objects /api/analyze-transactions path vs the columnar batch path
+(JSON and binary), end to end from request bytes to response bytes, without HTTP.
+
+Usage:
+    python scripts/bench_columnar.py [--sizes 1000 5000] [--repeat 2]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+# Blocks expire immediately so repeated runs score the same work
+os.environ.setdefault("BLOCKLIST_AUTO_TTL_SECONDS", "0")
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from models.schemas import AnalyzeTransactionsRequest, AnalyzeTransactionsResponse, FlaggedTransaction
+from services import columnar
+from services.anomaly_engine import load_and_train, analyze_transactions, analyze_columns
+
+FIELDS = ["account_id", "amount", "timestamp", "tx_count_last_5s", "time_delta_ms", "hour_of_day",
+          "unique_recipients_last_10tx", "recipient_id", "is_new_device", "location_change"]
+
+
+def _load_rows(n: int) -> list:
+    data_path = os.path.join(os.path.dirname(__file__), "../data/transactions.json")
+    with open(data_path) as f:
+        base = [{k: tx[k] for k in FIELDS} for tx in json.load(f)]
+    return (base * (n // len(base) + 1))[:n]
+
+
+def _row_path(body: bytes) -> bytes:
+    """Mirrors routes/anomaly.analyze_transactions_endpoint."""
+    request = AnalyzeTransactionsRequest.model_validate_json(body)
+    transactions = [tx.model_dump() for tx in request.transactions]
+    flagged = analyze_transactions(transactions)
+    return AnalyzeTransactionsResponse(
+        flagged=[FlaggedTransaction(**f) for f in flagged],
+        total_analyzed=len(transactions),
+        total_flagged=len(flagged)
+    ).model_dump_json().encode()
+
+
+def _columnar_path(body: bytes, content_type: str) -> bytes:
+    """Mirrors routes/anomaly.analyze_transactions_columnar."""
+    columns, n, include_scores = columnar.decode(body, content_type)
+    return columnar.encode_response(analyze_columns(columns, n, include_scores=include_scores))
+
+
+def _time(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 5000])
+    parser.add_argument("--repeat", type=int, default=2)
+    args = parser.parse_args()
+
+    load_and_train()
+    print(f"{'rows':>7} {'row path':>11} {'col json':>11} {'col binary':>11} {'json x':>7} {'binary x':>9} {'req bytes (row/json/bin)':>28}")
+    for n in args.sizes:
+        rows = _load_rows(n)
+        row_body = json.dumps({"transactions": rows}).encode()
+        columns = {k: [r[k] for r in rows] for k in FIELDS}
+        json_body = json.dumps({"columns": columns}).encode()
+        bin_body = columnar.encode_binary(columns)
+
+        t_row = _time(lambda: _row_path(row_body), args.repeat)
+        t_json = _time(lambda: _columnar_path(json_body, "application/json"), args.repeat)
+        t_bin = _time(lambda: _columnar_path(bin_body, columnar.BINARY_CONTENT_TYPE), args.repeat)
+
+        sizes = f"{len(row_body)}/{len(json_body)}/{len(bin_body)}"
+        print(f"{n:>7} {t_row * 1000:>9.1f}ms {t_json * 1000:>9.1f}ms {t_bin * 1000:>9.1f}ms "
+              f"{t_row / t_json:>6.1f}x {t_row / t_bin:>8.1f}x {sizes:>28}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+"""
+Benchmark: compact transaction records (TxRecord / TxBatch) vs plain request dicts.
+  memory      retained bytes per transaction after parsing N rows from JSON (tracemalloc)
+  ingest      rows -> feature matrix
+  explain     attack typing + reason + feature importance per flagged row
+The dict side is the pre-records code path: dict.get(key, default) on every access.
+
+Usage:
+    python scripts/bench_records.py [--rows 50000] [--repeat 3]
+"""
+import argparse
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import numpy as np
+
+from services.anomaly_engine import _get_attack_type, _get_feature_importance, _get_reason
+from services.records import TxBatch, TxRecord
+
+
+def _dict_features(transactions: list) -> np.ndarray:
+    return np.array([[
+        tx.get("tx_count_last_5s", 0),
+        tx.get("time_delta_ms", 100000),
+        tx.get("hour_of_day", 12),
+        tx.get("unique_recipients_last_10tx", 5),
+        tx.get("amount", 1000),
+        int(tx.get("is_new_device", False)),
+        int(tx.get("location_change", False)),
+    ] for tx in transactions], dtype=float)
+
+
+def _dict_explain(tx: dict):
+    """Dict-path attack typing, reason and feature importance (same rules as the engine helpers)."""
+    if tx.get("tx_count_last_5s", 0) >= 15 and tx.get("unique_recipients_last_10tx", 5) <= 1:
+        attack = "Agentic Bot Drain"
+    elif tx.get("is_new_device") and tx.get("location_change"):
+        attack = "Account Takeover"
+    elif tx.get("amount", 0) < 1000 and tx.get("tx_count_last_5s", 0) >= 5:
+        attack = "Card Testing (Micro-TX)"
+    elif tx.get("hour_of_day", 12) in range(0, 5) and tx.get("amount", 0) > 50000:
+        attack = "Late-Night High-Value Fraud"
+    else:
+        attack = "Behavioral Anomaly"
+    reasons = []
+    if tx.get("tx_count_last_5s", 0) >= 10:
+        reasons.append(f"High-velocity burst ({tx['tx_count_last_5s']} Raast transfers in 5s)")
+    if tx.get("time_delta_ms", 100000) < 300:
+        reasons.append(f"Non-human rhythm ({tx['time_delta_ms']:.0f}ms between transfers)")
+    if tx.get("unique_recipients_last_10tx", 5) <= 1:
+        reasons.append("Single-target drain pattern")
+    if tx.get("is_new_device"):
+        reasons.append("Unrecognized device")
+    if tx.get("location_change"):
+        reasons.append(f"Sudden city change ({tx.get('sender_city','?')} → {tx.get('recipient_city','?')})")
+    if tx.get("hour_of_day", 12) in range(0, 5):
+        reasons.append(f"Unusual hour ({tx['hour_of_day']}:00 AM)")
+    if not reasons:
+        reasons.append("Statistical anomaly detected by ensemble model")
+    features = [
+        {"label": "TX Velocity", "score": round(min(1.0, tx.get("tx_count_last_5s", 0) / 20.0), 3),
+         "value": f"{tx.get('tx_count_last_5s', 0)} tx/5s"},
+        {"label": "Inter-TX Speed", "score": round(max(0.0, 1.0 - min(tx.get("time_delta_ms", 100000), 60000) / 60000), 3),
+         "value": f"{tx.get('time_delta_ms', 100000):.0f}ms"},
+        {"label": "Recipient Diversity", "score": round(max(0.0, 1.0 - min(tx.get("unique_recipients_last_10tx", 5), 5) / 5.0), 3),
+         "value": f"{tx.get('unique_recipients_last_10tx', 5)} unique"},
+        {"label": "Hour of Day",
+         "score": round(0.8 if tx.get("hour_of_day", 12) < 5 else (0.3 if tx.get("hour_of_day", 12) < 8 or tx.get("hour_of_day", 12) > 22 else 0.0), 3),
+         "value": f"{tx.get('hour_of_day', 12):02d}:00"},
+        {"label": "Amount", "score": round(min(1.0, tx.get("amount", 1000) / 200000), 3),
+         "value": f"PKR {tx.get('amount', 1000):,.0f}"},
+        {"label": "Device / Location",
+         "score": round((0.5 if tx.get("is_new_device") else 0.0) + (0.5 if tx.get("location_change") else 0.0), 3),
+         "value": ("New device" if tx.get("is_new_device") else "") + (" + City change" if tx.get("location_change") else "") or "Normal"},
+    ]
+    return attack, "; ".join(reasons[:2]), sorted(features, key=lambda x: x["score"], reverse=True)
+
+
+def _record_explain(tx: TxRecord):
+    return _get_attack_type(tx), _get_reason(tx), _get_feature_importance(tx)
+
+
+def _load_body(n: int) -> bytes:
+    data_path = os.path.join(os.path.dirname(__file__), "../data/transactions.json")
+    with open(data_path) as f:
+        base = json.load(f)
+    for tx in base:
+        tx.pop("label", None)
+    return json.dumps((base * (n // len(base) + 1))[:n]).encode()
+
+
+def _retained_bytes(build) -> int:
+    """Bytes still allocated after build() returns, with its temporaries collected."""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    kept = build()
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del kept
+    return after - before
+
+
+def _time(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=50000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    n = args.rows
+    body = _load_body(n)
+    print(f"[BenchRecords] {n} transactions, {len(body) / n:.0f} JSON bytes each")
+
+    mem = {
+        "dicts": _retained_bytes(lambda: json.loads(body)),
+        "TxRecord": _retained_bytes(lambda: [TxRecord.from_dict(tx) for tx in json.loads(body)]),
+        "TxBatch": _retained_bytes(lambda: TxBatch.from_dicts(json.loads(body))),
+    }
+    for name, size in mem.items():
+        ratio = "" if name == "dicts" else f"   ({mem['dicts'] / size:.1f}x smaller)"
+        print(f"  memory   {name:<9} {size / n:>8.0f} B/tx{ratio}")
+
+    rows = json.loads(body)
+    records = [TxRecord.from_dict(tx) for tx in rows]
+    assert np.array_equal(_dict_features(rows), TxBatch.from_dicts(rows).features())
+    t_dict = _time(lambda: _dict_features(rows), args.repeat)
+    t_batch = _time(lambda: TxBatch.from_dicts(rows).features(), args.repeat)
+    t_rec = _time(lambda: TxBatch.from_records(records).features(), args.repeat)
+    print(f"  ingest   dicts     {n / t_dict:>10,.0f} tx/s")
+    print(f"  ingest   TxBatch   {n / t_batch:>10,.0f} tx/s   ({t_dict / t_batch:.2f}x)  dicts -> structured array -> features")
+    print(f"  ingest   records   {n / t_rec:>10,.0f} tx/s   ({t_dict / t_rec:.2f}x)  TxRecords -> structured array -> features")
+
+    k = min(n, 20000)
+    assert all(_dict_explain(rows[i]) == _record_explain(records[i]) for i in range(k))
+    t_dict = _time(lambda: [_dict_explain(tx) for tx in rows[:k]], args.repeat)
+    t_rec = _time(lambda: [_record_explain(tx) for tx in records[:k]], args.repeat)
+    print(f"  explain  dicts     {k / t_dict:>10,.0f} tx/s")
+    print(f"  explain  TxRecord  {k / t_rec:>10,.0f} tx/s   ({t_dict / t_rec:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
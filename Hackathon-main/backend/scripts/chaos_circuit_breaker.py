@@ -0,0 +1,105 @@
+"""
+Chaos check for the LLM circuit breaker against the fault-injecting local stub.
+Phases: healthy -> provider failing (circuit opens, calls fail fast) ->
+provider slow (still open) -> provider healthy again (half-open probe closes it).
+Exits non-zero if the breaker does not behave as expected.
+
+Usage:
+    python scripts/chaos_circuit_breaker.py
+"""
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+
+BACKEND_DIR = os.path.join(os.path.dirname(__file__), "..")
+sys.path.insert(0, BACKEND_DIR)
+
+GUARD_REPLY = json.dumps({
+    "is_injection": False, "confidence": 0.05, "attack_type": "Safe", "severity": "LOW",
+    "injected_instructions": [], "explanation": "Stub verdict.", "safe_response": None,
+})
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _set_faults(port: int, **faults):
+    req = urllib.request.Request(f"http://127.0.0.1:{port}/_faults", data=json.dumps(faults).encode(), method="POST")
+    urllib.request.urlopen(req).read()
+
+
+def main():
+    port = _free_port()
+    os.environ.update({
+        "GROQ_API_KEY": "stub",
+        "GROQ_BASE_URL": f"http://127.0.0.1:{port}",
+        "LLM_BREAKER_MIN_CALLS": "4",
+        "LLM_BREAKER_OPEN_SECONDS": "2",
+        "LLM_BREAKER_SLOW_MS": "500",
+        "LLM_TIMEOUT_SECONDS": "3",
+    })
+    stub = subprocess.Popen([sys.executable, os.path.join(BACKEND_DIR, "scripts/llm_stub.py"),
+                             "--port", str(port), "--reply", GUARD_REPLY])
+    time.sleep(0.5)
+
+    from fastapi.testclient import TestClient
+    import main as app_module
+
+    failures = []
+
+    def expect(cond, msg):
+        print(("  ok   " if cond else "  FAIL ") + msg)
+        if not cond:
+            failures.append(msg)
+
+    def call(c):
+        t0 = time.perf_counter()
+        body = c.post("/api/check-agent-message", json={"message": "What is my balance?"}).json()
+        return body, (time.perf_counter() - t0) * 1000
+
+    try:
+        with TestClient(app_module.app) as c:
+            print("phase 1: healthy provider")
+            body, _ = call(c)
+            expect(body["served_by"] == "llm", "served by LLM")
+            expect(c.get("/health").json()["llm_circuit"]["state"] == "CLOSED", "circuit CLOSED")
+
+            print("phase 2: provider returning 503")
+            _set_faults(port, error_rate=1.0, latency=0.2)
+            for _ in range(4):
+                call(c)
+            expect(c.get("/health").json()["llm_circuit"]["state"] == "OPEN", "circuit OPEN after error burst")
+            body, ms = call(c)
+            expect(body.get("degraded_reason") == "circuit_open", "open circuit short-circuits to rule-based")
+            expect(ms < 50, f"fail-fast latency {ms:.1f}ms < 50ms (provider latency is 200ms)")
+
+            print("phase 3: provider healthy again")
+            _set_faults(port, error_rate=0.0, latency=0.0)
+            time.sleep(2.1)
+            body, _ = call(c)
+            expect(body["served_by"] == "llm", "half-open probe reaches the LLM")
+            expect(c.get("/health").json()["llm_circuit"]["state"] == "CLOSED", "probe success closes the circuit")
+
+            print("phase 4: provider slow")
+            _set_faults(port, latency=0.7)
+            for _ in range(4):
+                call(c)
+            health = c.get("/health").json()
+            expect(health["llm_circuit"]["state"] == "OPEN", "circuit OPEN on slow-call rate")
+            expect(health["status"] == "degraded", "/health reports degraded")
+            print(json.dumps(health, indent=2))
+    finally:
+        stub.terminate()
+
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
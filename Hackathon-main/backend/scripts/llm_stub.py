@@ -0,0 +1,124 @@
+"""
+Local OpenAI/Groq-compatible chat completions stub for offline development.
+Serves POST /openai/v1/chat/completions, streaming (SSE) or not, with a fixed reply.
+Faults (error rate, latency) can be injected at start-up or live via POST /_faults.
+
+Usage:
+    python scripts/llm_stub.py --port 8099 --token-delay 0.05
+    GROQ_API_KEY=stub GROQ_BASE_URL=http://127.0.0.1:8099 uvicorn main:app
+    curl -X POST localhost:8099/_faults -d '{"error_rate": 1.0, "latency": 0}'
+"""
+import argparse
+import json
+import random
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_REPLY = (
+    "Your Raast transfer has been received and will be processed shortly. "
+    "For sensitive transactions, OTP verification is required via the official Zindigi app."
+)
+
+
+def _completion(reply: str, model: str) -> dict:
+    return {
+        "id": "chatcmpl-stub",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": reply}, "finish_reason": "stop"}],
+        "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+    }
+
+
+def _chunk(content, model: str, finish_reason=None) -> dict:
+    delta = {"content": content} if content is not None else {}
+    return {
+        "id": "chatcmpl-stub",
+        "object": "chat.completion.chunk",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+    }
+
+
+def make_handler(args):
+    class StubHandler(BaseHTTPRequestHandler):
+        def log_message(self, fmt, *a):
+            if args.verbose:
+                super().log_message(fmt, *a)
+
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            if self.path.rstrip("/") == "/_faults":
+                for key in ("error_rate", "error_status", "latency"):
+                    if key in body:
+                        setattr(args, key, type(getattr(args, key))(body[key]))
+                payload = json.dumps({k: getattr(args, k) for k in ("error_rate", "error_status", "latency")}).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+                return
+            if not self.path.rstrip("/").endswith("/chat/completions"):
+                self.send_error(404)
+                return
+            model = body.get("model", "stub")
+            time.sleep(args.latency)
+            if random.random() < args.error_rate:
+                payload = json.dumps({"error": {"message": "Injected fault", "type": "server_error"}}).encode()
+                self.send_response(args.error_status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+                return
+            reply = args.reply
+
+            if not body.get("stream"):
+                payload = json.dumps(_completion(reply, model)).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+                return
+
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Cache-Control", "no-cache")
+            self.end_headers()
+            for word in reply.split(" "):
+                self.wfile.write(f"data: {json.dumps(_chunk(word + ' ', model))}\n\n".encode())
+                self.wfile.flush()
+                time.sleep(args.token_delay)
+            self.wfile.write(f"data: {json.dumps(_chunk(None, model, 'stop'))}\n\n".encode())
+            self.wfile.write(b"data: [DONE]\n\n")
+            self.wfile.flush()
+
+    return StubHandler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local streaming LLM stub")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds before the first byte")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests that fail")
+    parser.add_argument("--error-status", type=int, default=503)
+    parser.add_argument("--token-delay", type=float, default=0.03, help="seconds between streamed tokens")
+    parser.add_argument("--reply", default=DEFAULT_REPLY)
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(args))
+    print(f"[LLMStub] Listening on http://{args.host}:{args.port}/openai/v1/chat/completions")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
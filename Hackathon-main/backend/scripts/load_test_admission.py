@@ -0,0 +1,94 @@
+"""
+Load test: /api/check-agent-message against a slow local LLM stub, with and
+without admission control. Shows that p99 stays bounded by the queue-time SLO
+when admission control sheds excess load to the rule-based path.
+
+Usage:
+    python scripts/load_test_admission.py [--rps 100] [--duration 5] [--llm-latency 1.5]
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+from collections import Counter
+
+BACKEND_DIR = os.path.join(os.path.dirname(__file__), "..")
+sys.path.insert(0, BACKEND_DIR)
+
+GUARD_REPLY = json.dumps({
+    "is_injection": False, "confidence": 0.05, "attack_type": "Safe", "severity": "LOW",
+    "injected_instructions": [], "explanation": "Stub verdict.", "safe_response": None,
+})
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct))] if values else 0.0
+
+
+async def _run(client, rps: float, duration: float):
+    latencies, served = [], Counter()
+
+    async def one(i: int):
+        t0 = time.perf_counter()
+        r = await client.post("/api/check-agent-message", json={"message": f"What is my balance? #{i}"})
+        latencies.append((time.perf_counter() - t0) * 1000)
+        served[r.json().get("served_by", "?") + (" (shed)" if r.json().get("degraded") else "")] += 1
+
+    tasks = []
+    start = time.perf_counter()
+    for i in range(int(rps * duration)):
+        # Open-loop arrivals: requests keep coming whether or not earlier ones finished
+        await asyncio.sleep(max(0.0, start + i / rps - time.perf_counter()))
+        tasks.append(asyncio.create_task(one(i)))
+    await asyncio.gather(*tasks)
+    return latencies, served
+
+
+async def main_async(args):
+    import httpx
+    import main as app_module
+    from services import admission
+
+    transport = httpx.ASGITransport(app=app_module.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test", timeout=120) as client:
+        for enabled in (False, True):
+            admission.ADMISSION_ENABLED = enabled
+            latencies, served = await _run(client, args.rps, args.duration)
+            label = "admission ON " if enabled else "admission OFF"
+            print(f"{label}: n={len(latencies)} p50={_percentile(latencies, 0.5):.0f}ms "
+                  f"p99={_percentile(latencies, 0.99):.0f}ms max={max(latencies):.0f}ms served_by={dict(served)}")
+        print(json.dumps(admission.get_admission_stats()["endpoints"]["check-agent-message"], indent=2))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rps", type=float, default=100)
+    parser.add_argument("--duration", type=float, default=5)
+    parser.add_argument("--llm-latency", type=float, default=1.5)
+    args = parser.parse_args()
+
+    port = _free_port()
+    stub = subprocess.Popen([sys.executable, os.path.join(BACKEND_DIR, "scripts/llm_stub.py"),
+                             "--port", str(port), "--latency", str(args.llm_latency), "--reply", GUARD_REPLY])
+    os.environ["GROQ_API_KEY"] = "stub"
+    os.environ["GROQ_BASE_URL"] = f"http://127.0.0.1:{port}"
+    try:
+        time.sleep(0.5)
+        asyncio.run(main_async(args))
+    finally:
+        stub.terminate()
+
+
+if __name__ == "__main__":
+    main()
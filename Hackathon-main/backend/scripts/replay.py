@@ -0,0 +1,286 @@
+"""
+Offline replay / backtest: stream historical transaction files through the full engine
+(blocklist, ensemble, rules, attack typing, blocking) across a process pool and report
+detection metrics and achieved throughput.
+
+Input is partitioned by account_id (crc32 % workers), so every account's transactions
+reach one worker in file order and that worker's blocklist state evolves as it would
+live. Automatic blocks cover the sender account and device only; a device block is
+shard-local, so a device shared across shards is only short-circuited in its own.
+
+Formats (optionally .gz): .jsonl/.ndjson (one object per line — lines are parsed in the
+workers), .json (a top-level array, streamed), .csv (header row). Ground truth comes
+from `label` ("normal" / anything else) or `is_fraud`. Per-attack-type metrics are only
+reported for rows whose `attack_type` column names the true type: typing the true attacks
+with the engine's own rules would make "typed_correctly" measure the rules against themselves.
+
+Usage:
+    python scripts/replay.py data/transactions.json [more files...] [--workers 4] [--batch 2000]
+"""
+import argparse
+import csv
+import gzip
+import io
+import json
+import os
+import queue
+import re
+import sys
+import time
+import zlib
+from collections import Counter, defaultdict
+
+BACKEND_DIR = os.path.join(os.path.dirname(__file__), "..")
+sys.path.insert(0, BACKEND_DIR)
+
+_ACCOUNT_RE = re.compile(rb'"account_id"\s*:\s*"([^"]*)"')
+_NUMERIC_FIELDS = {"amount", "tx_count_last_5s", "time_delta_ms", "hour_of_day", "unique_recipients_last_10tx"}
+_BOOL_FIELDS = {"is_new_device", "location_change", "is_fraud"}
+_JSON_READ_SIZE = 1 << 20
+
+
+def _open(path: str):
+    return gzip.open(path, "rb") if path.endswith(".gz") else open(path, "rb")
+
+
+def _format(path: str) -> str:
+    name = path[:-3] if path.endswith(".gz") else path
+    ext = os.path.splitext(name)[1].lower()
+    if ext in (".jsonl", ".ndjson"):
+        return "jsonl"
+    if ext in (".json", ".csv"):
+        return ext[1:]
+    raise ValueError(f"Unsupported input format: {path}")
+
+
+def _iter_json_array(f):
+    """Stream the elements of a top-level JSON array without loading the file."""
+    decoder = json.JSONDecoder()
+    reader = io.TextIOWrapper(f, encoding="utf-8")
+    buf, pos, started = "", 0, False
+    while True:
+        chunk = reader.read(_JSON_READ_SIZE)
+        buf = buf[pos:] + chunk
+        pos = 0
+        while True:
+            while pos < len(buf) and buf[pos] in " \t\r\n,":
+                pos += 1
+            if not started and pos < len(buf):
+                if buf[pos] != "[":
+                    raise ValueError("Expected a top-level JSON array")
+                started, pos = True, pos + 1
+                continue
+            if pos < len(buf) and buf[pos] == "]":
+                return
+            try:
+                obj, end = decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                break  # element split across reads
+            yield obj
+            pos = end
+        if not chunk:
+            if buf[pos:].strip():
+                raise ValueError("Truncated JSON array")
+            return
+
+
+def _iter_records(path: str):
+    """Yield (account_id, record) in file order; jsonl records stay raw bytes for the workers to parse."""
+    fmt = _format(path)
+    with _open(path) as f:
+        if fmt == "jsonl":
+            for line in f:
+                if not line.strip():
+                    continue
+                m = _ACCOUNT_RE.search(line)
+                yield (m.group(1).decode() if m else str(json.loads(line).get("account_id") or "")), line
+        elif fmt == "json":
+            for tx in _iter_json_array(f):
+                yield str(tx.get("account_id") or ""), tx
+        else:
+            for row in csv.DictReader(io.TextIOWrapper(f, encoding="utf-8", newline="")):
+                yield str(row.get("account_id") or ""), row
+
+
+def _shard_of(account_id: str, workers: int) -> int:
+    return zlib.crc32(account_id.encode()) % workers
+
+
+def _coerce(tx: dict) -> dict:
+    """CSV cells arrive as strings; restore the types the engine expects."""
+    for key, value in tx.items():
+        if not isinstance(value, str):
+            continue
+        if key in _NUMERIC_FIELDS and value != "":
+            tx[key] = float(value)
+        elif key in _BOOL_FIELDS:
+            tx[key] = value.strip().lower() in ("1", "true", "yes")
+    return tx
+
+
+def _truth(tx: dict):
+    if "label" in tx:
+        return tx["label"] != "normal"
+    if "is_fraud" in tx:
+        return bool(tx["is_fraud"])
+    return None
+
+
+def _worker(inbox, outbox):
+    from services.anomaly_engine import load_and_train, decide_transactions
+    from services import blocklist
+
+    load_and_train(n_jobs=1)   # one core per worker; the pool already spreads the load
+    outbox.put("ready")
+    stats = {"confusion": Counter(), "statuses": Counter(), "by_type": defaultdict(Counter), "rows": 0, "busy_s": 0.0}
+    while True:
+        batch = inbox.get()
+        if batch is None:
+            break
+        t0 = time.perf_counter()
+        transactions = [_coerce(json.loads(r)) if isinstance(r, bytes) else _coerce(r) for r in batch]
+        decisions = decide_transactions(transactions)
+        for tx, d in zip(transactions, decisions):
+            predicted = d["status"] != "ALLOWED"
+            truth = _truth(tx)
+            stats["statuses"][d["status"]] += 1
+            if truth is None:
+                stats["confusion"]["unlabeled"] += 1
+                continue
+            stats["confusion"][("tp" if predicted else "fn") if truth else ("fp" if predicted else "tn")] += 1
+            true_type = tx.get("attack_type")
+            if truth and true_type:
+                counts = stats["by_type"][true_type]
+                counts["total"] += 1
+                counts["detected"] += predicted
+                counts["blocked"] += d["status"] == "BLOCKED"
+                counts["typed_correctly"] += predicted and d["attack_type"] == true_type
+        stats["rows"] += len(transactions)
+        stats["busy_s"] += time.perf_counter() - t0
+    stats["blocklist"] = blocklist.get_blocklist_stats()
+    stats["by_type"] = dict(stats["by_type"])
+    outbox.put(stats)
+
+
+def _check_workers(procs):
+    """Raise if a worker died; the survivors are stopped, since the replay cannot complete."""
+    dead = [p.name for p in procs if p.exitcode not in (None, 0)]
+    if dead:
+        for p in procs:
+            if p.is_alive():
+                p.terminate()
+        raise RuntimeError(f"replay worker(s) {dead} exited before reporting; see their output above")
+
+
+def _put(q, item, procs):
+    """q.put that gives up when a worker has crashed (its bounded inbox would never drain)."""
+    while True:
+        try:
+            return q.put(item, timeout=1.0)
+        except queue.Full:
+            _check_workers(procs)
+
+
+def _get(outbox, procs):
+    """outbox.get that gives up when a worker has crashed instead of waiting forever."""
+    while True:
+        try:
+            return outbox.get(timeout=1.0)
+        except queue.Empty:
+            _check_workers(procs)
+
+
+def replay(paths, workers: int, batch_size: int, limit: int = None) -> dict:
+    import multiprocessing as mp
+
+    inboxes = [mp.Queue(maxsize=4) for _ in range(workers)]  # bounded: the reader waits for slow shards
+    outbox = mp.Queue()
+    procs = [mp.Process(target=_worker, args=(q, outbox), daemon=True) for q in inboxes]
+    t0 = time.perf_counter()
+    for p in procs:
+        p.start()
+    for _ in procs:
+        _get(outbox, procs)  # each worker trains its own model copy before the clock starts
+    startup_s = time.perf_counter() - t0
+
+    start = time.perf_counter()
+    buffers = [[] for _ in range(workers)]
+    sent = 0
+    for path in paths:
+        for account_id, record in _iter_records(path):
+            shard = _shard_of(account_id, workers)
+            buffers[shard].append(record)
+            if len(buffers[shard]) >= batch_size:
+                _put(inboxes[shard], buffers[shard], procs)
+                buffers[shard] = []
+            sent += 1
+            if limit and sent >= limit:
+                break
+        if limit and sent >= limit:
+            break
+    read_s = time.perf_counter() - start
+    for shard, q in enumerate(inboxes):
+        if buffers[shard]:
+            _put(q, buffers[shard], procs)
+        _put(q, None, procs)
+
+    results = [_get(outbox, procs) for _ in procs]
+    wall_s = time.perf_counter() - start
+    for p in procs:
+        p.join()
+    return _summarise(results, wall_s, read_s, startup_s, workers)
+
+
+def _summarise(results, wall_s: float, read_s: float, startup_s: float, workers: int) -> dict:
+    confusion, statuses, by_type = Counter(), Counter(), defaultdict(Counter)
+    for r in results:
+        confusion.update(r["confusion"])
+        statuses.update(r["statuses"])
+        for t, counts in r["by_type"].items():
+            by_type[t].update(counts)
+    rows = sum(r["rows"] for r in results)
+    tp, fp, fn, tn = (confusion[k] for k in ("tp", "fp", "fn", "tn"))
+    return {
+        "rows": rows,
+        "workers": workers,
+        "startup_seconds": round(startup_s, 3),
+        "wall_seconds": round(wall_s, 3),
+        "transactions_per_second": round(rows / wall_s, 1) if wall_s else 0.0,
+        "reader_seconds": round(read_s, 3),
+        "worker_busy_seconds": [round(r["busy_s"], 3) for r in results],
+        "confusion": {"tp": tp, "fp": fp, "fn": fn, "tn": tn, "unlabeled": confusion["unlabeled"]},
+        "precision": round(tp / (tp + fp), 4) if tp + fp else None,
+        "recall": round(tp / (tp + fn), 4) if tp + fn else None,
+        "false_positive_rate": round(fp / (fp + tn), 4) if fp + tn else None,
+        "statuses": dict(statuses),
+        "per_attack_type": {
+            t: {
+                "total": c["total"],
+                "recall": round(c["detected"] / c["total"], 4),
+                "blocked_rate": round(c["blocked"] / c["total"], 4),
+                "typed_correctly": round(c["typed_correctly"] / c["total"], 4),
+            }
+            for t, c in sorted(by_type.items())
+        },
+        "blocklist_short_circuited": sum(r["blocklist"]["short_circuited"] for r in results),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("paths", nargs="+")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--batch", type=int, default=2000, help="rows per shard batch sent to a worker")
+    parser.add_argument("--limit", type=int, default=None, help="stop after this many rows")
+    parser.add_argument("--blocklist-ttl", type=float, default=None,
+                        help="override BLOCKLIST_AUTO_TTL_SECONDS (wall-clock, not event time)")
+    args = parser.parse_args()
+
+    if args.blocklist_ttl is not None:
+        os.environ["BLOCKLIST_AUTO_TTL_SECONDS"] = str(args.blocklist_ttl)
+    report = replay(args.paths, max(1, args.workers), args.batch, args.limit)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
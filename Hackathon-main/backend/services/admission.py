@@ -0,0 +1,149 @@
+"""
+Admission Control: bounded queues and queue-time SLOs in front of the LLM paths.
+Each LLM-backed endpoint gets a controller with a fixed number of concurrent
+LLM slots and a bounded wait queue. A request that would overflow the queue,
+or is predicted (or observed) to wait longer than its SLO for a slot, is sent
+straight to the endpoint's local fallback instead of piling onto the provider.
+"""
+import asyncio
+import os
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Callable, Dict, Optional
+
+ADMISSION_ENABLED = os.getenv("ADMISSION_CONTROL", "on").lower() not in ("0", "off", "false")
+
+# endpoint -> (max concurrent LLM calls, max queued, queue-time SLO ms)
+DEFAULT_LIMITS = {
+    "analyze-text": (8, 32, 250),
+    "check-agent-message": (8, 32, 250),
+    "chat": (16, 32, 500),
+}
+
+
+def _limit(endpoint: str, field: str, default: float) -> float:
+    env = f"ADMISSION_{endpoint.upper().replace('-', '_')}_{field}"
+    return type(default)(os.getenv(env, default))
+
+
+class AdmissionController:
+    """Per-endpoint LLM slot pool with a bounded, deadline-aware wait queue."""
+
+    EWMA_ALPHA = 0.2
+
+    def __init__(self, name: str, max_concurrency: int, max_queue: int, queue_slo_ms: float):
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_slo_ms = queue_slo_ms
+        self._sem = asyncio.Semaphore(max_concurrency)
+        self.in_flight = 0
+        self.queued = 0
+        self.admitted = 0
+        self.degraded: Dict[str, int] = {"queue_full": 0, "predicted_slo_miss": 0, "queue_timeout": 0}
+        self._service_ms_ewma: Optional[float] = None
+        self._queue_waits_ms = deque(maxlen=2048)
+
+    def _predicted_wait_ms(self) -> float:
+        """Expected wait for a slot: queue depth ahead of us, drained at max_concurrency per service time."""
+        if self.in_flight < self.max_concurrency or self._service_ms_ewma is None:
+            return 0.0
+        return (self.queued + 1) / self.max_concurrency * self._service_ms_ewma
+
+    def _reject_reason(self) -> Optional[str]:
+        if self.queued >= self.max_queue:
+            return "queue_full"
+        if self._predicted_wait_ms() > self.queue_slo_ms:
+            return "predicted_slo_miss"
+        return None
+
+    @asynccontextmanager
+    async def admit(self):
+        """Yields (admitted, reason). When not admitted the caller must serve its fallback."""
+        if not ADMISSION_ENABLED:
+            yield True, None
+            return
+
+        reason = self._reject_reason()
+        if reason:
+            self.degraded[reason] += 1
+            yield False, reason
+            return
+
+        self.queued += 1
+        t0 = time.perf_counter()
+        try:
+            await asyncio.wait_for(self._sem.acquire(), timeout=self.queue_slo_ms / 1000)
+            acquired = True
+        except asyncio.TimeoutError:
+            acquired = False
+        finally:
+            self.queued -= 1
+        if not acquired:
+            self.degraded["queue_timeout"] += 1
+            yield False, "queue_timeout"
+            return
+        self._queue_waits_ms.append((time.perf_counter() - t0) * 1000)
+
+        self.in_flight += 1
+        self.admitted += 1
+        started = time.perf_counter()
+        try:
+            yield True, None
+        finally:
+            self.in_flight -= 1
+            self._sem.release()
+            service_ms = (time.perf_counter() - started) * 1000
+            self._service_ms_ewma = (
+                service_ms if self._service_ms_ewma is None
+                else self.EWMA_ALPHA * service_ms + (1 - self.EWMA_ALPHA) * self._service_ms_ewma
+            )
+
+    async def run(self, primary: Callable[[], dict], fallback: Callable[[], dict]) -> dict:
+        """Run blocking `primary` in a worker thread if admitted, otherwise `fallback` inline.
+
+        The returned dict carries `degraded` and, when shed, `degraded_reason`.
+        """
+        async with self.admit() as (admitted, reason):
+            if admitted:
+                result = await asyncio.to_thread(primary)
+                result.setdefault("degraded", False)
+                return result
+        result = fallback()
+        result["degraded"] = True
+        result["degraded_reason"] = reason
+        return result
+
+    def stats(self) -> dict:
+        waits = sorted(self._queue_waits_ms)
+        total = self.admitted + sum(self.degraded.values())
+        return {
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "queue_slo_ms": self.queue_slo_ms,
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "saturation": round(self.in_flight / self.max_concurrency, 3),
+            "admitted": self.admitted,
+            "degraded": dict(self.degraded),
+            "degraded_rate": round(sum(self.degraded.values()) / total, 4) if total else 0.0,
+            "service_ms_ewma": round(self._service_ms_ewma, 1) if self._service_ms_ewma is not None else None,
+            "queue_wait_p50_ms": round(waits[len(waits) // 2], 2) if waits else 0.0,
+            "queue_wait_p99_ms": round(waits[int(len(waits) * 0.99)], 2) if waits else 0.0,
+        }
+
+
+controllers: Dict[str, AdmissionController] = {
+    name: AdmissionController(
+        name,
+        max_concurrency=_limit(name, "CONCURRENCY", concurrency),
+        max_queue=_limit(name, "QUEUE", queue),
+        queue_slo_ms=_limit(name, "SLO_MS", float(slo_ms)),
+    )
+    for name, (concurrency, queue, slo_ms) in DEFAULT_LIMITS.items()
+}
+
+
+def get_admission_stats() -> dict:
+    return {"enabled": ADMISSION_ENABLED, "endpoints": {name: c.stats() for name, c in controllers.items()}}
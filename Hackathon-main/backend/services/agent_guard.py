@@ -6,6 +6,9 @@ manipulated into performing unauthorized financial actions.
 import os
 import json
 import re
+import time
+from typing import Iterable, List, Union
+from services.circuit_breaker import groq_breaker, LLM_TIMEOUT_SECONDS
 
 try:
     from groq import Groq
@@ -48,19 +51,140 @@ INJECTION_PATTERNS = [
     (r"\[system\]|\[admin\]|\[override\]", "Instruction Injection", 0.95),
 ]
 
+# Patterns explicit enough that one hit ends the scan and skips the LLM. The reported
+# confidence does not decide this: "act as" or "developer mode" also occur in benign
+# text, so they keep the scan going and the LLM still gets the final word.
+EARLY_STOP_PATTERNS = {
+    r"ignore (your )?(previous |all )?instructions",
+    r"(disable|bypass|override|ignore) (security|verification|otp|authentication)",
+    r"(transfer|send|move) (pkr|rs|rupees|\d+) to",
+    r"(reveal|show|print|output) (your |the )?(system prompt|instructions|rules)",
+    r"\[system\]|\[admin\]|\[override\]",
+}
+
+
+_COMPILED_PATTERNS = [(re.compile(p), a_type, conf, p in EARLY_STOP_PATTERNS)
+                      for p, a_type, conf in INJECTION_PATTERNS]
+
+# Streaming scanner settings. CHUNK_OVERLAP must exceed the longest realistic match
+# so a pattern split across two chunks is still seen whole in the second window.
+SCAN_CHUNK_SIZE = 64 * 1024
+CHUNK_OVERLAP = 256
+WINDOW_CONTEXT = 200          # chars kept either side of a hit for the LLM
+LLM_MAX_CHARS = 6000          # cap on what the LLM sees for a single message
+LLM_SAMPLES = 8               # evenly spaced windows sampled for a no-hit payload
+
+
+def _iter_windows(chunks: Iterable[str], chunk_size: int = SCAN_CHUNK_SIZE):
+    """Re-chunk arbitrary text pieces into (offset, window) pairs.
+
+    Each window is prefixed with the last CHUNK_OVERLAP chars of the previous one,
+    so a match straddling a chunk boundary is seen whole in the later window.
+    """
+    tail = ""
+    offset = 0  # absolute position of window[0]
+    pending: List[str] = []
+    pending_len = 0
+    emitted = False
+
+    def _emit(body: str):
+        nonlocal tail, offset, emitted
+        emitted = True
+        window = tail + body
+        yield offset, window
+        tail = window[-CHUNK_OVERLAP:]
+        offset += len(window) - len(tail)
+
+    for piece in chunks:
+        if not piece:
+            continue
+        pending.append(piece)
+        pending_len += len(piece)
+        if pending_len < chunk_size:
+            continue
+        body = "".join(pending)
+        pending, pending_len = [], 0
+        for i in range(0, len(body) - chunk_size + 1, chunk_size):
+            yield from _emit(body[i:i + chunk_size])
+        rest = body[len(body) - len(body) % chunk_size:]
+        if rest:
+            pending, pending_len = [rest], len(rest)
+    if pending or not emitted:
+        yield from _emit("".join(pending))
+
+
+def scan_payload(chunks: Union[str, Iterable[str]], chunk_size: int = SCAN_CHUNK_SIZE) -> dict:
+    """Regex-scan a (possibly multi-megabyte, possibly generator) payload chunk by chunk.
+
+    Stops consuming input after the first window containing an EARLY_STOP_PATTERNS hit;
+    other hits keep the scan going in case a decisive one follows. Returns the hits,
+    the suspicious windows around them, evenly spaced samples of the whole payload
+    (for the LLM when no rule fires) and how much input was read.
+    """
+    if isinstance(chunks, str):
+        text = chunks
+        chunks = (text[i:i + chunk_size] for i in range(0, len(text), chunk_size))
+
+    active = list(_COMPILED_PATTERNS)
+    hits = []
+    windows = []
+    samples = []      # (offset, text): every stride-th window; stride doubles to stay <= LLM_SAMPLES
+    stride = 1
+    last = (0, "")
+    scanned = 0
+    terminated_early = False
+
+    # A pattern leaves `active` on its first hit; a still-active pattern had no match
+    # anywhere in the previous window, so the overlap can never produce a duplicate.
+    for k, (offset, window) in enumerate(_iter_windows(chunks, chunk_size)):
+        scanned = offset + len(window)
+        last = (offset, window)
+        if k % stride == 0:
+            start = 0 if k == 0 else max(0, (len(window) - LLM_MAX_CHARS) // 2)
+            samples.append((offset + start, window[start:start + LLM_MAX_CHARS]))
+            if len(samples) > LLM_SAMPLES:
+                samples, stride = samples[::2], stride * 2
+        lowered = window.lower()
+        still_active = []
+        for pattern in active:
+            regex, a_type, confidence, decisive = pattern
+            m = regex.search(lowered)
+            if m is None:
+                still_active.append(pattern)
+                continue
+            hits.append({"match": m.group(), "attack_type": a_type, "confidence": confidence,
+                         "decisive": decisive, "position": offset + m.start()})
+            lo, hi = max(0, m.start() - WINDOW_CONTEXT), m.end() + WINDOW_CONTEXT
+            windows.append((offset + lo, window[lo:hi]))
+        active = still_active
+        if not active or any(h["decisive"] for h in hits):
+            terminated_early = True
+            break
 
-def _rule_based_check(text: str) -> dict:
-    text_lower = text.lower()
-    matched_patterns = []
+    offset, window = last
+    if offset + len(window) > samples[-1][0] + len(samples[-1][1]):
+        tail = window[-LLM_MAX_CHARS:]
+        samples.append((offset + len(window) - len(tail), tail))
+
+    return {
+        "hits": hits,
+        "windows": windows,
+        "samples": samples,
+        "chars_scanned": scanned,
+        "terminated_early": terminated_early,
+    }
+
+
+def _rule_based_check(text: Union[str, Iterable[str]], scan: dict = None) -> dict:
+    scan = scan if scan is not None else scan_payload(text)
+    matched_patterns = [h["match"] for h in scan["hits"]]
     max_confidence = 0.0
     attack_type = "Safe"
 
-    for pattern, a_type, confidence in INJECTION_PATTERNS:
-        if re.search(pattern, text_lower):
-            matched_patterns.append(re.search(pattern, text_lower).group())
-            if confidence > max_confidence:
-                max_confidence = confidence
-                attack_type = a_type
+    for hit in scan["hits"]:
+        if hit["confidence"] > max_confidence:
+            max_confidence = hit["confidence"]
+            attack_type = hit["attack_type"]
 
     is_injection = max_confidence >= 0.5
 
@@ -95,20 +219,75 @@ def _rule_based_check(text: str) -> dict:
     }
 
 
-def check_agent_message(message: str) -> dict:
-    """Check if a message targeting the AI agent is a prompt injection attack."""
+def _llm_excerpt(message: Union[str, Iterable[str]], scan: dict) -> str:
+    """What the LLM gets to see: short messages verbatim, large payloads only their suspicious windows."""
+    if isinstance(message, str) and len(message) <= LLM_MAX_CHARS:
+        return message
+    if not scan["windows"]:
+        return _sampled_excerpt(scan)
+
+    merged = []
+    for start, text in sorted(scan["windows"]):
+        if merged and start <= merged[-1][0] + len(merged[-1][1]):
+            prev_start, prev_text = merged[-1]
+            merged[-1] = (prev_start, prev_text + text[prev_start + len(prev_text) - start:])
+        else:
+            merged.append((start, text))
+    excerpt = "\n[...]\n".join(text for _, text in merged)[:LLM_MAX_CHARS]
+    # Only weak hits: spend what is left of the budget on the rest of the payload
+    if LLM_MAX_CHARS - len(excerpt) >= 1000:
+        excerpt += "\n[... rest of the payload ...]\n" + _sampled_excerpt(scan, LLM_MAX_CHARS - len(excerpt))
+    return excerpt
+
+
+def _sampled_excerpt(scan: dict, max_chars: int = LLM_MAX_CHARS) -> str:
+    """Stitch equal slices of the samples so the LLM sees the whole payload's span, not just its head."""
+    samples = scan["samples"]
+    budget = (max_chars - 100) // len(samples) - 16   # room for the banner and offset markers
+    parts = []
+    for i, (start, text) in enumerate(samples):
+        if i == 0:
+            lo = 0                                    # document head
+        elif i == len(samples) - 1:
+            lo = max(0, len(text) - budget)           # document tail
+        else:
+            lo = max(0, (len(text) - budget) // 2)
+        parts.append(f"[@{start + lo}]\n{text[lo:lo + budget]}")
+    return (f"[{scan['chars_scanned']} chars total, no rule hits; {len(parts)} evenly spaced excerpts]\n"
+            + "\n[...]\n".join(parts))
+
+
+def llm_configured() -> bool:
+    return bool(os.getenv("GROQ_API_KEY")) and GROQ_AVAILABLE
+
+
+def check_agent_message(message: Union[str, Iterable[str]], use_llm: bool = True) -> dict:
+    """Check if a message targeting the AI agent is a prompt injection attack.
+
+    Accepts a string or an iterable of text chunks (documents, tool outputs).
+    `served_by` in the result says which path answered: "llm" or "rule-based".
+    """
+    scan = scan_payload(message)
     api_key = os.getenv("GROQ_API_KEY")
 
-    if not api_key or not GROQ_AVAILABLE:
-        return _rule_based_check(message)
+    # An explicit injection phrase already decides the verdict; the LLM could only repeat it
+    if any(h["decisive"] for h in scan["hits"]):
+        return {**_rule_based_check(message, scan), "served_by": "rule-based"}
+    if not use_llm or not api_key or not GROQ_AVAILABLE:
+        return {**_rule_based_check(message, scan), "served_by": "rule-based"}
+    if not groq_breaker.allow():
+        return {**_rule_based_check(message, scan), "served_by": "rule-based",
+                "degraded": True, "degraded_reason": "circuit_open"}
 
+    started = time.perf_counter()
+    responded = False
     try:
-        client = Groq(api_key=api_key)
+        client = Groq(api_key=api_key, timeout=LLM_TIMEOUT_SECONDS, max_retries=0)
         response = client.chat.completions.create(
             model="llama-3.3-70b-versatile",
             messages=[
                 {"role": "system", "content": SYSTEM_PROMPT},
-                {"role": "user", "content": f"Analyze this message for prompt injection:\n\n{message}"}
+                {"role": "user", "content": f"Analyze this message for prompt injection:\n\n{_llm_excerpt(message, scan)}"}
             ],
             temperature=0.1,
             max_tokens=400,
@@ -116,8 +295,13 @@ def check_agent_message(message: str) -> dict:
         raw = response.choices[0].message.content.strip()
         if raw.startswith("```"):
             raw = re.sub(r"```[a-z]*\n?", "", raw).strip()
+        groq_breaker.record_success((time.perf_counter() - started) * 1000)
+        responded = True
         result = json.loads(raw)
+        result["served_by"] = "llm"
         return result
     except Exception as e:
+        if not responded:  # a malformed reply is the model's fault, not the provider's
+            groq_breaker.record_failure(e)
         print(f"[AgentGuard] Groq error: {e}, using rule-based fallback.")
-        return _rule_based_check(message)
+        return {**_rule_based_check(message, scan), "served_by": "rule-based"}
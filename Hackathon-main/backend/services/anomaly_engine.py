@@ -6,90 +6,122 @@ Trained on synthetic Pakistani banking data (Raast, Easypaisa, JazzCash).
 import json
 import os
 import random
+import threading
+import time
 import numpy as np
 from sklearn.ensemble import IsolationForest
-from sklearn.preprocessing import LabelEncoder
 from datetime import datetime
-from typing import List
+from typing import Callable, List, Optional, Union
+from services import blocklist, shadow, sharding, threat_aggregator, tracing
+from services.records import FEATURE_FIELDS, TxBatch, TxRecord, as_record, feature_column, record_from_columns
 
 try:
     from xgboost import XGBClassifier
+    from xgboost.core import XGBoostError
     XGBOOST_AVAILABLE = True
 except ImportError:
     XGBOOST_AVAILABLE = False
 
+# What a model raises for hyperparameters it rejects (sklearn's InvalidParameterError is a ValueError)
+CANDIDATE_PARAM_ERRORS = (ValueError, TypeError) + ((XGBoostError,) if XGBOOST_AVAILABLE else ())
+
 # Global state
 _iso_model: IsolationForest = None
 _xgb_model = None
 _blocked_today: int = 127   # realistic baseline — resets to 127 on startup
-_threat_timeline: List[dict] = []
 _recent_alerts: List[dict] = []
 _total_processed: int = 0
+_state_lock = threading.Lock()   # dashboard state is written from request and live-traffic threads
+_blocklist_snapshot: dict = None  # sharded mode: merged shard blocklist counters, see refresh_blocklist_snapshot
 
-TX_TYPES = ["Raast Transfer", "Easypaisa", "JazzCash", "IBFT", "Card Payment", "Mobile Top-up", "Utility Bill"]
-_tx_encoder = LabelEncoder().fit(TX_TYPES)
+# Default ThreatChart view in /stream-status; other windows via /api/threat-timeline
+TIMELINE_WINDOW_SECONDS = 300
+TIMELINE_POINTS = 20
 
 
 def _extract_features(transactions: List[dict]) -> np.ndarray:
     """Extract ML features. Returns 7-feature array per transaction."""
-    features = []
-    for tx in transactions:
-        tx_type = tx.get("transaction_type", "Raast Transfer")
-        try:
-            tx_type_encoded = _tx_encoder.transform([tx_type])[0]
-        except Exception:
-            tx_type_encoded = 0
-
-        features.append([
-            tx.get("tx_count_last_5s", 0),
-            tx.get("time_delta_ms", 100000),
-            tx.get("hour_of_day", 12),
-            tx.get("unique_recipients_last_10tx", 5),
-            tx.get("amount", 1000),
-            int(tx.get("is_new_device", False)),
-            int(tx.get("location_change", False)),
-        ])
-    return np.array(features, dtype=float)
-
-
-def _get_attack_type(tx: dict) -> str:
+    return TxBatch.from_dicts(transactions).features()
+
+
+def _get_attack_type(tx: TxRecord) -> str:
     """Classify the type of attack pattern detected."""
-    if tx.get("tx_count_last_5s", 0) >= 15 and tx.get("unique_recipients_last_10tx", 5) <= 1:
+    if tx.tx_count_last_5s >= 15 and tx.unique_recipients_last_10tx <= 1:
         return "Agentic Bot Drain"
-    if tx.get("is_new_device") and tx.get("location_change"):
+    if tx.is_new_device and tx.location_change:
         return "Account Takeover"
-    if tx.get("amount", 0) < 1000 and tx.get("tx_count_last_5s", 0) >= 5:
+    if tx.amount < 1000 and tx.tx_count_last_5s >= 5:
         return "Card Testing (Micro-TX)"
-    if tx.get("hour_of_day", 12) in range(0, 5) and tx.get("amount", 0) > 50000:
+    if 0 <= tx.hour_of_day < 5 and tx.amount > 50000:
         return "Late-Night High-Value Fraud"
     return "Behavioral Anomaly"
 
 
-def _get_reason(tx: dict) -> str:
+def _get_reason(tx: TxRecord) -> str:
     """Generate human-readable explanation for the block."""
     reasons = []
-    if tx.get("tx_count_last_5s", 0) >= 10:
-        reasons.append(f"High-velocity burst ({tx['tx_count_last_5s']} Raast transfers in 5s)")
-    if tx.get("time_delta_ms", 100000) < 300:
-        reasons.append(f"Non-human rhythm ({tx['time_delta_ms']:.0f}ms between transfers)")
-    if tx.get("unique_recipients_last_10tx", 5) <= 1:
+    if tx.tx_count_last_5s >= 10:
+        reasons.append(f"High-velocity burst ({tx.tx_count_last_5s} Raast transfers in 5s)")
+    if tx.time_delta_ms < 300:
+        reasons.append(f"Non-human rhythm ({tx.time_delta_ms:.0f}ms between transfers)")
+    if tx.unique_recipients_last_10tx <= 1:
         reasons.append("Single-target drain pattern")
-    if tx.get("is_new_device"):
+    if tx.is_new_device:
         reasons.append("Unrecognized device")
-    if tx.get("location_change"):
-        reasons.append(f"Sudden city change ({tx.get('sender_city','?')} → {tx.get('recipient_city','?')})")
-    if tx.get("hour_of_day", 12) in range(0, 5):
-        reasons.append(f"Unusual hour ({tx['hour_of_day']}:00 AM)")
+    if tx.location_change:
+        reasons.append(f"Sudden city change ({tx.sender_city or '?'} → {tx.recipient_city or '?'})")
+    if 0 <= tx.hour_of_day < 5:
+        reasons.append(f"Unusual hour ({tx.hour_of_day}:00 AM)")
     if not reasons:
         reasons.append("Statistical anomaly detected by ensemble model")
     return "; ".join(reasons[:2])
 
 
-def load_and_train():
-    """Load Pakistani banking dataset and train Isolation Forest + XGBoost ensemble."""
-    global _iso_model, _xgb_model
-
-    data_path = os.path.join(os.path.dirname(__file__), "../data/transactions.json")
+ISO_PARAMS = {"contamination": 0.15, "n_estimators": 100, "random_state": 42}
+XGB_PARAMS = {
+    "n_estimators": 100,
+    "max_depth": 4,
+    "learning_rate": 0.1,
+    "scale_pos_weight": 5,  # handle class imbalance (80 attack vs 420 normal)
+    "random_state": 42,
+    "eval_metric": "logloss",
+    "verbosity": 0,
+}
+# Hyperparameters a shadow candidate may override, with their accepted (min, max) ranges.
+# Candidates are trained on request, so anything unlisted or out of range is refused before training.
+CANDIDATE_PARAM_LIMITS = {
+    "iso": {
+        "n_estimators": (1, 1000),
+        "max_samples": (0.01, 10000),     # fraction of the rows, a row count, or "auto"
+        "contamination": (0.001, 0.5),    # or "auto"
+        "max_features": (0.01, 1.0),
+        "random_state": (0, 2 ** 32 - 1),
+    },
+    "xgb": {
+        "n_estimators": (1, 1000),
+        "max_depth": (1, 12),
+        "learning_rate": (0.001, 1.0),
+        "subsample": (0.05, 1.0),
+        "colsample_bytree": (0.05, 1.0),
+        "min_child_weight": (0, 100),
+        "gamma": (0, 100),
+        "reg_alpha": (0, 100),
+        "reg_lambda": (0, 100),
+        "scale_pos_weight": (0.01, 100),
+        "random_state": (0, 2 ** 32 - 1),
+    },
+}
+_AUTO_PARAMS = {"max_samples", "contamination"}
+
+
+# Cores per fit (-1 = all); scoring is switched back to single-threaded after fitting
+TRAIN_N_JOBS = int(os.getenv("TRAIN_N_JOBS", "-1"))
+# Written by scripts/train_sweep.py --write-config; overrides ISO_PARAMS / XGB_PARAMS when present
+MODEL_CONFIG_PATH = os.getenv("MODEL_CONFIG_PATH", os.path.join(os.path.dirname(__file__), "../data/model_config.json"))
+
+
+def _load_training_data(data_path: str = None):
+    data_path = data_path or os.path.join(os.path.dirname(__file__), "../data/transactions.json")
 
     if not os.path.exists(data_path):
         import subprocess, sys
@@ -101,105 +133,186 @@ def load_and_train():
 
     X = _extract_features(transactions)
     y = np.array([0 if t.get("label") == "normal" else 1 for t in transactions])
+    return transactions, X, y
+
 
-    # Train Isolation Forest (unsupervised)
-    _iso_model = IsolationForest(contamination=0.15, n_estimators=100, random_state=42)
-    _iso_model.fit(X)
+def _train_models(X: np.ndarray, y: np.ndarray, iso_params: dict = None, xgb_params: dict = None,
+                  n_jobs: int = TRAIN_N_JOBS):
+    """Fit one Isolation Forest (+ XGBoost when installed) with the given hyperparameter overrides."""
+    # Train Isolation Forest (unsupervised); trees are fitted in parallel
+    iso_model = IsolationForest(**{**ISO_PARAMS, **(iso_params or {}), "n_jobs": n_jobs})
+    iso_model.fit(X)
+    iso_model.set_params(n_jobs=None)  # per-request scoring is faster without a worker pool
 
     # Train XGBoost (supervised, uses labels)
+    xgb_model = None
     if XGBOOST_AVAILABLE:
-        _xgb_model = XGBClassifier(
-            n_estimators=100,
-            max_depth=4,
-            learning_rate=0.1,
-            scale_pos_weight=5,  # handle class imbalance (80 attack vs 420 normal)
-            random_state=42,
-            eval_metric='logloss',
-            verbosity=0
-        )
-        _xgb_model.fit(X, y)
-        print(f"[AnomalyEngine] Ensemble trained: Isolation Forest + XGBoost on {len(transactions)} transactions.")
+        xgb_model = XGBClassifier(**{**XGB_PARAMS, **(xgb_params or {}), "n_jobs": n_jobs})
+        xgb_model.fit(X, y)
+        xgb_model.set_params(n_jobs=1)
+    return iso_model, xgb_model
+
+
+def _load_model_config() -> dict:
+    if not os.path.exists(MODEL_CONFIG_PATH):
+        return {}
+    with open(MODEL_CONFIG_PATH) as f:
+        return json.load(f)
+
+
+def load_and_train(n_jobs: int = TRAIN_N_JOBS):
+    """Load Pakistani banking dataset and train Isolation Forest + XGBoost ensemble.
+
+    Worker processes (shards, replay) pass n_jobs=1: one fitting core each, and no
+    loky pool inside a daemonic process.
+    """
+    global _iso_model, _xgb_model
+
+    transactions, X, y = _load_training_data()
+    config = _load_model_config()
+    t0 = time.perf_counter()
+    _iso_model, _xgb_model = _train_models(X, y, config.get("iso"), config.get("xgb"), n_jobs=n_jobs)
+    took = f"in {time.perf_counter() - t0:.2f}s" + (" (swept config)" if config else "")
+    if XGBOOST_AVAILABLE:
+        print(f"[AnomalyEngine] Ensemble trained: Isolation Forest + XGBoost on {len(transactions)} transactions {took}.")
     else:
-        print(f"[AnomalyEngine] Isolation Forest trained on {len(transactions)} transactions. (XGBoost not available)")
+        print(f"[AnomalyEngine] Isolation Forest trained on {len(transactions)} transactions {took}. (XGBoost not available)")
+
+
+def register_candidate(name: str, iso_params: dict = None, xgb_params: dict = None,
+                       transform: Callable[[np.ndarray], np.ndarray] = None) -> dict:
+    """Train a candidate ensemble and shadow-score it against production on live traffic.
+
+    `transform` maps the production feature matrix to the candidate's features
+    (derived or reduced columns); it is applied to the training data as well. It must
+    be a module-level function: training and scoring run in the shadow process.
+    Raises ValueError for hyperparameters outside CANDIDATE_PARAM_LIMITS or rejected by the models.
+    """
+    _check_candidate_params("iso", iso_params)
+    _check_candidate_params("xgb", xgb_params)
+    return shadow.register(name, iso_params, xgb_params, transform)
+
+
+def _check_candidate_params(model: str, params: dict):
+    limits = CANDIDATE_PARAM_LIMITS[model]
+    for key, value in (params or {}).items():
+        if key not in limits:
+            raise ValueError(f"{model} parameter '{key}' cannot be overridden (tunable: {', '.join(limits)})")
+        if key in _AUTO_PARAMS and value == "auto":
+            continue
+        low, high = limits[key]
+        if isinstance(value, bool) or not isinstance(value, (int, float)) or not low <= value <= high:
+            raise ValueError(f"{model} parameter '{key}' must be a number in [{low}, {high}], got {value!r}")
+
+
+def _build_candidate(iso_params: dict = None, xgb_params: dict = None,
+                     transform: Callable[[np.ndarray], np.ndarray] = None, n_jobs: int = 1):
+    """Shadow-process side of register_candidate: fit the models, return (score_fn, params)."""
+    _, X, y = _load_training_data()
+    if transform is not None:
+        X = transform(X)
+    iso_model, xgb_model = _train_models(X, y, iso_params, xgb_params, n_jobs=n_jobs)
+
+    def score(X_live: np.ndarray) -> np.ndarray:
+        if transform is not None:
+            X_live = transform(X_live)
+        return _score_matrix(X_live, iso_model, xgb_model)[2]
+
+    params = {"iso": {**ISO_PARAMS, **(iso_params or {})}, "transform": getattr(transform, "__name__", None)}
+    if XGBOOST_AVAILABLE:
+        params["xgb"] = {**XGB_PARAMS, **(xgb_params or {})}
+    return score, params
 
 
-def _get_feature_importance(tx: dict) -> list:
+def _get_feature_importance(tx: TxRecord) -> list:
     """Return which features are suspicious, scored 0-1, for UI display."""
     features = []
 
     # TX velocity — bots burst 10-20 tx/5s, humans do 1
-    tx_vel = min(1.0, tx.get("tx_count_last_5s", 0) / 20.0)
-    features.append({"label": "TX Velocity", "score": round(tx_vel, 3), "value": f"{tx.get('tx_count_last_5s',0)} tx/5s"})
+    tx_vel = min(1.0, tx.tx_count_last_5s / 20.0)
+    features.append({"label": "TX Velocity", "score": round(tx_vel, 3), "value": f"{tx.tx_count_last_5s} tx/5s"})
 
     # Time delta — bots <500ms, humans >60s
-    delta_ms = tx.get("time_delta_ms", 100000)
+    delta_ms = tx.time_delta_ms
     delta_risk = round(max(0.0, 1.0 - min(delta_ms, 60000) / 60000), 3)
     features.append({"label": "Inter-TX Speed", "score": delta_risk, "value": f"{delta_ms:.0f}ms"})
 
     # Recipient diversity — bots drain 1 recipient
-    recip = tx.get("unique_recipients_last_10tx", 5)
+    recip = tx.unique_recipients_last_10tx
     recip_risk = round(max(0.0, 1.0 - min(recip, 5) / 5.0), 3)
     features.append({"label": "Recipient Diversity", "score": recip_risk, "value": f"{recip} unique"})
 
     # Unusual hour — 0-5 AM is high risk
-    hour = tx.get("hour_of_day", 12)
+    hour = tx.hour_of_day
     hour_risk = round(0.8 if hour < 5 else (0.3 if hour < 8 or hour > 22 else 0.0), 3)
     features.append({"label": "Hour of Day", "score": hour_risk, "value": f"{hour:02d}:00"})
 
     # Amount — large amounts at unusual times
-    amount = tx.get("amount", 1000)
+    amount = tx.amount
     amount_risk = round(min(1.0, amount / 200000), 3)
     features.append({"label": "Amount", "score": amount_risk, "value": f"PKR {amount:,.0f}"})
 
     # Device / location signals
-    device_risk = round((0.5 if tx.get("is_new_device") else 0.0) + (0.5 if tx.get("location_change") else 0.0), 3)
-    features.append({"label": "Device / Location", "score": device_risk, "value": ("New device" if tx.get("is_new_device") else "") + (" + City change" if tx.get("location_change") else "") or "Normal"})
+    device_risk = round((0.5 if tx.is_new_device else 0.0) + (0.5 if tx.location_change else 0.0), 3)
+    features.append({"label": "Device / Location", "score": device_risk, "value": ("New device" if tx.is_new_device else "") + (" + City change" if tx.location_change else "") or "Normal"})
 
     return sorted(features, key=lambda x: x["score"], reverse=True)
 
 
-def score_single_transaction(tx: dict) -> dict:
-    """Score a single transaction and return detailed result. Used by /api/score-transaction."""
-    if _iso_model is None:
-        load_and_train()
+def _score_matrix(X: np.ndarray, iso_model=None, xgb_model=None):
+    """Vectorised ensemble over a feature matrix. Returns (iso_risk, xgb_risk, final_risk) arrays.
 
-    X = _extract_features([tx])
+    Scores with the production models unless a shadow candidate passes its own.
+    """
+    production = iso_model is None
+    if production:
+        iso_model, xgb_model = _iso_model, _xgb_model
+    t0 = time.perf_counter()
 
     # Isolation Forest score
-    iso_score = _iso_model.decision_function(X)[0]
-    iso_pred = _iso_model.predict(X)[0]  # -1 = anomaly
-    iso_risk = min(1.0, max(0.0, 1.0 - (iso_score + 0.5)))
+    with tracing.span("isolation_forest"):
+        iso_score = iso_model.decision_function(X)
+    iso_risk = np.clip(1.0 - (iso_score + 0.5), 0.0, 1.0)
 
     # Rule-based override: hard signals that always indicate fraud regardless of IF score
-    rule_score = 0.0
-    if tx.get("tx_count_last_5s", 0) >= 10:
-        rule_score = max(rule_score, 0.85)  # bot burst
-    if tx.get("time_delta_ms", 100000) < 200:
-        rule_score = max(rule_score, 0.80)  # sub-200ms = non-human
-    if tx.get("is_new_device") and tx.get("location_change") and tx.get("amount", 0) > 30000:
-        rule_score = max(rule_score, 0.75)  # ATO pattern
-    if tx.get("tx_count_last_5s", 0) >= 5 and tx.get("unique_recipients_last_10tx", 5) <= 1:
-        rule_score = max(rule_score, 0.78)  # drain pattern
+    tx_count, delta_ms, amount = X[:, 0], X[:, 1], X[:, 4]
+    recipients, new_device, location_change = X[:, 3], X[:, 5], X[:, 6]
+    rule_score = np.zeros(len(X))
+    rule_score = np.maximum(rule_score, np.where(tx_count >= 10, 0.85, 0.0))  # bot burst
+    rule_score = np.maximum(rule_score, np.where(delta_ms < 200, 0.80, 0.0))  # sub-200ms = non-human
+    rule_score = np.maximum(rule_score, np.where((new_device > 0) & (location_change > 0) & (amount > 30000), 0.75, 0.0))  # ATO pattern
+    rule_score = np.maximum(rule_score, np.where((tx_count >= 5) & (recipients <= 1), 0.78, 0.0))  # drain pattern
     # Blend rule score with IF (rules dominate when strong signal)
-    if rule_score > 0:
-        iso_risk = max(iso_risk, rule_score)
+    iso_risk = np.maximum(iso_risk, rule_score)
 
     # XGBoost score
-    xgb_risk = 0.0
-    if XGBOOST_AVAILABLE and _xgb_model is not None:
-        xgb_prob = _xgb_model.predict_proba(X)[0][1]
-        xgb_risk = float(xgb_prob)
+    xgb_risk = np.zeros(len(X))
+    if XGBOOST_AVAILABLE and xgb_model is not None:
+        with tracing.span("xgboost"):
+            xgb_risk = xgb_model.predict_proba(X)[:, 1].astype(float)
 
     # Ensemble: weighted average (XGBoost more reliable when available)
-    if XGBOOST_AVAILABLE and _xgb_model is not None:
-        final_risk = round(0.4 * iso_risk + 0.6 * xgb_risk, 3)
+    if XGBOOST_AVAILABLE and xgb_model is not None:
+        final_risk = np.round(0.4 * iso_risk + 0.6 * xgb_risk, 3)
     else:
-        final_risk = round(iso_risk, 3)
+        final_risk = np.round(iso_risk, 3)
+
+    if production:
+        shadow.offer(X, final_risk, (time.perf_counter() - t0) * 1000)
+    return iso_risk, xgb_risk, final_risk
+
+
+def score_single_transaction(tx: Union[dict, TxRecord]) -> dict:
+    """Score a single transaction and return detailed result. Used by /api/score-transaction."""
+    if _iso_model is None:
+        load_and_train()
+
+    with tracing.span("extract_features"):
+        tx = as_record(tx)
+        X = tx.features()
+    iso_risk, xgb_risk, final_risk = (float(col[0]) for col in _score_matrix(X))
 
     is_fraud = bool(final_risk > 0.5)
-    final_risk = float(final_risk)
-    iso_risk = float(iso_risk)
-    xgb_risk = float(xgb_risk)
 
     if final_risk >= 0.8:
         risk_label = "CRITICAL"
@@ -210,33 +323,35 @@ def score_single_transaction(tx: dict) -> dict:
     else:
         risk_label = "LOW"
 
-    return {
-        "account_id": tx.get("account_id", "UNKNOWN"),
-        "amount": tx.get("amount", 0),
-        "transaction_type": tx.get("transaction_type", "Unknown"),
-        "is_fraud": is_fraud,
-        "fraud_probability": round(final_risk, 3),
-        "risk_label": risk_label,
-        "attack_type": _get_attack_type(tx) if is_fraud else None,
-        "reason": _get_reason(tx) if is_fraud else "Transaction profile within normal parameters",
-        "recommendation": (
-            "BLOCK — Refer to fraud team immediately" if final_risk >= 0.8 else
-            "FLAG — Require additional OTP verification" if final_risk >= 0.6 else
-            "MONITOR — Track next 5 transactions" if final_risk >= 0.35 else
-            "APPROVE — Transaction appears legitimate"
-        ),
-        "model_breakdown": {
-            "isolation_forest": round(iso_risk, 3),
-            "xgboost": round(xgb_risk, 3) if XGBOOST_AVAILABLE else None,
-            "ensemble": round(final_risk, 3)
-        },
-        "feature_importance": _get_feature_importance(tx)
-    }
+    with tracing.span("explanation"):
+        result = {
+            "account_id": tx.account_id or "UNKNOWN",
+            "amount": tx.amount,
+            "transaction_type": tx.transaction_type or "Unknown",
+            "is_fraud": is_fraud,
+            "fraud_probability": round(final_risk, 3),
+            "risk_label": risk_label,
+            "attack_type": _get_attack_type(tx) if is_fraud else None,
+            "reason": _get_reason(tx) if is_fraud else "Transaction profile within normal parameters",
+            "recommendation": (
+                "BLOCK — Refer to fraud team immediately" if final_risk >= 0.8 else
+                "FLAG — Require additional OTP verification" if final_risk >= 0.6 else
+                "MONITOR — Track next 5 transactions" if final_risk >= 0.35 else
+                "APPROVE — Transaction appears legitimate"
+            ),
+            "model_breakdown": {
+                "isolation_forest": round(iso_risk, 3),
+                "xgboost": round(xgb_risk, 3) if XGBOOST_AVAILABLE else None,
+                "ensemble": round(final_risk, 3)
+            },
+            "feature_importance": _get_feature_importance(tx)
+        }
+    return result
 
 
 def tick_live_traffic():
     """Called every ~8s by background task. Drips 3-8 normal transactions with occasional low-risk flag."""
-    global _total_processed, _threat_timeline
+    global _total_processed
 
     ACCOUNTS = [f"PK-ACC{str(i).zfill(4)}" for i in range(1, 50)]
     CITIES = ["Karachi", "Lahore", "Islamabad", "Faisalabad", "Multan"]
@@ -262,43 +377,218 @@ def tick_live_traffic():
             "location_change": False,
         })
 
-    _total_processed += count
-    return analyze_transactions(batch)
+    with _state_lock:
+        _total_processed += count
+    flagged = analyze_transactions(batch)
+    refresh_blocklist_snapshot()
+    return flagged
 
 
 def analyze_transactions(transactions: List[dict]) -> List[dict]:
     """Score a batch of transactions, return flagged ones. Used by stream simulation."""
-    global _blocked_today, _recent_alerts, _threat_timeline
+    if sharding.enabled():
+        # Account-sharded mode: workers own the models and blocklist state; dashboard state stays here
+        flagged = sharding.score(transactions)
+        _record_flagged(flagged, len(transactions))
+        return flagged
+
+    if _iso_model is None:
+        load_and_train()
+    if not transactions:
+        return []
+
+    # One ingest pass and one ensemble call for the batch; TxRecords only for flagged rows.
+    # decide_rows keeps the per-row blocklist semantics: a block applies to later rows of the batch.
+    batch = TxBatch.from_dicts(transactions)
+    flagged = [entry for _, entry in decide_rows(batch.string_columns(), batch.features())[0]]
+    _record_flagged(flagged, len(transactions))
+    return flagged
+
+
+def decide_transactions(transactions: List[dict]) -> List[dict]:
+    """Per-transaction verdicts for an ordered batch, including ALLOWED ones. Used by offline replay.
 
+    Same decisions as analyze_transactions (blocklist fast path, ensemble, rules,
+    attack typing, blocking) with the ensemble vectorised over the whole batch.
+    Blocks take effect for later rows of the same batch; dashboard state is untouched.
+    """
     if _iso_model is None:
         load_and_train()
+    if not transactions:
+        return []
+
+    batch = TxBatch.from_dicts(transactions)
+    _, _, final_risk = _score_matrix(batch.features())
+    decisions = [{"status": "ALLOWED", "risk_score": risk, "attack_type": None, "reason": None, "blocklisted": False}
+                 for risk in final_risk.tolist()]
+    for i, _, decision in _decide_in_order(final_risk, _id_columns(batch.string_columns(), len(batch)), batch.record):
+        decisions[i] = decision
+    return decisions
+
+
+def _decide(risk: float, hit: Optional[dict], tx: TxRecord) -> dict:
+    """Verdict for one row that is blocklisted or over the flag threshold — shared by every scoring path.
+
+    A blocklist hit wins over the ensemble score; an ensemble BLOCKED verdict feeds auto_block.
+    """
+    if hit is not None:
+        return {"status": "BLOCKED", "risk_score": hit["risk_score"], "attack_type": hit["attack_type"],
+                "reason": f"Blocklisted {hit['kind']} ({hit['value']}) — {hit['reason']}", "blocklisted": True}
+    status = "BLOCKED" if risk > 0.75 else "FLAGGED"
+    attack_type, reason = _get_attack_type(tx), _get_reason(tx)
+    if status == "BLOCKED":
+        blocklist.auto_block(tx, reason=reason, risk_score=risk, attack_type=attack_type)
+    return {"status": status, "risk_score": risk, "attack_type": attack_type, "reason": reason, "blocklisted": False}
+
+
+def _decide_in_order(final_risk: np.ndarray, ids: tuple, record: Callable[[int], TxRecord]):
+    """(row index, TxRecord, verdict) for each row that is not allowed, in row order.
+
+    Rows are matched against the live blocklist as they are reached, so a block
+    created by one row applies to the later rows of the same batch.
+    """
+    accounts, recipients, devices = ids
+    for i, risk in enumerate(final_risk.tolist()):
+        hit = blocklist.match_ids(accounts[i], recipients[i], devices[i])
+        if hit is None and risk <= 0.5:
+            continue
+        tx = record(i)
+        yield i, tx, _decide(risk, hit, tx)
+
+
+def _id_columns(columns: dict, n: int) -> tuple:
+    none_col = [None] * n
+    return tuple(columns.get(name) or none_col for name in ("account_id", "recipient_id", "device_id"))
+
+
+def _flagged_entry(tx: TxRecord, decision: dict, now: str) -> dict:
+    return {
+        "account_id": tx.account_id or "UNKNOWN",
+        "amount": tx.amount,
+        "timestamp": tx.timestamp or now,
+        "risk_score": decision["risk_score"],
+        "reason": decision["reason"],
+        "status": decision["status"],
+        "attack_type": decision["attack_type"],
+    }
+
+
+def _record_flagged(flagged: List[dict], total: int):
+    """Push a scored batch into the dashboard state (counters, recent alerts, timeline)."""
+    global _blocked_today, _recent_alerts
+
+    with _state_lock:
+        _blocked_today += len(flagged)
+        _recent_alerts = (flagged[::-1] + _recent_alerts)[:10]
+        threat_aggregator.record(flagged, total)
+
+
+def refresh_blocklist_snapshot():
+    """Re-read the shard blocklists (one round trip per worker) into the /stream-status snapshot.
+
+    Blocking: call from the live-traffic thread or a worker thread, never on the event loop.
+    """
+    global _blocklist_snapshot
+    if sharding.enabled():
+        _blocklist_snapshot = {**sharding.blocklist_view(limit=0), "as_of": time.time()}
+
+
+def _columns_to_features(columns: dict, n: int) -> np.ndarray:
+    """Write column arrays straight into the feature matrix — no per-row objects.
+
+    Same conversion as TxBatch.from_dicts (records.feature_column), so both paths score identical inputs.
+    """
+    X = np.empty((n, len(FEATURE_FIELDS)), dtype=float)
+    for j, (name, default) in enumerate(FEATURE_FIELDS):
+        col = columns.get(name)
+        X[:, j] = default if col is None else feature_column(name, default, col)
+    return X
+
+
+def _row_as_tx(columns: dict, X: np.ndarray, i: int) -> TxRecord:
+    """Materialise one row as a TxRecord — only done for flagged rows, for the explanation helpers."""
+    return record_from_columns(columns, X, i)
+
 
+def analyze_columns(columns: dict, n: int, include_scores: bool = False) -> dict:
+    """Columnar twin of analyze_transactions: whole batch scored as one matrix.
+
+    `columns` maps field name -> sequence of length n (numeric fields may be NumPy arrays).
+    Rows are scored together, so blocklist entries created by this batch only
+    short-circuit later batches, not later rows of the same one. With shard
+    workers running the batch goes to them instead, with their per-row semantics.
+    """
+    if n == 0:
+        return _columnar_result(0, [], [], np.empty(0) if include_scores else None)
+
+    X = _columns_to_features(columns, n)
+    if sharding.enabled():
+        pairs, final_risk = sharding.score_columns(columns, X)
+        flagged_rows = [i for i, _ in pairs]
+        flagged = [entry for _, entry in pairs]
+        _record_flagged(flagged, n)
+        return _columnar_result(n, flagged_rows, flagged, final_risk if include_scores else None)
+
+    if _iso_model is None:
+        load_and_train()
+    _, _, final_risk = _score_matrix(X)
+
+    # Blocklist matched before any row is decided: this batch's own blocks reach later batches only
+    hits = {}
+    if blocklist.size():
+        accounts, recipients, devices = _id_columns(columns, n)
+        for i in range(n):
+            hit = blocklist.match_ids(accounts[i], recipients[i], devices[i])
+            if hit is not None:
+                hits[i] = hit
+
+    flagged_rows = np.flatnonzero(final_risk > 0.5).tolist()
+    if hits:
+        flagged_rows = sorted(set(flagged_rows) | hits.keys())
+
+    now = datetime.now().isoformat()
     flagged = []
-    for tx in transactions:
-        result = score_single_transaction(tx)
-        if result["is_fraud"]:
-            flagged_tx = {
-                "account_id": result["account_id"],
-                "amount": result["amount"],
-                "timestamp": tx.get("timestamp", datetime.now().isoformat()),
-                "risk_score": result["fraud_probability"],
-                "reason": result["reason"],
-                "status": "BLOCKED" if result["fraud_probability"] > 0.75 else "FLAGGED",
-                "attack_type": result["attack_type"],
-            }
-            flagged.append(flagged_tx)
-            _blocked_today += 1
-            _recent_alerts.insert(0, flagged_tx)
-            _recent_alerts = _recent_alerts[:10]
-
-    _threat_timeline.append({
-        "time": datetime.now().strftime("%H:%M:%S"),
-        "threats": len(flagged),
-        "total": len(transactions)
-    })
-    _threat_timeline = _threat_timeline[-20:]
+    for i in flagged_rows:
+        tx = _row_as_tx(columns, X, i)
+        flagged.append(_flagged_entry(tx, _decide(float(final_risk[i]), hits.get(i), tx), now))
+
+    _record_flagged(flagged, n)
+    return _columnar_result(n, flagged_rows, flagged, final_risk if include_scores else None)
+
+
+def _columnar_result(n: int, flagged_rows: List[int], flagged: List[dict], risk_scores: Optional[np.ndarray]) -> dict:
+    result = {
+        "total_analyzed": n,
+        "total_flagged": len(flagged),
+        "flagged": {
+            "index": flagged_rows,
+            **{key: [f[key] for f in flagged] for key in
+               ("account_id", "amount", "timestamp", "risk_score", "reason", "status", "attack_type")},
+        },
+    }
+    if risk_scores is not None:
+        result["risk_scores"] = risk_scores.tolist()
+    return result
 
-    return flagged
+
+def decide_rows(columns: dict, X: np.ndarray) -> tuple:
+    """Shard-worker entry: (flagged (row index, entry) pairs in row order, risk of every row).
+
+    Same per-row semantics as analyze_transactions — blocks take effect for later
+    rows of the batch — over a prebuilt feature matrix plus string columns.
+    """
+    if _iso_model is None:
+        load_and_train()
+    n = len(X)
+    if not n:
+        return [], np.empty(0)
+
+    _, _, final_risk = _score_matrix(X)
+    now = datetime.now().isoformat()
+    pairs = [(i, _flagged_entry(tx, decision, now))
+             for i, tx, decision in _decide_in_order(final_risk, _id_columns(columns, n),
+                                                     lambda i: _row_as_tx(columns, X, i))]
+    return pairs, final_risk
 
 
 def get_stream_status(tps: float = None) -> dict:
@@ -316,11 +606,22 @@ def get_stream_status(tps: float = None) -> dict:
         "transactions_per_second": tps,
         "risk_level": risk_level,
         "recent_alerts": _recent_alerts[:5],
-        "threat_timeline": _threat_timeline,
-        "total_processed": _total_processed
+        "threat_timeline": threat_aggregator.query(TIMELINE_WINDOW_SECONDS, TIMELINE_POINTS)["points"],
+        "total_processed": _total_processed,
+        "blocklist": _stream_blocklist_stats()
     }
 
 
+def _stream_blocklist_stats() -> dict:
+    """Blocklist counters for the dashboard; in sharded mode the last snapshot, never a live shard query."""
+    if not sharding.enabled():
+        return blocklist.get_blocklist_stats()
+    snapshot = _blocklist_snapshot
+    if snapshot is None:
+        return {"size": 0, "short_circuited": 0, "short_circuited_by_kind": {}, "as_of": None}
+    return snapshot
+
+
 def inject_attack_burst() -> List[dict]:
     """Inject a Pakistani bot attack burst for demo."""
     attack_account = f"PK-ACC{random.randint(100, 999)}"
@@ -345,4 +646,6 @@ def inject_attack_burst() -> List[dict]:
             "location_change": True,
         })
 
-    return analyze_transactions(burst_transactions)
+    flagged = analyze_transactions(burst_transactions)
+    refresh_blocklist_snapshot()
+    return flagged
@@ -0,0 +1,197 @@
+"""
+Hot Blocklist: TTL-bounded block entries for accounts, recipients and devices.
+Sits in front of the ensemble so repeat traffic from an already-blocked attacker
+is short-circuited in constant time instead of being re-scored.
+A Bloom filter fronts the entry table as a cheap negative check at millions of entries.
+"""
+import hashlib
+import math
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+
+BLOCK_KINDS = ("account", "recipient", "device")
+_TX_FIELDS = {"account": "account_id", "recipient": "recipient_id", "device": "device_id"}
+
+DEFAULT_TTL_SECONDS = float(os.getenv("BLOCKLIST_TTL_SECONDS", "3600"))   # manual blocks
+# Automatic blocks from scoring: sender side only, short-lived, strong signals only
+AUTO_BLOCK_KINDS = ("account", "device")
+AUTO_BLOCK_TTL_SECONDS = float(os.getenv("BLOCKLIST_AUTO_TTL_SECONDS", "300"))
+AUTO_BLOCK_MIN_RISK = float(os.getenv("BLOCKLIST_AUTO_MIN_RISK", "0.85"))
+AUTO_BLOCK_ATTACK_TYPES = {"Agentic Bot Drain", "Account Takeover", "Card Testing (Micro-TX)", "Late-Night High-Value Fraud"}
+BLOOM_CAPACITY = int(os.getenv("BLOCKLIST_BLOOM_CAPACITY", "2000000"))
+BLOOM_ERROR_RATE = 0.01
+
+
+class _BloomFilter:
+    """Fixed-size Bloom filter (double hashing over one blake2b digest)."""
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.num_bits = max(64, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self._bits = bytearray((self.num_bits + 7) // 8)
+
+    def _positions(self, key: str):
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.num_hashes):
+            yield (h1 + i * h2) % self.num_bits
+
+    def add(self, key: str):
+        for pos in self._positions(key):
+            self._bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, key: str) -> bool:
+        bits = self._bits
+        return all(bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+    def clear(self):
+        self._bits = bytearray(len(self._bits))
+
+
+# Global state
+_lock = threading.Lock()
+_entries: Dict[str, dict] = {}
+_bloom = _BloomFilter(BLOOM_CAPACITY, BLOOM_ERROR_RATE)
+_stale_bloom_keys: int = 0   # removed keys still set in the Bloom filter
+_short_circuited: int = 0
+_short_circuited_by_kind: Dict[str, int] = {kind: 0 for kind in BLOCK_KINDS}
+
+
+def _key(kind: str, value: str) -> str:
+    return f"{kind}:{value}"
+
+
+def _drop(key: str):
+    """Remove an entry; rebuild the Bloom filter once stale bits outnumber live keys."""
+    global _stale_bloom_keys
+    _entries.pop(key, None)
+    _stale_bloom_keys += 1
+    if _stale_bloom_keys > 1024 and _stale_bloom_keys > len(_entries):
+        _bloom.clear()
+        for live_key in _entries:
+            _bloom.add(live_key)
+        _stale_bloom_keys = 0
+
+
+def block(kind: str, value: str, ttl_seconds: float = None, reason: str = "",
+          risk_score: float = 1.0, attack_type: Optional[str] = None) -> dict:
+    """Add (or refresh) a block entry. Expires after ttl_seconds (default BLOCKLIST_TTL_SECONDS)."""
+    if kind not in BLOCK_KINDS:
+        raise ValueError(f"Unknown block kind: {kind}")
+    ttl = DEFAULT_TTL_SECONDS if ttl_seconds is None else ttl_seconds
+    now = time.time()
+    key = _key(kind, value)
+    with _lock:
+        entry = {
+            "kind": kind,
+            "value": value,
+            "reason": reason,
+            "risk_score": risk_score,
+            "attack_type": attack_type,
+            "blocked_at": now,
+            "expires_at": now + ttl,
+            "hits": _entries[key]["hits"] if key in _entries else 0,
+        }
+        _entries[key] = entry
+        _bloom.add(key)
+    return entry
+
+
+def should_auto_block(risk_score: float, attack_type: Optional[str]) -> bool:
+    """Automatic blocks need a high score and a recognised attack pattern, not just a BLOCKED verdict."""
+    return risk_score >= AUTO_BLOCK_MIN_RISK and attack_type in AUTO_BLOCK_ATTACK_TYPES
+
+
+def auto_block(tx, reason: str = "", risk_score: float = 1.0, attack_type: Optional[str] = None) -> bool:
+    """Block the sender account and device of a scored transaction (a TxRecord) for AUTO_BLOCK_TTL_SECONDS.
+
+    Recipients are never auto-blocked: a merchant paid by one attacker would
+    otherwise short-circuit every honest sender paying it. Returns whether it blocked.
+    """
+    if not should_auto_block(risk_score, attack_type):
+        return False
+    blocked = False
+    for kind in AUTO_BLOCK_KINDS:
+        value = getattr(tx, _TX_FIELDS[kind])
+        if value:
+            block(kind, value, ttl_seconds=AUTO_BLOCK_TTL_SECONDS, reason=reason,
+                  risk_score=risk_score, attack_type=attack_type)
+            blocked = True
+    return blocked
+
+
+def unblock(kind: str, value: str) -> bool:
+    """Manually lift a block. Returns False if no live entry existed."""
+    key = _key(kind, value)
+    with _lock:
+        if key not in _entries:
+            return False
+        _drop(key)
+        return True
+
+
+def match(tx) -> Optional[dict]:
+    """Return the live block entry covering this transaction (a TxRecord), or None. O(1) per identifier."""
+    return match_ids(tx.account_id, tx.recipient_id, tx.device_id)
+
+
+def match_ids(account_id: Optional[str], recipient_id: Optional[str] = None,
+              device_id: Optional[str] = None) -> Optional[dict]:
+    """match() for callers holding bare identifiers (e.g. columnar batches) rather than a record."""
+    global _short_circuited
+    for kind, value in zip(BLOCK_KINDS, (account_id, recipient_id, device_id)):
+        if not value:
+            continue
+        key = _key(kind, value)
+        if key not in _bloom:
+            continue
+        with _lock:
+            entry = _entries.get(key)
+            if entry is None:
+                continue
+            if entry["expires_at"] <= time.time():
+                _drop(key)
+                continue
+            entry["hits"] += 1
+            _short_circuited += 1
+            _short_circuited_by_kind[kind] += 1
+            return entry
+    return None
+
+
+def size() -> int:
+    return len(_entries)
+
+
+def purge_expired() -> int:
+    """Drop every expired entry. Returns how many were removed."""
+    now = time.time()
+    with _lock:
+        expired = [k for k, e in _entries.items() if e["expires_at"] <= now]
+        for key in expired:
+            _drop(key)
+    return len(expired)
+
+
+def list_entries(limit: int = 100) -> List[dict]:
+    """Live entries, most recently blocked first."""
+    purge_expired()
+    with _lock:
+        entries = sorted(_entries.values(), key=lambda e: e["blocked_at"], reverse=True)
+    return [dict(e) for e in entries[:limit]]
+
+
+def get_blocklist_stats() -> dict:
+    return {
+        "size": len(_entries),
+        "short_circuited": _short_circuited,
+        "short_circuited_by_kind": dict(_short_circuited_by_kind),
+        "default_ttl_seconds": DEFAULT_TTL_SECONDS,
+        "auto_block_ttl_seconds": AUTO_BLOCK_TTL_SECONDS,
+        "auto_block_min_risk": AUTO_BLOCK_MIN_RISK,
+        "bloom_bits": _bloom.num_bits,
+        "bloom_hashes": _bloom.num_hashes,
+    }
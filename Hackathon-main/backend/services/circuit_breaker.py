@@ -0,0 +1,135 @@
+"""
+Circuit Breaker: shared guard around the Groq LLM provider.
+Tracks a rolling window of recent LLM calls. When the error rate or the
+slow-call rate crosses its threshold the circuit opens and every caller goes
+straight to its local fallback without touching the network. After a cooldown
+a limited number of half-open probe calls decide whether to close it again.
+"""
+import os
+import threading
+import time
+from collections import deque
+from typing import Optional
+
+CLOSED, OPEN, HALF_OPEN = "CLOSED", "OPEN", "HALF_OPEN"
+
+# Per-call client timeout; retries are left to the breaker rather than the SDK
+LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", "10"))
+
+
+class CircuitBreaker:
+    def __init__(self, name: str, window_size: int = 20, min_calls: int = 5,
+                 error_rate_threshold: float = 0.5, slow_call_ms: float = 5000,
+                 slow_rate_threshold: float = 0.5, open_seconds: float = 30,
+                 half_open_probes: int = 1):
+        self.name = name
+        self.window_size = window_size
+        self.min_calls = min_calls
+        self.error_rate_threshold = error_rate_threshold
+        self.slow_call_ms = slow_call_ms
+        self.slow_rate_threshold = slow_rate_threshold
+        self.open_seconds = open_seconds
+        self.half_open_probes = half_open_probes
+
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._window = deque(maxlen=window_size)   # (ok, slow) per call
+        self._opened_at = 0.0
+        self._probes_in_flight = 0
+        self._last_failure: Optional[str] = None
+        self.short_circuited = 0
+        self.times_opened = 0
+
+    def _transition(self, state: str):
+        if state == self._state:
+            return
+        print(f"[CircuitBreaker] {self.name}: {self._state} -> {state}")
+        self._state = state
+        if state == OPEN:
+            self._opened_at = time.monotonic()
+            self.times_opened += 1
+        if state in (CLOSED, HALF_OPEN):
+            self._window.clear()
+            self._probes_in_flight = 0
+
+    def allow(self) -> bool:
+        """May the caller hit the provider now? False means fail fast to the fallback.
+
+        A True answer in HALF_OPEN reserves a probe slot, so every allowed call
+        must be followed by record_success() or record_failure().
+        """
+        with self._lock:
+            if self._state == OPEN and time.monotonic() - self._opened_at >= self.open_seconds:
+                self._transition(HALF_OPEN)
+            if self._state == CLOSED:
+                return True
+            if self._state == HALF_OPEN and self._probes_in_flight < self.half_open_probes:
+                self._probes_in_flight += 1
+                return True
+            self.short_circuited += 1
+            return False
+
+    def is_open(self) -> bool:
+        """Non-reserving peek: True while callers would certainly be refused."""
+        with self._lock:
+            return self._state == OPEN and time.monotonic() - self._opened_at < self.open_seconds
+
+    def abandon(self):
+        """An allowed call ended without an outcome (e.g. client disconnect); free its probe slot."""
+        with self._lock:
+            if self._state == HALF_OPEN and self._probes_in_flight:
+                self._probes_in_flight -= 1
+
+    def record_success(self, latency_ms: float):
+        with self._lock:
+            slow = latency_ms >= self.slow_call_ms
+            if self._state == HALF_OPEN:
+                self._transition(OPEN if slow else CLOSED)
+                return
+            self._window.append((True, slow))
+            self._evaluate()
+
+    def record_failure(self, error: Exception = None):
+        with self._lock:
+            self._last_failure = f"{type(error).__name__}: {error}"[:200] if error else "unknown"
+            if self._state == HALF_OPEN:
+                self._transition(OPEN)
+                return
+            self._window.append((False, False))
+            self._evaluate()
+
+    def _evaluate(self):
+        if self._state != CLOSED or len(self._window) < self.min_calls:
+            return
+        n = len(self._window)
+        error_rate = sum(1 for ok, _ in self._window if not ok) / n
+        slow_rate = sum(1 for _, slow in self._window if slow) / n
+        if error_rate >= self.error_rate_threshold or slow_rate >= self.slow_rate_threshold:
+            self._transition(OPEN)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            n = len(self._window)
+            state = self._state
+            retry_in = max(0.0, self.open_seconds - (time.monotonic() - self._opened_at)) if state == OPEN else 0.0
+            return {
+                "state": state,
+                "window_calls": n,
+                "error_rate": round(sum(1 for ok, _ in self._window if not ok) / n, 3) if n else 0.0,
+                "slow_rate": round(sum(1 for _, slow in self._window if slow) / n, 3) if n else 0.0,
+                "short_circuited": self.short_circuited,
+                "times_opened": self.times_opened,
+                "retry_in_seconds": round(retry_in, 1),
+                "last_failure": self._last_failure,
+            }
+
+
+groq_breaker = CircuitBreaker(
+    "groq",
+    window_size=int(os.getenv("LLM_BREAKER_WINDOW", "20")),
+    min_calls=int(os.getenv("LLM_BREAKER_MIN_CALLS", "5")),
+    error_rate_threshold=float(os.getenv("LLM_BREAKER_ERROR_RATE", "0.5")),
+    slow_call_ms=float(os.getenv("LLM_BREAKER_SLOW_MS", "5000")),
+    slow_rate_threshold=float(os.getenv("LLM_BREAKER_SLOW_RATE", "0.5")),
+    open_seconds=float(os.getenv("LLM_BREAKER_OPEN_SECONDS", "30")),
+)
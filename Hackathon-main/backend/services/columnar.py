@@ -0,0 +1,128 @@
+"""
+Columnar batch codec for /api/analyze-transactions/columnar.
+One array per field instead of one object per transaction, so a batch maps
+straight onto the anomaly engine's feature matrix.
+
+JSON body (application/json):
+    {"columns": {"account_id": [...], "amount": [...], ...}, "include_scores": false}
+
+Binary body (application/x-zshield-columnar):
+    uint32 LE header length | header JSON | numeric column buffers
+    header = {"n": N, "numeric": [[name, dtype], ...], "strings": {name: [...]}, "include_scores": bool}
+    Each buffer is N * itemsize bytes, in header order, starting on an 8-byte boundary.
+"""
+import json
+import struct
+from typing import Tuple
+
+import numpy as np
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+BINARY_CONTENT_TYPE = "application/x-zshield-columnar"
+
+REQUIRED_COLUMNS = ["account_id", "amount", "tx_count_last_5s", "time_delta_ms",
+                    "hour_of_day", "unique_recipients_last_10tx"]
+NUMERIC_COLUMNS = {"amount", "tx_count_last_5s", "time_delta_ms", "hour_of_day",
+                   "unique_recipients_last_10tx", "is_new_device", "location_change"}
+_ALLOWED_DTYPES = {"<f8", "<f4", "<i8", "<i4", "<i2", "|i1", "|u1", "|b1"}
+
+
+def _pad8(n: int) -> int:
+    return (n + 7) & ~7
+
+
+def _validate(columns: dict) -> int:
+    missing = [c for c in REQUIRED_COLUMNS if c not in columns]
+    if missing:
+        raise ValueError(f"Missing required columns: {missing}")
+    for name, col in columns.items():
+        if name in NUMERIC_COLUMNS:
+            if not isinstance(col, np.ndarray) or col.ndim != 1:
+                raise ValueError(f"Column {name} must be a flat array of numbers")
+        elif not isinstance(col, list) or not all(v is None or isinstance(v, str) for v in col):
+            raise ValueError(f"Column {name} must be an array of strings or nulls")
+    lengths = {name: len(col) for name, col in columns.items()}
+    if len(set(lengths.values())) > 1:
+        raise ValueError(f"Columns have different lengths: {lengths}")
+    return lengths["account_id"]
+
+
+def decode_json(body: bytes) -> Tuple[dict, int, bool]:
+    """Parse a JSON columnar body; numeric columns become float64 arrays in one conversion each."""
+    payload = orjson.loads(body) if ORJSON_AVAILABLE else json.loads(body)
+    if not isinstance(payload, dict):
+        raise ValueError("Body must be a JSON object")
+    columns = payload.get("columns")
+    if not isinstance(columns, dict):
+        raise ValueError("Body must contain a 'columns' object of field -> array")
+    for name in NUMERIC_COLUMNS & columns.keys():
+        columns[name] = np.asarray(columns[name], dtype=float)
+    n = _validate(columns)
+    return columns, n, bool(payload.get("include_scores", False))
+
+
+def decode_binary(body: bytes) -> Tuple[dict, int, bool]:
+    """Parse a binary columnar body; numeric columns are zero-copy views over the request bytes."""
+    if len(body) < 4:
+        raise ValueError("Truncated columnar payload")
+    (header_len,) = struct.unpack_from("<I", body, 0)
+    header = json.loads(body[4:4 + header_len])
+    n = int(header["n"])
+    if n < 0:
+        raise ValueError("Header 'n' must not be negative")
+    columns = dict(header.get("strings", {}))
+
+    offset = _pad8(4 + header_len)
+    for name, dtype in header.get("numeric", []):
+        if dtype not in _ALLOWED_DTYPES:
+            raise ValueError(f"Unsupported dtype {dtype} for column {name}")
+        dt = np.dtype(dtype)
+        end = offset + n * dt.itemsize
+        if end > len(body):
+            raise ValueError(f"Truncated buffer for column {name}")
+        columns[name] = np.frombuffer(body, dtype=dt, count=n, offset=offset)
+        offset = _pad8(end)
+
+    if _validate(columns) != n:
+        raise ValueError("Header 'n' does not match column lengths")
+    return columns, n, bool(header.get("include_scores", False))
+
+
+def encode_binary(columns: dict, include_scores: bool = False) -> bytes:
+    """Client-side helper: pack a dict of columns into the binary format."""
+    n = len(columns["account_id"])
+    numeric, strings, buffers = [], {}, []
+    for name, col in columns.items():
+        if name in NUMERIC_COLUMNS:
+            arr = np.ascontiguousarray(col, dtype="<i1" if np.asarray(col).dtype == bool else None)
+            numeric.append([name, arr.dtype.str])
+            buffers.append(arr.tobytes())
+        else:
+            strings[name] = list(col)
+
+    header = json.dumps({"n": n, "numeric": numeric, "strings": strings,
+                         "include_scores": include_scores}).encode()
+    out = bytearray(struct.pack("<I", len(header)) + header)
+    out.extend(b"\0" * (_pad8(len(out)) - len(out)))
+    for buf in buffers:
+        out.extend(buf)
+        out.extend(b"\0" * (_pad8(len(out)) - len(out)))
+    return bytes(out)
+
+
+def encode_response(result: dict) -> bytes:
+    """Serialise a columnar result; orjson when installed, stdlib json otherwise."""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(result)
+    return json.dumps(result).encode()
+
+
+def decode(body: bytes, content_type: str) -> Tuple[dict, int, bool]:
+    if content_type.startswith(BINARY_CONTENT_TYPE):
+        return decode_binary(body)
+    return decode_json(body)
@@ -0,0 +1,198 @@
+"""
+Local Phishing Classifier: CPU-only tier in front of the Groq LLM.
+Hashed word + character n-gram features with a logistic-regression model,
+trained at startup on data/phishing_corpus.json.
+
+Confident predictions are answered locally in well under a millisecond; only
+probabilities inside the uncertainty band are escalated to the LLM.
+
+Before the serving model is fitted on the whole corpus, two held-out evaluations
+are run and reported in /api/phishing-model/stats: a stratified random split
+(new fills of known templates) and a split holding out whole message templates
+(unseen wording). Each gives precision/recall and the share of messages that
+would be escalated to the LLM.
+"""
+import json
+import math
+import os
+import re
+import time
+import zlib
+from typing import Dict, List, Optional
+
+import numpy as np
+from scipy.sparse import csr_matrix
+from sklearn.linear_model import LogisticRegression
+
+N_FEATURES = 2 ** 18
+CHAR_NGRAMS = (3, 5)
+WORD_NGRAMS = (1, 2)
+
+# Probabilities in [LOW, HIGH) are "uncertain" and escalate to the LLM
+UNCERTAIN_LOW = float(os.getenv("PHISHING_UNCERTAIN_LOW", "0.25"))
+UNCERTAIN_HIGH = float(os.getenv("PHISHING_UNCERTAIN_HIGH", "0.75"))
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+(?:[.\-/][a-z0-9]+)*")
+
+# Global state
+_weights: np.ndarray = None
+_bias: float = 0.0
+_held_out: Dict[str, dict] = {}
+_metrics: Dict[str, float] = {
+    "predictions": 0,
+    "local_decisions": 0,
+    "escalations": 0,
+    "llm_verdicts": 0,
+    "llm_agreements": 0,
+    "local_time_ms_total": 0.0,
+}
+
+
+def _hashed_features(text: str) -> Dict[int, float]:
+    """Bag of hashed n-grams, L2-normalised. Index = crc32(ngram) mod N_FEATURES."""
+    counts: Dict[int, float] = {}
+    tokens = _TOKEN_RE.findall(text.lower())
+
+    for n in range(WORD_NGRAMS[0], WORD_NGRAMS[1] + 1):
+        for i in range(len(tokens) - n + 1):
+            idx = zlib.crc32(("w:" + " ".join(tokens[i:i + n])).encode()) % N_FEATURES
+            counts[idx] = counts.get(idx, 0.0) + 1.0
+
+    for token in tokens:
+        padded = f" {token} "
+        for n in range(CHAR_NGRAMS[0], CHAR_NGRAMS[1] + 1):
+            for i in range(len(padded) - n + 1):
+                idx = zlib.crc32(("c:" + padded[i:i + n]).encode()) % N_FEATURES
+                counts[idx] = counts.get(idx, 0.0) + 1.0
+
+    norm = math.sqrt(sum(v * v for v in counts.values())) or 1.0
+    return {idx: v / norm for idx, v in counts.items()}
+
+
+def _to_matrix(texts: List[str]) -> csr_matrix:
+    indptr, indices, values = [0], [], []
+    for text in texts:
+        feats = _hashed_features(text)
+        indices.extend(feats.keys())
+        values.extend(feats.values())
+        indptr.append(len(indices))
+    return csr_matrix((values, indices, indptr), shape=(len(texts), N_FEATURES), dtype=np.float64)
+
+
+HELD_OUT_FRACTION = 0.2
+HELD_OUT_TEMPLATE_EVERY = 5   # every 5th template of each class is unseen in the template split
+
+
+def _fit(X: csr_matrix, y: np.ndarray) -> LogisticRegression:
+    return LogisticRegression(C=4.0, solver="liblinear", max_iter=1000).fit(X, y)
+
+
+def _evaluate(model: LogisticRegression, X: csr_matrix, y: np.ndarray) -> dict:
+    """Metrics at the 0.5 verdict cut plus what the uncertainty band would cost in LLM calls."""
+    prob = model.predict_proba(X)[:, 1]
+    pred = prob >= 0.5
+    tp, fp = int((pred & (y == 1)).sum()), int((pred & (y == 0)).sum())
+    fn = int((~pred & (y == 1)).sum())
+    escalated = (prob >= UNCERTAIN_LOW) & (prob < UNCERTAIN_HIGH)
+    local = ~escalated
+    return {
+        "messages": int(len(y)),
+        "precision": round(tp / (tp + fp), 4) if tp + fp else None,
+        "recall": round(tp / (tp + fn), 4) if tp + fn else None,
+        "accuracy": round(float((pred == (y == 1)).mean()), 4),
+        "llm_escalation_rate": round(float(escalated.mean()), 4),
+        "local_accuracy": round(float((pred[local] == (y[local] == 1)).mean()), 4) if local.any() else None,
+    }
+
+
+def _held_out_evaluation(corpus: List[dict], X: csr_matrix, y: np.ndarray) -> Dict[str, dict]:
+    from sklearn.model_selection import train_test_split
+
+    report = {}
+    train, test = train_test_split(np.arange(len(y)), test_size=HELD_OUT_FRACTION, stratify=y, random_state=42)
+    report["random_split"] = _evaluate(_fit(X[train], y[train]), X[test], y[test])
+
+    templates = [m.get("template") for m in corpus]
+    if all(templates):
+        unseen = np.array([int(t.rsplit("-", 1)[1]) % HELD_OUT_TEMPLATE_EVERY == 0 for t in templates])
+        report["unseen_templates"] = {
+            **_evaluate(_fit(X[~unseen], y[~unseen]), X[unseen], y[unseen]),
+            "templates_held_out": len({t for t, u in zip(templates, unseen) if u}),
+        }
+    return report
+
+
+def load_and_train_phishing():
+    """Load the labelled phishing corpus (generating it if missing), evaluate on held-out data, fit the linear model."""
+    global _weights, _bias, _held_out
+
+    data_path = os.path.join(os.path.dirname(__file__), "../data/phishing_corpus.json")
+
+    if not os.path.exists(data_path):
+        import subprocess, sys
+        gen_path = os.path.join(os.path.dirname(__file__), "../data/generate_phishing_corpus.py")
+        subprocess.run([sys.executable, gen_path])
+
+    with open(data_path) as f:
+        corpus = json.load(f)
+
+    X = _to_matrix([m["text"] for m in corpus])
+    y = np.array([1 if m["label"] == "phishing" else 0 for m in corpus])
+
+    _held_out = _held_out_evaluation(corpus, X, y)
+    model = _fit(X, y)
+    _weights = model.coef_[0].astype(np.float64)
+    _bias = float(model.intercept_[0])
+    print(f"[PhishingModel] Local classifier trained on {len(corpus)} messages "
+          f"(uncertainty band {UNCERTAIN_LOW:.2f}-{UNCERTAIN_HIGH:.2f}).")
+    for split, m in _held_out.items():
+        print(f"[PhishingModel] Held-out {split}: precision {m['precision']}, recall {m['recall']}, "
+              f"LLM escalation {m['llm_escalation_rate']:.1%} of {m['messages']} messages.")
+
+
+def predict_proba(text: str) -> float:
+    """P(phishing) from the local model. A sparse dot product — no sklearn call on the hot path."""
+    if _weights is None:
+        load_and_train_phishing()
+    t0 = time.perf_counter()
+    w = _weights
+    z = _bias + sum(w[idx] * v for idx, v in _hashed_features(text).items())
+    prob = 1.0 / (1.0 + math.exp(-z))
+    _metrics["predictions"] += 1
+    _metrics["local_time_ms_total"] += (time.perf_counter() - t0) * 1000
+    return prob
+
+
+def is_uncertain(prob: float) -> bool:
+    return UNCERTAIN_LOW <= prob < UNCERTAIN_HIGH
+
+
+def record_decision(prob: float, llm_is_phishing: Optional[bool] = None, escalated: bool = False):
+    """Count a local decision or an escalation; when the LLM answered, track agreement."""
+    if escalated:
+        _metrics["escalations"] += 1
+    else:
+        _metrics["local_decisions"] += 1
+    if llm_is_phishing is not None:
+        _metrics["llm_verdicts"] += 1
+        if bool(llm_is_phishing) == (prob >= 0.5):
+            _metrics["llm_agreements"] += 1
+
+
+def get_model_metrics() -> dict:
+    decided = _metrics["local_decisions"] + _metrics["escalations"]
+    return {
+        "predictions": _metrics["predictions"],
+        "local_decisions": _metrics["local_decisions"],
+        "escalations": _metrics["escalations"],
+        "escalation_rate": round(_metrics["escalations"] / decided, 4) if decided else 0.0,
+        "llm_verdicts": _metrics["llm_verdicts"],
+        "llm_agreement_rate": (
+            round(_metrics["llm_agreements"] / _metrics["llm_verdicts"], 4) if _metrics["llm_verdicts"] else None
+        ),
+        "avg_local_latency_ms": (
+            round(_metrics["local_time_ms_total"] / _metrics["predictions"], 4) if _metrics["predictions"] else 0.0
+        ),
+        "uncertainty_band": [UNCERTAIN_LOW, UNCERTAIN_HIGH],
+        "held_out": _held_out,
+    }
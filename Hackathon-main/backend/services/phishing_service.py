@@ -1,11 +1,16 @@
 """
-NLP Phishing Shield: Uses Groq API (Llama 3) to analyze messages for fraud markers.
-Falls back to rule-based detection if Groq API key is not set.
+NLP Phishing Shield: a local hashed n-gram classifier answers confident cases on CPU;
+only messages in its uncertainty band are escalated to the Groq API (Llama 3).
+Rule-based markers explain local verdicts; when the LLM does not answer an
+uncertain message the keyword rules give the verdict, not the classifier.
 """
 import os
 import json
 import re
+import time
 from typing import Optional
+from services.circuit_breaker import groq_breaker, LLM_TIMEOUT_SECONDS
+from services.phishing_model import predict_proba, is_uncertain, record_decision
 
 try:
     from groq import Groq
@@ -103,15 +108,79 @@ def _rule_based_analysis(text: str) -> dict:
     }
 
 
-def analyze_text(text: str) -> dict:
-    """Analyze text for phishing using Groq API (with rule-based fallback)."""
+def _local_analysis(text: str, prob: float) -> dict:
+    """Verdict from the local classifier; markers come from the keyword rules, shown only for a non-safe verdict."""
+    is_phishing = prob >= 0.5
+    markers = _rule_based_analysis(text)["markers"] if is_phishing else ["No obvious fraud patterns detected"]
+
+    if prob >= 0.9:
+        risk_label = "CRITICAL"
+    elif prob >= 0.75:
+        risk_label = "HIGH"
+    elif prob >= 0.5:
+        risk_label = "MEDIUM"
+    else:
+        risk_label = "LOW"
+
+    return {
+        "is_phishing": is_phishing,
+        "confidence": round(prob, 2),
+        "risk_label": risk_label,
+        "markers": markers,
+        "explanation": (
+            f"Local classifier rates this message {prob:.0%} likely to be phishing "
+            f"({risk_label.lower()} risk) based on its wording and structure."
+            if is_phishing else
+            "Local classifier found no significant phishing patterns in this message."
+        ),
+        "recommendation": (
+            "Do NOT click any links or share personal details. Contact JS Bank directly at 021-111-747-747."
+            if is_phishing else
+            "Message appears safe, but always verify directly with your bank if uncertain."
+        ),
+        "served_by": "local-model",
+        "model_probability": round(prob, 4),
+    }
+
+
+def _fallback_analysis(text: str, prob: float) -> dict:
+    """Verdict without the LLM: the classifier when it is confident, the keyword rules inside its uncertainty band.
+
+    On held-out templates the classifier is close to a coin flip in the band, so it must not answer there alone.
+    """
+    if is_uncertain(prob):
+        return {**_rule_based_analysis(text), "served_by": "rule-based", "model_probability": round(prob, 4)}
+    return _local_analysis(text, prob)
+
+
+def llm_configured() -> bool:
+    return bool(os.getenv("GROQ_API_KEY")) and GROQ_AVAILABLE
+
+
+def would_escalate(prob: float) -> bool:
+    """True when analyze_text would call the LLM for a message with this local probability."""
+    return is_uncertain(prob) and llm_configured()
+
+
+def analyze_text(text: str, use_llm: bool = True, prob: Optional[float] = None) -> dict:
+    """Analyze text for phishing: local classifier first, Groq API only for the uncertain band.
+
+    Pass `prob` when the caller already ran predict_proba; use_llm=False forces the verdict without the LLM.
+    """
+    prob = predict_proba(text) if prob is None else prob
     api_key = os.getenv("GROQ_API_KEY")
 
-    if not api_key or not GROQ_AVAILABLE:
-        return _rule_based_analysis(text)
+    if not use_llm or not would_escalate(prob):
+        record_decision(prob)
+        return _fallback_analysis(text, prob)
+    if not groq_breaker.allow():
+        record_decision(prob)
+        return {**_fallback_analysis(text, prob), "degraded": True, "degraded_reason": "circuit_open"}
 
+    started = time.perf_counter()
+    responded = False
     try:
-        client = Groq(api_key=api_key)
+        client = Groq(api_key=api_key, timeout=LLM_TIMEOUT_SECONDS, max_retries=0)
 
         response = client.chat.completions.create(
             model="llama-3.3-70b-versatile",
@@ -122,6 +191,8 @@ def analyze_text(text: str) -> dict:
             temperature=0.1,
             max_tokens=500,
         )
+        groq_breaker.record_success((time.perf_counter() - started) * 1000)
+        responded = True
 
         raw = response.choices[0].message.content.strip()
 
@@ -137,8 +208,14 @@ def analyze_text(text: str) -> dict:
             if field not in result:
                 raise ValueError(f"Missing field: {field}")
 
+        record_decision(prob, llm_is_phishing=result["is_phishing"], escalated=True)
+        result["served_by"] = "llm"
+        result["model_probability"] = round(prob, 4)
         return result
 
     except Exception as e:
-        print(f"[PhishingService] Groq API error: {e}, falling back to rule-based.")
-        return _rule_based_analysis(text)
+        if not responded:  # a malformed reply is the model's fault, not the provider's
+            groq_breaker.record_failure(e)
+        print(f"[PhishingService] Groq API error: {e}, falling back to local analysis.")
+        record_decision(prob, escalated=True)
+        return _fallback_analysis(text, prob)
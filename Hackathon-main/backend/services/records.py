@@ -0,0 +1,188 @@
+"""
+Transaction Records: the compact internal form of transactions inside the anomaly engine.
+Request dicts are converted once at ingest — defaults filled, numeric types fixed,
+categorical strings interned — and everything downstream (features, rules, explanations,
+blocklist) reads attributes instead of repeated dict.get(key, default) lookups.
+
+TxRecord  one transaction, __slots__ (no per-instance dict)
+TxBatch   a batch as one NumPy structured array (TX_DTYPE); string fields are object
+          columns holding references to the caller's (or interned) strings
+"""
+import sys
+from typing import Iterable, Union
+
+import numpy as np
+
+# Model features, in feature-matrix column order, with their ingest defaults
+FEATURE_FIELDS = [
+    ("tx_count_last_5s", 0),
+    ("time_delta_ms", 100000),
+    ("hour_of_day", 12),
+    ("unique_recipients_last_10tx", 5),
+    ("amount", 1000),
+    ("is_new_device", 0),
+    ("location_change", 0),
+]
+# Low-cardinality labels: interned so every record shares one string object per value.
+# Identifiers are not interned — their cardinality is unbounded.
+CATEGORICAL_FIELDS = ("transaction_type", "sender_city", "recipient_city", "recipient_bank")
+ID_FIELDS = ("account_id", "recipient_id", "device_id", "timestamp")
+STRING_FIELDS = ID_FIELDS + CATEGORICAL_FIELDS
+
+TX_DTYPE = np.dtype(
+    [("tx_count_last_5s", "<i4"), ("time_delta_ms", "<f8"), ("hour_of_day", "<i4"),
+     ("unique_recipients_last_10tx", "<i4"), ("amount", "<f8"), ("is_new_device", "?"),
+     ("location_change", "?")]
+    + [(name, "O") for name in STRING_FIELDS]
+)
+
+
+def feature_column(name: str, default, values) -> np.ndarray:
+    """One feature column as ingest stores it: nulls and NaN take the default, integer
+    fields are truncated (as int() does) and flags become 0/1 — whatever the input path."""
+    col = np.asarray(values, dtype=float)
+    col = np.where(np.isnan(col), default, col)
+    kind = TX_DTYPE[name].kind
+    if kind == "i":
+        col = np.trunc(col)
+    elif kind == "b":
+        col = (col != 0).astype(float)
+    return col
+
+
+def _intern(value):
+    return sys.intern(value) if type(value) is str else value
+
+
+def _ingest_row(tx: dict) -> tuple:
+    """One request dict -> a tuple in TX_DTYPE field order. Missing or null fields take their default."""
+    get = tx.get
+    row = []
+    for name, default in FEATURE_FIELDS:
+        value = get(name)
+        row.append(default if value is None else value)
+    for i in (0, 2, 3):   # integer counters / hour
+        row[i] = int(row[i])
+    row[1] = float(row[1])
+    row[4] = float(row[4])
+    row[5] = bool(row[5])
+    row[6] = bool(row[6])
+    row.extend(get(name) for name in ID_FIELDS)
+    row.extend(_intern(get(name)) for name in CATEGORICAL_FIELDS)
+    return tuple(row)
+
+
+def _feature_values(tx: dict) -> list:
+    return [tx.get("tx_count_last_5s"), tx.get("time_delta_ms"), tx.get("hour_of_day"),
+            tx.get("unique_recipients_last_10tx"), tx.get("amount"),
+            tx.get("is_new_device"), tx.get("location_change")]
+
+
+class TxRecord:
+    """One transaction with every field resolved. Attribute order matches TX_DTYPE."""
+
+    __slots__ = tuple(TX_DTYPE.names)
+
+    def __init__(self, tx_count_last_5s=0, time_delta_ms=100000.0, hour_of_day=12,
+                 unique_recipients_last_10tx=5, amount=1000.0, is_new_device=False,
+                 location_change=False, account_id=None, recipient_id=None, device_id=None,
+                 timestamp=None, transaction_type=None, sender_city=None, recipient_city=None,
+                 recipient_bank=None):
+        self.tx_count_last_5s = tx_count_last_5s
+        self.time_delta_ms = time_delta_ms
+        self.hour_of_day = hour_of_day
+        self.unique_recipients_last_10tx = unique_recipients_last_10tx
+        self.amount = amount
+        self.is_new_device = is_new_device
+        self.location_change = location_change
+        self.account_id = account_id
+        self.recipient_id = recipient_id
+        self.device_id = device_id
+        self.timestamp = timestamp
+        self.transaction_type = transaction_type
+        self.sender_city = sender_city
+        self.recipient_city = recipient_city
+        self.recipient_bank = recipient_bank
+
+    @classmethod
+    def from_dict(cls, tx: dict) -> "TxRecord":
+        return cls(*_ingest_row(tx))
+
+    def features(self) -> np.ndarray:
+        """1 x 7 feature matrix for the ensemble."""
+        return np.array([[self.tx_count_last_5s, self.time_delta_ms, self.hour_of_day,
+                          self.unique_recipients_last_10tx, self.amount,
+                          self.is_new_device, self.location_change]], dtype=float)
+
+    def __repr__(self):
+        return f"TxRecord({', '.join(f'{k}={getattr(self, k)!r}' for k in self.__slots__)})"
+
+
+def as_record(tx: Union[dict, TxRecord]) -> TxRecord:
+    return tx if isinstance(tx, TxRecord) else TxRecord.from_dict(tx)
+
+
+class TxBatch:
+    """A batch of transactions as one structured array; rows become TxRecords only on demand."""
+
+    __slots__ = ("data",)
+
+    def __init__(self, data: np.ndarray):
+        self.data = data
+
+    @classmethod
+    def from_dicts(cls, transactions: Iterable[dict]) -> "TxBatch":
+        """Column-wise ingest: one pass per field, nulls replaced by their defaults in bulk."""
+        rows = transactions if isinstance(transactions, list) else list(transactions)
+        data = np.empty(len(rows), dtype=TX_DTYPE)
+        X = np.array([_feature_values(tx) for tx in rows], dtype=float).reshape(len(rows), len(FEATURE_FIELDS))
+        for j, (name, default) in enumerate(FEATURE_FIELDS):
+            data[name] = feature_column(name, default, X[:, j])  # None -> NaN -> default
+        for name in ID_FIELDS:
+            data[name] = [tx.get(name) for tx in rows]
+        for name in CATEGORICAL_FIELDS:
+            col = [tx.get(name) for tx in rows]
+            canonical = {v: _intern(v) for v in set(col)}  # intern each distinct label once
+            data[name] = [canonical[v] for v in col]
+        return cls(data)
+
+    @classmethod
+    def from_records(cls, records: Iterable[TxRecord]) -> "TxBatch":
+        records = records if isinstance(records, list) else list(records)
+        data = np.empty(len(records), dtype=TX_DTYPE)
+        for name in TX_DTYPE.names:
+            data[name] = [getattr(r, name) for r in records]
+        return cls(data)
+
+    def __len__(self):
+        return len(self.data)
+
+    def features(self) -> np.ndarray:
+        """n x 7 float feature matrix, filled column by column from the typed fields."""
+        X = np.empty((len(self.data), len(FEATURE_FIELDS)), dtype=float)
+        for j, (name, _) in enumerate(FEATURE_FIELDS):
+            X[:, j] = self.data[name]
+        return X
+
+    def column(self, name: str) -> list:
+        return self.data[name].tolist()
+
+    def string_columns(self) -> dict:
+        """Identifier and label columns as lists, the form decide_rows and record_from_columns read."""
+        return {name: self.data[name].tolist() for name in STRING_FIELDS}
+
+    def record(self, i: int) -> TxRecord:
+        return TxRecord(*self.data[i].item())
+
+    def take(self, index) -> "TxBatch":
+        return TxBatch(self.data[index])
+
+
+def record_from_columns(columns: dict, X: np.ndarray, i: int) -> TxRecord:
+    """TxRecord for one row of a columnar batch (feature matrix + string columns)."""
+    x = X[i].tolist()
+    return TxRecord(
+        int(x[0]), x[1], int(x[2]), int(x[3]), x[4], bool(x[5]), bool(x[6]),
+        *(None if columns.get(name) is None else columns[name][i] for name in ID_FIELDS),
+        *(None if columns.get(name) is None else _intern(columns[name][i]) for name in CATEGORICAL_FIELDS),
+    )
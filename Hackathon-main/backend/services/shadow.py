@@ -0,0 +1,295 @@
+"""
+Shadow Scoring: candidate models evaluated on a sampled copy of live traffic.
+Production scoring hands feature matrices to a bounded queue and returns immediately;
+a separate scorer process trains every registered candidate, scores the samples with
+them and keeps rolling agreement / latency statistics against the production verdicts.
+Candidate training and scoring never share the API process's GIL or its cores.
+When the queue is full the sample is dropped — shadow work never waits on serving.
+"""
+import itertools
+import os
+import queue
+import random
+import threading
+import time
+from collections import deque
+from multiprocessing import get_context
+from typing import Callable
+
+import numpy as np
+
+SHADOW_SAMPLE_RATE = float(os.getenv("SHADOW_SAMPLE_RATE", "0.1"))
+SHADOW_QUEUE_SIZE = int(os.getenv("SHADOW_QUEUE_SIZE", "256"))
+SHADOW_WINDOW = int(os.getenv("SHADOW_WINDOW", "2000"))
+SHADOW_TRAIN_N_JOBS = int(os.getenv("SHADOW_TRAIN_N_JOBS", "1"))   # cores per candidate fit
+SHADOW_TRAIN_TIMEOUT = float(os.getenv("SHADOW_TRAIN_TIMEOUT", "300"))   # seconds to wait for a candidate fit
+SHADOW_CALL_TIMEOUT = float(os.getenv("SHADOW_CALL_TIMEOUT", "10"))      # seconds to wait for stats / unregister
+FRAUD_THRESHOLD = 0.5  # same cut as score_single_transaction's is_fraud
+
+# Global state (API process)
+_names: set = set()          # registered candidates; empty means offer() is a no-op
+_lock = threading.Lock()     # process (re)spawn and pipe sends; never held while waiting for a reply
+_process = None
+_samples = None              # multiprocessing.Queue of (X, prod_risk, prod_ms_per_row)
+_conn = None                 # control pipe to the scorer process
+_pending: dict = {}          # request id -> [Event, reply] for the current process
+_request_ids = itertools.count()
+_offered = 0
+_enqueued = 0
+_dropped = 0
+_restarts = 0
+
+
+def _alive() -> bool:
+    return _process is not None and _process.is_alive()
+
+
+def _ensure_process():
+    """(Re)spawn the scorer process. A dead process takes its candidates with it. Caller holds _lock."""
+    global _process, _samples, _conn, _pending, _restarts
+    if _alive():
+        return
+    if _process is not None:
+        _restarts += 1
+        _names.clear()
+        print("[Shadow] Scorer process died; restarting (candidates must be re-registered).")
+    ctx = get_context("spawn")  # no forking of the server's threads / event loop
+    _samples = ctx.Queue(maxsize=SHADOW_QUEUE_SIZE)
+    _conn, child_conn = ctx.Pipe()
+    _pending = {}
+    _process = ctx.Process(target=_worker_main, args=(_samples, child_conn), name="shadow-scorer", daemon=True)
+    _process.start()
+    threading.Thread(target=_receive, args=(_conn, _pending), name="shadow-replies", daemon=True).start()
+
+
+def _receive(conn, pending: dict):
+    """Hand each reply to the caller waiting on its request id; late replies are dropped."""
+    try:
+        while True:
+            request_id, reply = conn.recv()
+            waiter = pending.pop(request_id, None)
+            if waiter is not None:
+                waiter[1] = reply
+                waiter[0].set()
+    except (EOFError, OSError):
+        pass
+    for waiter in list(pending.values()):
+        waiter[0].set()   # reply stays None: process gone
+    pending.clear()
+
+
+def _call(timeout: float, *msg, spawn: bool = False):
+    with _lock:
+        if spawn:
+            _ensure_process()
+        elif not _alive():
+            raise RuntimeError("shadow scorer process is not running")
+        request_id, pending = next(_request_ids), _pending
+        waiter = pending[request_id] = [threading.Event(), None]
+        try:
+            _conn.send((request_id, msg))
+        except (BrokenPipeError, OSError) as e:
+            pending.pop(request_id, None)
+            raise RuntimeError(f"shadow scorer process unavailable ({type(e).__name__})")
+    if not waiter[0].wait(timeout):
+        pending.pop(request_id, None)
+        raise RuntimeError(f"shadow scorer did not answer within {timeout:.0f}s")
+    if waiter[1] is None:
+        raise RuntimeError("shadow scorer process exited")
+    return waiter[1]
+
+
+def register(name: str, iso_params: dict = None, xgb_params: dict = None,
+             transform: Callable[[np.ndarray], np.ndarray] = None) -> dict:
+    """Train a candidate in the scorer process and add (or replace) it. Returns the effective params.
+
+    Raises ValueError when the models reject the hyperparameters, RuntimeError when
+    the scorer is unavailable or the fit takes longer than SHADOW_TRAIN_TIMEOUT.
+    """
+    status, payload = _call(SHADOW_TRAIN_TIMEOUT, "register", name, iso_params, xgb_params, transform, spawn=True)
+    if status == "invalid":
+        raise ValueError(payload)
+    if status != "ok":
+        raise RuntimeError(payload)
+    _names.add(name)
+    print(f"[Shadow] Candidate '{name}' registered (sample rate {SHADOW_SAMPLE_RATE:.0%}).")
+    return payload
+
+
+def unregister(name: str) -> bool:
+    if name not in _names:
+        return False
+    _names.discard(name)
+    try:
+        return _call(SHADOW_CALL_TIMEOUT, "unregister", name)[1]
+    except RuntimeError:
+        return True  # the process is gone, and the candidate with it
+
+
+def stop():
+    """Terminate the scorer process. Does not wait on in-flight calls; they fail as the pipe closes."""
+    global _process
+    process, samples = _process, _samples
+    _process = None
+    _names.clear()
+    if process is None:
+        return
+    process.terminate()
+    process.join(timeout=2)
+    samples.cancel_join_thread()   # undelivered samples must not hold up interpreter exit
+
+
+def offer(X: np.ndarray, prod_risk: np.ndarray, prod_ms: float):
+    """Request-path hook: maybe enqueue a copy of this batch. Never blocks."""
+    global _offered, _enqueued, _dropped
+    if not _names or random.random() >= SHADOW_SAMPLE_RATE:
+        return
+    _offered += 1
+    try:
+        _samples.put_nowait((X.copy(), prod_risk.copy(), prod_ms / max(len(X), 1)))
+        _enqueued += 1
+    except queue.Full:
+        _dropped += 1
+
+
+def get_shadow_stats() -> dict:
+    """Blocking round trip to the scorer process — call off the event loop."""
+    report = {"production_latency_ms_per_row": {"p50": 0.0, "p99": 0.0}, "candidates": {}}
+    alive = _alive()
+    if alive and _names:
+        try:
+            report = _call(SHADOW_CALL_TIMEOUT, "stats")[1]
+        except RuntimeError:
+            alive = _alive()
+    return {
+        "sample_rate": SHADOW_SAMPLE_RATE,
+        "scorer_process": "running" if alive else ("stopped" if _process is None else "dead"),
+        "scorer_restarts": _restarts,
+        "queue_depth": _samples.qsize() if _samples is not None else 0,
+        "queue_capacity": SHADOW_QUEUE_SIZE,
+        "offered": _offered,
+        "enqueued": _enqueued,
+        "dropped": _dropped,
+        **report,
+    }
+
+
+# ── Scorer process ──────────────────────────────────────────────────────────
+
+def _worker_main(samples, conn):
+    from services import anomaly_engine
+
+    candidates = {}
+    prod_latency = deque(maxlen=SHADOW_WINDOW)   # production ms per row, for the sampled batches
+    trained = queue.Queue()                      # (request id, name, reply, candidate) from fit threads
+    fit_lock = threading.Lock()                  # one candidate fit at a time
+    try:
+        while True:
+            # Fits run on their own thread so stats / unregister are answered while one trains
+            while conn.poll():
+                msg = conn.recv()
+                if msg is None:
+                    return
+                request_id, (op, *args) = msg
+                if op == "register":
+                    threading.Thread(target=_fit, args=(anomaly_engine, fit_lock, trained, request_id, *args),
+                                     daemon=True).start()
+                else:
+                    conn.send((request_id, _control(candidates, prod_latency, op, args)))
+            while not trained.empty():
+                request_id, name, reply, candidate = trained.get_nowait()
+                if candidate is not None:
+                    candidates[name] = candidate
+                conn.send((request_id, reply))
+            try:
+                X, prod_risk, prod_ms_row = samples.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            prod_latency.append(prod_ms_row)
+            for c in candidates.values():
+                _score(c, X, prod_risk)
+    except (EOFError, KeyboardInterrupt):
+        pass
+
+
+def _fit(anomaly_engine, fit_lock: threading.Lock, trained: queue.Queue, request_id: int,
+         name: str, iso_params: dict, xgb_params: dict, transform):
+    with fit_lock:
+        try:
+            score_fn, params = anomaly_engine._build_candidate(iso_params, xgb_params, transform,
+                                                               n_jobs=SHADOW_TRAIN_N_JOBS)
+        except anomaly_engine.CANDIDATE_PARAM_ERRORS as e:
+            trained.put((request_id, name, ("invalid", f"{type(e).__name__}: {e}"[:500]), None))
+            return
+        except Exception as e:
+            trained.put((request_id, name, ("error", f"{type(e).__name__}: {e}"[:500]), None))
+            return
+    trained.put((request_id, name, ("ok", params), {
+        "score_fn": score_fn,
+        "params": params,
+        "registered_at": time.time(),
+        "rows": deque(maxlen=SHADOW_WINDOW),     # (prod_flag, cand_flag, abs_diff)
+        "latency": deque(maxlen=SHADOW_WINDOW),  # candidate ms per row
+        "samples": 0,
+        "errors": 0,
+        "last_error": None,
+    }))
+
+
+def _control(candidates: dict, prod_latency: deque, op: str, args: list) -> tuple:
+    if op == "unregister":
+        return "ok", candidates.pop(args[0], None) is not None
+    if op == "stats":
+        return "ok", _stats(candidates, prod_latency)
+    return "error", f"unknown op {op}"
+
+
+def _score(c: dict, X: np.ndarray, prod_risk: np.ndarray):
+    t0 = time.perf_counter()
+    try:
+        cand_risk = np.asarray(c["score_fn"](X), dtype=float)
+    except Exception as e:
+        c["errors"] += 1
+        c["last_error"] = f"{type(e).__name__}: {e}"[:200]
+        return
+    elapsed_ms = (time.perf_counter() - t0) * 1000
+    prod_flag = prod_risk > FRAUD_THRESHOLD
+    c["latency"].append(elapsed_ms / len(X))
+    c["samples"] += len(X)
+    c["rows"].extend(zip(prod_flag.tolist(), (cand_risk > FRAUD_THRESHOLD).tolist(),
+                         np.abs(cand_risk - prod_risk).tolist()))
+
+
+def _percentile(values, pct: float) -> float:
+    return round(float(np.percentile(values, pct)), 4) if values else 0.0
+
+
+def _stats(candidates: dict, prod_latency: deque) -> dict:
+    report = {}
+    for name, c in candidates.items():
+        rows, latency = c["rows"], list(c["latency"])
+        n = len(rows)
+        both = sum(1 for p, k, _ in rows if p and k)
+        prod_only = sum(1 for p, k, _ in rows if p and not k)
+        cand_only = sum(1 for p, k, _ in rows if k and not p)
+        report[name] = {
+            "params": c["params"],
+            "samples": c["samples"],
+            "window_rows": n,
+            "agreement": round((n - prod_only - cand_only) / n, 4) if n else None,
+            "confusion_vs_production": {
+                "both_flag": both, "production_only": prod_only,
+                "candidate_only": cand_only, "neither": n - both - prod_only - cand_only,
+            },
+            "production_flag_rate": round((both + prod_only) / n, 4) if n else None,
+            "candidate_flag_rate": round((both + cand_only) / n, 4) if n else None,
+            "mean_abs_risk_diff": round(sum(d for _, _, d in rows) / n, 4) if n else None,
+            "latency_ms_per_row": {"p50": _percentile(latency, 50), "p99": _percentile(latency, 99)},
+            "errors": c["errors"],
+            "last_error": c["last_error"],
+        }
+    prod = list(prod_latency)
+    return {
+        "production_latency_ms_per_row": {"p50": _percentile(prod, 50), "p99": _percentile(prod, 99)},
+        "candidates": report,
+    }
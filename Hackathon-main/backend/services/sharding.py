@@ -0,0 +1,262 @@
+"""
+Sharded Scoring: account-partitioned worker processes for /api/analyze-transactions
+(JSON and columnar).
+The dispatcher hashes account_id (crc32 % N) so every transaction of an account is
+scored by the same worker, which owns that shard's state (blocklist) and its own
+model copy. Feature matrices travel through a per-worker shared-memory block; only
+the string columns and the flagged results go over the pipe.
+Enable with SHARD_WORKERS=N; 0 (default) keeps scoring in-process.
+"""
+import os
+import threading
+import time
+import zlib
+from collections import defaultdict
+from multiprocessing import get_context
+from multiprocessing.shared_memory import SharedMemory
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+
+SHARD_WORKERS = int(os.getenv("SHARD_WORKERS", "0"))
+SHARD_SHM_ROWS = int(os.getenv("SHARD_SHM_ROWS", "65536"))   # rows per shared-memory block
+
+# Global state
+_shards: List["_Shard"] = []
+
+
+class _Shard:
+    def __init__(self, index: int, ctx, rows: int, n_features: int):
+        self.index = index
+        self.ctx = ctx
+        self.rows = rows
+        self.n_features = n_features
+        self.lock = threading.Lock()  # one batch in flight per worker
+        self.shm = SharedMemory(create=True, size=rows * n_features * 8)
+        self.X = np.ndarray((rows, n_features), dtype=np.float64, buffer=self.shm.buf)
+        self._spawn()
+
+    def _spawn(self):
+        self.conn, child_conn = self.ctx.Pipe()
+        self.process = self.ctx.Process(
+            target=_worker_main, args=(self.index, child_conn, self.shm.name, self.rows, self.n_features),
+            name=f"shard-{self.index}", daemon=True,
+        )
+        self.process.start()
+
+    def respawn(self) -> bool:
+        """Replace a dead worker on the same shared-memory block. Caller holds self.lock.
+
+        The new worker retrains its model copy; the dead worker's blocklist state is lost.
+        """
+        self.conn.close()
+        if self.process.is_alive():
+            self.process.terminate()
+        self.process.join(timeout=5)
+        self._spawn()
+        try:
+            self.conn.recv()  # "ready"
+        except (EOFError, OSError):
+            print(f"[Sharding] shard {self.index} failed to restart")
+            return False
+        print(f"[Sharding] shard {self.index} worker restarted")
+        return True
+
+    def call(self, *msg):
+        self.conn.send(msg)
+        return self.conn.recv()
+
+    def close(self):
+        try:
+            self.conn.send(None)
+            self.process.join(timeout=5)
+        except (BrokenPipeError, OSError):
+            pass
+        if self.process.is_alive():
+            self.process.terminate()
+        self.X = None
+        self.shm.close()
+        self.shm.unlink()
+
+
+def _worker_main(index: int, conn, shm_name: str, rows: int, n_features: int):
+    from services import anomaly_engine, blocklist
+
+    anomaly_engine.load_and_train(n_jobs=1)   # N workers fitting at once: one core each
+    shm = SharedMemory(name=shm_name)
+    X_all = np.ndarray((rows, n_features), dtype=np.float64, buffer=shm.buf)
+    conn.send("ready")
+    try:
+        while True:
+            msg = conn.recv()
+            if msg is None:
+                break
+            op = msg[0]
+            if op == "score":
+                _, n, columns = msg
+                t0 = time.perf_counter()
+                flagged, risk = anomaly_engine.decide_rows(columns, X_all[:n])
+                conn.send((flagged, risk.tolist(), (time.perf_counter() - t0) * 1000))
+            elif op == "blocklist":
+                conn.send({"entries": blocklist.list_entries(msg[1]), "stats": blocklist.get_blocklist_stats()})
+            elif op == "unblock":
+                conn.send(blocklist.unblock(msg[1], msg[2]))
+    except (EOFError, KeyboardInterrupt):
+        pass
+    finally:
+        del X_all
+        shm.close()
+
+
+def start(workers: int = SHARD_WORKERS, rows: int = SHARD_SHM_ROWS):
+    """Spawn the shard workers and wait until each has trained its model copy."""
+    from services.records import FEATURE_FIELDS
+
+    if workers <= 0 or _shards:
+        return
+    ctx = get_context("spawn")  # no forking of the server's threads / event loop
+    try:
+        _shards.extend(_Shard(i, ctx, rows, len(FEATURE_FIELDS)) for i in range(workers))
+        for shard in _shards:
+            shard.conn.recv()
+    except BaseException:
+        stop()
+        raise
+    print(f"[Sharding] {workers} scoring workers online ({rows} rows shared memory each).")
+
+
+def stop():
+    while _shards:
+        _shards.pop().close()
+
+
+def enabled() -> bool:
+    return bool(_shards)
+
+
+def shard_of(account_id: Optional[str]) -> int:
+    return zlib.crc32((account_id or "").encode()) % len(_shards)
+
+
+def score(transactions: List[dict]) -> List[dict]:
+    """Split a batch by account shard, score the parts in parallel, merge flagged rows in input order."""
+    from services.records import TxBatch
+
+    # One ingest pass: defaults, types and the feature matrix are resolved here, not per shard
+    batch = TxBatch.from_dicts(transactions)
+    pairs, _ = _dispatch(batch.features(), batch.column("account_id"),
+                         lambda chunk: batch.take(chunk).string_columns())
+    return [entry for _, entry in pairs]
+
+
+def score_columns(columns: dict, X: np.ndarray) -> Tuple[List[tuple], np.ndarray]:
+    """Columnar batch through the shards: (flagged (row index, entry) pairs in input order, risk of every row)."""
+    from services.records import STRING_FIELDS
+
+    strings = {name: columns[name] for name in STRING_FIELDS if columns.get(name) is not None}
+    accounts = strings.get("account_id") or [None] * len(X)
+    return _dispatch(X, accounts, lambda chunk: {name: [col[i] for i in chunk] for name, col in strings.items()})
+
+
+def _dispatch(X: np.ndarray, accounts: list, strings_of: Callable[[List[int]], dict]) -> Tuple[List[tuple], np.ndarray]:
+    from services import shadow
+    from services.anomaly_engine import decide_rows
+
+    groups = defaultdict(list)
+    for i, account_id in enumerate(accounts):
+        groups[shard_of(account_id)].append(i)
+
+    # Each shard's rows go in chunks of at most its shared-memory capacity, in order
+    pending = {
+        s: [idx[k:k + _shards[s].rows] for k in range(0, len(idx), _shards[s].rows)]
+        for s, idx in groups.items()
+    }
+    merged = []
+    risk = np.empty(len(X))
+    remote_rows, remote_ms = [], 0.0   # scored by workers, whose shadow hook is idle
+    locked = [_shards[s] for s in sorted(pending)]  # fixed order: no lock-order deadlocks
+    for shard in locked:
+        shard.lock.acquire()
+    try:
+        in_flight = {}
+        for s, chunks in pending.items():
+            in_flight[s] = _send_chunk(_shards[s], X, strings_of, chunks.pop(0))
+        while in_flight:
+            for s in list(in_flight):
+                shard, chunk = _shards[s], in_flight.pop(s)
+                try:
+                    results, chunk_risk, ms = shard.conn.recv()
+                    remote_rows.extend(chunk)
+                    remote_ms += ms
+                except (EOFError, OSError) as e:
+                    # Dead worker: score its rows here rather than failing the request, then replace it.
+                    # Blocks these rows trigger land in this process's blocklist (see blocklist_view).
+                    print(f"[Sharding] shard {s} failed ({type(e).__name__}); scoring {len(chunk)} rows locally")
+                    results, chunk_risk = decide_rows(strings_of(chunk), X[chunk])
+                    shard.respawn()
+                merged.extend((chunk[j], entry) for j, entry in results)
+                risk[chunk] = chunk_risk
+                if pending[s]:
+                    in_flight[s] = _send_chunk(shard, X, strings_of, pending[s].pop(0))
+    finally:
+        for shard in locked:
+            shard.lock.release()
+    merged.sort(key=lambda pair: pair[0])
+    # The candidates live next to this process: offer them what the workers scored.
+    # Rows scored here for a dead worker were already offered by _score_matrix.
+    if remote_rows:
+        shadow.offer(X[remote_rows], risk[remote_rows], remote_ms)
+    return merged, risk
+
+
+def _send_chunk(shard: _Shard, X: np.ndarray, strings_of: Callable[[List[int]], dict], chunk: List[int]) -> List[int]:
+    shard.X[:len(chunk)] = X[chunk]
+    try:
+        shard.conn.send(("score", len(chunk), strings_of(chunk)))
+    except (BrokenPipeError, OSError):
+        pass  # surfaces as EOFError on recv and falls back to local scoring
+    return chunk
+
+
+def _local_blocklist(limit: int) -> dict:
+    from services import blocklist
+
+    return {"entries": blocklist.list_entries(limit), "stats": blocklist.get_blocklist_stats()}
+
+
+def blocklist_view(limit: int = 100) -> dict:
+    """Live blocklist entries and counters merged across shards and this process.
+
+    This process holds the blocks from rows it scored for a dead worker.
+    """
+    entries, stats = [], {"size": 0, "short_circuited": 0, "short_circuited_by_kind": defaultdict(int)}
+    parts = [_local_blocklist(limit)]
+    for shard in _shards:
+        try:
+            with shard.lock:
+                parts.append(shard.call("blocklist", limit))
+        except (EOFError, OSError):
+            continue  # dead worker: its shard state is gone
+    for part in parts:
+        entries.extend(part["entries"])
+        stats["size"] += part["stats"]["size"]
+        stats["short_circuited"] += part["stats"]["short_circuited"]
+        for kind, count in part["stats"]["short_circuited_by_kind"].items():
+            stats["short_circuited_by_kind"][kind] += count
+    entries.sort(key=lambda e: e["blocked_at"], reverse=True)
+    stats["short_circuited_by_kind"] = dict(stats["short_circuited_by_kind"])
+    return {"entries": entries[:limit], **stats}
+
+
+def unblock(kind: str, value: str) -> bool:
+    """Lift a block wherever it lives (a device block can exist on several shards and here)."""
+    from services import blocklist
+
+    lifted = blocklist.unblock(kind, value)
+    for shard in _shards:
+        try:
+            with shard.lock:
+                lifted = shard.call("unblock", kind, value) or lifted
+        except (EOFError, OSError):
+            continue
+    return lifted
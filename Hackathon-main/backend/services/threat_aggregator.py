@@ -0,0 +1,126 @@
+"""
+Threat Aggregator: multi-resolution, time-bucketed threat counts for the dashboard.
+Every scored batch lands in per-second, per-minute and per-hour ring buffers at once
+(O(1) per resolution), so coarser history is always ready without a downsampling pass.
+Buckets carry totals, per-status and per-attack-type counts; any window is answered
+from the finest resolution that still covers it.
+"""
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from typing import List, Optional
+
+# (bucket seconds, number of buckets): 1h of seconds, 24h of minutes, 30d of hours
+RESOLUTIONS = [(1, 3600), (60, 1440), (3600, 720)]
+
+
+class _Ring:
+    """Fixed ring of buckets keyed by absolute bucket number; stale slots read as empty."""
+
+    def __init__(self, seconds: int, size: int):
+        self.seconds = seconds
+        self.size = size
+        self.ids = [-1] * size
+        self.total = [0] * size
+        self.by_status: List[Optional[Counter]] = [None] * size
+        self.by_attack: List[Optional[Counter]] = [None] * size
+
+    def add(self, ts: float, total: int, statuses: Counter, attacks: Counter):
+        bucket = int(ts // self.seconds)
+        i = bucket % self.size
+        if self.ids[i] != bucket:
+            self.ids[i] = bucket
+            self.total[i] = 0
+            self.by_status[i] = Counter()
+            self.by_attack[i] = Counter()
+        self.total[i] += total
+        self.by_status[i].update(statuses)
+        self.by_attack[i].update(attacks)
+
+    def get(self, bucket: int):
+        i = bucket % self.size
+        if self.ids[i] != bucket:
+            return 0, None, None
+        return self.total[i], self.by_status[i], self.by_attack[i]
+
+
+_rings = [_Ring(seconds, size) for seconds, size in RESOLUTIONS]
+_lock = threading.Lock()
+
+
+def record(flagged: List[dict], total: int, ts: float = None):
+    """Fold one scored batch (its flagged entries + batch size) into every resolution."""
+    ts = time.time() if ts is None else ts
+    statuses = Counter(f["status"] for f in flagged)
+    if total > len(flagged):
+        statuses["ALLOWED"] = total - len(flagged)
+    attacks = Counter(f.get("attack_type") or "Unclassified" for f in flagged)
+    with _lock:
+        for ring in _rings:
+            ring.add(ts, total, statuses, attacks)
+
+
+def _label(ts: float, step: int) -> str:
+    if step < 60:
+        fmt = "%H:%M:%S"
+    elif step < 3600:
+        fmt = "%H:%M"
+    elif step < 86400:
+        fmt = "%d %b %H:%M"
+    else:
+        fmt = "%d %b"
+    return datetime.fromtimestamp(ts).strftime(fmt)
+
+
+def query(window_seconds: float, points: int = 30, end: float = None) -> dict:
+    """Timeline over [end - window, end] as `points` evenly spaced buckets (or fewer if too fine).
+
+    Uses the finest ring that covers the whole window; each output point merges
+    step/resolution consecutive ring buckets.
+    """
+    end = time.time() if end is None else end
+    points = max(1, points)
+    ring = next((r for r in _rings if r.seconds * r.size >= window_seconds), _rings[-1])
+    window_seconds = min(window_seconds, ring.seconds * ring.size)
+    per_point = max(1, int(-(-window_seconds // (points * ring.seconds))))  # ceil
+    step = per_point * ring.seconds
+
+    last = int(end // step)   # output points aligned to the step, the current one included
+    n_points = max(1, min(points, int(-(-window_seconds // step))))
+    timeline = []
+    summary_status, summary_attack, summary_total = Counter(), Counter(), 0
+    with _lock:
+        for p in range(last - n_points + 1, last + 1):
+            total, statuses, attacks = 0, Counter(), Counter()
+            first = p * per_point
+            for b in range(first, first + per_point):
+                t, s, a = ring.get(b)
+                if s is not None:
+                    total += t
+                    statuses.update(s)
+                    attacks.update(a)
+            summary_total += total
+            summary_status.update(statuses)
+            summary_attack.update(attacks)
+            start = p * step
+            timeline.append({
+                "time": _label(start, step),
+                "start": start,
+                "total": total,
+                "threats": statuses["BLOCKED"] + statuses["FLAGGED"],
+                "blocked": statuses["BLOCKED"],
+                "flagged": statuses["FLAGGED"],
+                "by_attack_type": dict(attacks),
+            })
+    return {
+        "window_seconds": window_seconds,
+        "step_seconds": step,
+        "resolution_seconds": ring.seconds,
+        "points": timeline,
+        "summary": {
+            "total": summary_total,
+            "by_status": dict(summary_status),
+            "by_attack_type": dict(summary_attack),
+        },
+    }
@@ -0,0 +1,168 @@
+"""
+Request Tracing & Profiling: in-process per-stage spans and an on-demand sampling profiler.
+No external tracing backend — spans are kept in memory, aggregated per route,
+and optionally returned to the caller as a Server-Timing header.
+"""
+import os
+import sys
+import threading
+import time
+from collections import Counter, defaultdict, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+
+SERVER_TIMING_ALWAYS = os.getenv("TRACE_SERVER_TIMING", "off").lower() in ("1", "on", "true")
+RECENT_TRACES = 500
+
+_current: ContextVar[Optional[dict]] = ContextVar("zshield_trace", default=None)
+
+# Global state
+_recent: deque = deque(maxlen=RECENT_TRACES)
+_route_stats: Dict[str, Dict[str, List[float]]] = defaultdict(lambda: defaultdict(lambda: [0, 0.0, 0.0]))  # count, total_ms, max_ms
+_stats_lock = threading.Lock()
+
+
+def start_trace(method: str, path: str) -> dict:
+    # spans: name -> [calls, total_ms]; a stage entered once per row of a batch stays one entry
+    trace = {"method": method, "path": path, "started": time.perf_counter(), "spans": {}}
+    _current.set(trace)
+    return trace
+
+
+@contextmanager
+def span(name: str):
+    """Time a stage of the current request. A no-op outside a traced request."""
+    trace = _current.get()
+    if trace is None:
+        yield
+        return
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        _add(trace, name, (time.perf_counter() - t0) * 1000)
+
+
+def _add(trace: dict, name: str, ms: float):
+    agg = trace["spans"].get(name)
+    if agg is None:
+        trace["spans"][name] = [1, ms]
+    else:
+        agg[0] += 1
+        agg[1] += ms
+
+
+def mark_handler_start():
+    """Called first thing in a handler: everything before it was body parsing + Pydantic validation."""
+    trace = _current.get()
+    if trace is not None:
+        _add(trace, "validation", (time.perf_counter() - trace["started"]) * 1000)
+
+
+def finish_trace(trace: dict, route: str, status_code: int) -> float:
+    """Close a trace, fold it into the per-route aggregates and the recent-trace ring."""
+    total_ms = (time.perf_counter() - trace["started"]) * 1000
+    record = {
+        "route": route,
+        "method": trace["method"],
+        "status": status_code,
+        "total_ms": round(total_ms, 3),
+        "spans": [{"name": n, "ms": round(ms, 3), "calls": calls} for n, (calls, ms) in trace["spans"].items()],
+        "at": time.time(),
+    }
+    with _stats_lock:
+        _recent.append(record)
+        stages = _route_stats[route]
+        for name, ms in [(n, ms) for n, (_, ms) in trace["spans"].items()] + [("total", total_ms)]:
+            agg = stages[name]
+            agg[0] += 1
+            agg[1] += ms
+            agg[2] = max(agg[2], ms)
+    return total_ms
+
+
+def server_timing_header(trace: dict, total_ms: float) -> str:
+    parts = [f'{name};desc="x{calls}";dur={ms:.3f}' if calls > 1 else f"{name};dur={ms:.3f}"
+             for name, (calls, ms) in trace["spans"].items()]
+    parts.append(f"total;dur={total_ms:.3f}")
+    return ", ".join(parts)
+
+
+def get_trace_summary(route: Optional[str] = None, slowest: int = 10) -> dict:
+    with _stats_lock:
+        routes = {
+            r: {
+                name: {"count": c, "avg_ms": round(t / c, 3), "max_ms": round(m, 3)}
+                for name, (c, t, m) in stages.items()
+            }
+            for r, stages in _route_stats.items()
+            if route is None or r == route
+        }
+        recent = [t for t in _recent if route is None or t["route"] == route]
+    return {
+        "routes": routes,
+        "slowest": sorted(recent, key=lambda t: t["total_ms"], reverse=True)[:slowest],
+    }
+
+
+def _frame_stack(frame, max_depth: int = 64) -> List[str]:
+    stack = []
+    while frame is not None and len(stack) < max_depth:
+        code = frame.f_code
+        stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}:{frame.f_lineno}")
+        frame = frame.f_back
+    stack.reverse()
+    return stack
+
+
+# Leaf frames of threads parked waiting for work; skipped unless include_idle
+_IDLE_LEAVES = {"threading.py:wait", "selectors.py:select", "queue.py:get", "thread.py:_worker",
+                "base_events.py:_run_once", "threading.py:_wait_for_tstate_lock"}
+
+
+def sample_profile(seconds: float, interval_ms: float = 5.0, top: int = 25, include_idle: bool = False) -> dict:
+    """Sample every thread's stack (except this one) for `seconds`; aggregate into hot stacks.
+
+    Blocking — run it in a worker thread so the event loop keeps serving (and gets sampled).
+    Returns collapsed stacks ("a;b;c" -> samples, flamegraph.pl compatible) and
+    per-function self/total sample counts.
+    """
+    me = threading.get_ident()
+    names = {t.ident: t.name for t in threading.enumerate()}
+    stacks: Counter = Counter()
+    self_counts: Counter = Counter()
+    total_counts: Counter = Counter()
+    samples = 0
+    busy = 0
+    deadline = time.perf_counter() + seconds
+    interval = interval_ms / 1000
+
+    while time.perf_counter() < deadline:
+        for ident, frame in sys._current_frames().items():
+            if ident == me:
+                continue
+            stack = _frame_stack(frame)
+            if not stack:
+                continue
+            # Drop the line number for aggregation so a hot function is one entry
+            funcs = [s.rsplit(":", 1)[0] for s in stack]
+            if not include_idle and funcs[-1] in _IDLE_LEAVES:
+                continue
+            busy += 1
+            stacks[f"{names.get(ident, ident)};" + ";".join(funcs)] += 1
+            self_counts[funcs[-1]] += 1
+            for f in set(funcs):
+                total_counts[f] += 1
+        samples += 1
+        time.sleep(interval)
+
+    return {
+        "seconds": seconds,
+        "interval_ms": interval_ms,
+        "sweeps": samples,
+        "busy_samples": busy,
+        "hot_stacks": [{"stack": s, "samples": n} for s, n in stacks.most_common(top)],
+        "top_self": [{"function": f, "samples": n} for f, n in self_counts.most_common(top)],
+        "top_total": [{"function": f, "samples": n} for f, n in total_counts.most_common(top)],
+    }
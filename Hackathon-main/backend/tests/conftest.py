@@ -0,0 +1,76 @@
+import json
+import os
+import sys
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from services import blocklist  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def engine():
+    """The anomaly engine with its production models trained once per test run."""
+    from services import anomaly_engine
+
+    anomaly_engine.load_and_train()
+    return anomaly_engine
+
+
+@pytest.fixture
+def fresh_blocklist(monkeypatch):
+    """An empty hot blocklist for this test; call the returned function to empty it again."""
+    def reset():
+        monkeypatch.setattr(blocklist, "_entries", {})
+        monkeypatch.setattr(blocklist, "_bloom", blocklist._BloomFilter(blocklist.BLOOM_CAPACITY, blocklist.BLOOM_ERROR_RATE))
+        monkeypatch.setattr(blocklist, "_stale_bloom_keys", 0)
+        monkeypatch.setattr(blocklist, "_short_circuited", 0)
+        monkeypatch.setattr(blocklist, "_short_circuited_by_kind", {kind: 0 for kind in blocklist.BLOCK_KINDS})
+
+    reset()
+    return reset
+
+
+@pytest.fixture
+def client():
+    """The API without its startup hook (no model training, workers or live-traffic loop)."""
+    from fastapi.testclient import TestClient
+    import main
+
+    return TestClient(main.app)
+
+
+@pytest.fixture
+def admin_token(monkeypatch):
+    from routes import auth
+
+    monkeypatch.setattr(auth, "ADMIN_TOKEN", "test-admin-token")
+    return "test-admin-token"
+
+
+@pytest.fixture(scope="session")
+def transactions():
+    """The labelled sample set plus a bot burst, so batches also trigger automatic blocks."""
+    with open(os.path.join(BACKEND_DIR, "data", "transactions.json")) as f:
+        rows = json.load(f)
+    for tx in rows:
+        tx.pop("label", None)
+    burst = [{
+        "account_id": "PK-ACC0999",
+        "amount": 5000.0 + i,
+        "transaction_type": "Raast Transfer",
+        "recipient_bank": "Easypaisa",
+        "sender_city": "Karachi",
+        "recipient_city": "Lahore",
+        "timestamp": "2026-01-01T03:00:00",
+        "tx_count_last_5s": 20,
+        "time_delta_ms": 80.0,
+        "hour_of_day": 3,
+        "unique_recipients_last_10tx": 1,
+        "recipient_id": "PK-REC0666",
+        "is_new_device": True,
+        "location_change": True,
+    } for i in range(5)]
+    return rows[:150] + burst + rows[150:300]
@@ -0,0 +1,124 @@
+import asyncio
+
+import pytest
+
+from services import admission
+from services.admission import AdmissionController
+
+
+@pytest.fixture(autouse=True)
+def _enabled(monkeypatch):
+    monkeypatch.setattr(admission, "ADMISSION_ENABLED", True)
+
+
+async def _hold(controller: AdmissionController, release: asyncio.Event, seen: list):
+    async with controller.admit() as outcome:
+        seen.append(outcome)
+        if outcome[0]:
+            await release.wait()
+
+
+async def _until(condition):
+    for _ in range(1000):
+        if condition():
+            return
+        await asyncio.sleep(0)
+    raise AssertionError("condition never reached")
+
+
+async def _admit_once(controller: AdmissionController):
+    async with controller.admit() as outcome:
+        return outcome
+
+
+def test_admits_within_capacity():
+    async def scenario():
+        controller = AdmissionController("test", max_concurrency=2, max_queue=2, queue_slo_ms=1000)
+        outcome = await _admit_once(controller)
+        return controller, outcome
+
+    controller, outcome = asyncio.run(scenario())
+    assert outcome == (True, None)
+    assert controller.admitted == 1 and controller.in_flight == 0
+
+
+def test_sheds_when_queue_full():
+    async def scenario():
+        controller = AdmissionController("test", max_concurrency=1, max_queue=1, queue_slo_ms=1000)
+        release, seen = asyncio.Event(), []
+        holder = asyncio.create_task(_hold(controller, release, seen))
+        await _until(lambda: controller.in_flight == 1)
+        waiter = asyncio.create_task(_hold(controller, release, seen))   # takes the one queue place
+        await _until(lambda: controller.queued == 1)
+        outcome = await _admit_once(controller)
+        release.set()
+        await asyncio.gather(holder, waiter)
+        return controller, outcome, seen
+
+    controller, outcome, seen = asyncio.run(scenario())
+    assert outcome == (False, "queue_full")
+    assert seen == [(True, None), (True, None)]
+    assert controller.degraded["queue_full"] == 1
+
+
+def test_sheds_on_queue_timeout():
+    async def scenario():
+        controller = AdmissionController("test", max_concurrency=1, max_queue=4, queue_slo_ms=20)
+        release, seen = asyncio.Event(), []
+        holder = asyncio.create_task(_hold(controller, release, seen))
+        await _until(lambda: controller.in_flight == 1)
+        outcome = await _admit_once(controller)
+        release.set()
+        await holder
+        return controller, outcome
+
+    controller, outcome = asyncio.run(scenario())
+    assert outcome == (False, "queue_timeout")
+    assert controller.degraded["queue_timeout"] == 1
+    assert controller.queued == 0
+
+
+def test_sheds_on_predicted_slo_miss():
+    async def scenario():
+        controller = AdmissionController("test", max_concurrency=1, max_queue=4, queue_slo_ms=100)
+        controller._service_ms_ewma = 500.0   # each call holds its slot ~500 ms
+        release, seen = asyncio.Event(), []
+        holder = asyncio.create_task(_hold(controller, release, seen))
+        await _until(lambda: controller.in_flight == 1)
+        outcome = await _admit_once(controller)
+        release.set()
+        await holder
+        return controller, outcome
+
+    controller, outcome = asyncio.run(scenario())
+    assert outcome == (False, "predicted_slo_miss")
+    assert controller.degraded["predicted_slo_miss"] == 1
+
+
+def test_run_serves_fallback_when_shed():
+    async def scenario():
+        controller = AdmissionController("test", max_concurrency=1, max_queue=0, queue_slo_ms=1000)
+        return await controller.run(lambda: {"source": "llm"}, lambda: {"source": "local"})
+
+    result = asyncio.run(scenario())
+    assert result == {"source": "local", "degraded": True, "degraded_reason": "queue_full"}
+
+
+def test_run_uses_primary_when_admitted():
+    async def scenario():
+        controller = AdmissionController("test", max_concurrency=1, max_queue=1, queue_slo_ms=1000)
+        return controller, await controller.run(lambda: {"source": "llm"}, lambda: {"source": "local"})
+
+    controller, result = asyncio.run(scenario())
+    assert result == {"source": "llm", "degraded": False}
+    assert controller.stats()["service_ms_ewma"] is not None
+
+
+def test_disabled_admits_everything(monkeypatch):
+    monkeypatch.setattr(admission, "ADMISSION_ENABLED", False)
+
+    async def scenario():
+        controller = AdmissionController("test", max_concurrency=1, max_queue=0, queue_slo_ms=1000)
+        return await _admit_once(controller)
+
+    assert asyncio.run(scenario()) == (True, None)
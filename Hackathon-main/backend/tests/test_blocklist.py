@@ -0,0 +1,114 @@
+import time
+
+import pytest
+
+from services import blocklist
+from services.records import TxRecord
+
+
+@pytest.fixture(autouse=True)
+def _fresh(fresh_blocklist):
+    return fresh_blocklist
+
+
+def test_block_and_match():
+    blocklist.block("account", "PK-ACC0001", ttl_seconds=60, reason="manual", risk_score=0.9, attack_type="Account Takeover")
+    hit = blocklist.match(TxRecord(account_id="PK-ACC0001"))
+    assert hit["kind"] == "account" and hit["reason"] == "manual" and hit["hits"] == 1
+    assert blocklist.match(TxRecord(account_id="PK-ACC0002")) is None
+    assert blocklist.match_ids(None, None, None) is None
+
+
+def test_unknown_kind_rejected():
+    with pytest.raises(ValueError):
+        blocklist.block("iban", "PK00TEST")
+
+
+def test_entry_expires_after_ttl(monkeypatch):
+    blocklist.block("device", "dev-1", ttl_seconds=60)
+    assert blocklist.match_ids(None, None, "dev-1") is not None
+    now = time.time()
+    monkeypatch.setattr(blocklist.time, "time", lambda: now + 61)
+    assert blocklist.match_ids(None, None, "dev-1") is None
+    assert blocklist.size() == 0
+
+
+def test_zero_ttl_never_matches():
+    blocklist.block("account", "PK-ACC0001", ttl_seconds=0)
+    assert blocklist.match_ids("PK-ACC0001") is None
+
+
+def test_manual_blocks_use_default_ttl():
+    entry = blocklist.block("recipient", "PK-REC0001")
+    assert entry["expires_at"] - entry["blocked_at"] == pytest.approx(blocklist.DEFAULT_TTL_SECONDS)
+
+
+def test_unblock():
+    blocklist.block("recipient", "PK-REC0001")
+    assert blocklist.unblock("recipient", "PK-REC0001") is True
+    assert blocklist.match_ids(None, "PK-REC0001") is None
+    assert blocklist.unblock("recipient", "PK-REC0001") is False
+
+
+def test_auto_block_covers_sender_side_only():
+    tx = TxRecord(account_id="PK-ACC0001", recipient_id="PK-REC0001", device_id="dev-1")
+    assert blocklist.auto_block(tx, reason="burst", risk_score=0.9, attack_type="Agentic Bot Drain")
+    assert blocklist.match_ids("PK-ACC0001") is not None
+    assert blocklist.match_ids(None, None, "dev-1") is not None
+    assert blocklist.match_ids(None, "PK-REC0001") is None
+    entry = blocklist.list_entries()[0]
+    assert entry["expires_at"] - entry["blocked_at"] == pytest.approx(blocklist.AUTO_BLOCK_TTL_SECONDS)
+
+
+@pytest.mark.parametrize("risk, attack_type", [
+    (0.80, "Agentic Bot Drain"),     # below AUTO_BLOCK_MIN_RISK
+    (0.99, "Behavioral Anomaly"),    # no recognised attack pattern
+    (0.99, None),
+])
+def test_auto_block_needs_strong_signal(risk, attack_type):
+    tx = TxRecord(account_id="PK-ACC0001", device_id="dev-1")
+    assert not blocklist.auto_block(tx, risk_score=risk, attack_type=attack_type)
+    assert blocklist.size() == 0
+
+
+def test_short_circuit_counters():
+    blocklist.block("account", "PK-ACC0001", ttl_seconds=60)
+    for _ in range(3):
+        blocklist.match_ids("PK-ACC0001")
+    stats = blocklist.get_blocklist_stats()
+    assert stats["size"] == 1
+    assert stats["short_circuited"] == 3
+    assert stats["short_circuited_by_kind"]["account"] == 3
+
+
+def test_list_entries_purges_expired(monkeypatch):
+    blocklist.block("account", "old", ttl_seconds=10)
+    blocklist.block("account", "new", ttl_seconds=100)
+    now = time.time()
+    monkeypatch.setattr(blocklist.time, "time", lambda: now + 50)
+    assert [e["value"] for e in blocklist.list_entries()] == ["new"]
+
+
+def test_unblock_endpoint_requires_admin_token(client, monkeypatch):
+    from routes import auth
+
+    blocklist.block("account", "PK-ACC0001", ttl_seconds=60)
+    body = {"kind": "account", "value": "PK-ACC0001"}
+    monkeypatch.setattr(auth, "ADMIN_TOKEN", None)
+    assert client.post("/api/blocklist/unblock", json=body).status_code == 503
+    monkeypatch.setattr(auth, "ADMIN_TOKEN", "secret")
+    assert client.post("/api/blocklist/unblock", json=body).status_code == 403
+    assert client.post("/api/blocklist/unblock", json=body, headers={"X-Admin-Token": "wrong"}).status_code == 403
+    assert blocklist.match_ids("PK-ACC0001") is not None
+
+
+def test_unblock_endpoint(client, admin_token):
+    blocklist.block("account", "PK-ACC0001", ttl_seconds=60)
+    headers = {"X-Admin-Token": admin_token}
+    response = client.post("/api/blocklist/unblock", json={"kind": "account", "value": "PK-ACC0001"}, headers=headers)
+    assert response.status_code == 200
+    assert blocklist.match_ids("PK-ACC0001") is None
+    assert client.post("/api/blocklist/unblock", json={"kind": "account", "value": "PK-ACC0001"},
+                       headers=headers).status_code == 404
+    assert client.post("/api/blocklist/unblock", json={"kind": "iban", "value": "x"},
+                       headers=headers).status_code == 400
@@ -0,0 +1,108 @@
+import pytest
+
+from services import circuit_breaker
+from services.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = _Clock()
+    monkeypatch.setattr(circuit_breaker.time, "monotonic", clock)
+    return clock
+
+
+@pytest.fixture
+def breaker(clock):
+    return CircuitBreaker("test", window_size=10, min_calls=4, error_rate_threshold=0.5,
+                          slow_call_ms=100, slow_rate_threshold=0.5, open_seconds=30, half_open_probes=1)
+
+
+def _state(breaker: CircuitBreaker) -> str:
+    return breaker.snapshot()["state"]
+
+
+def _trip(breaker: CircuitBreaker):
+    for _ in range(breaker.min_calls):
+        breaker.record_failure(RuntimeError("boom"))
+
+
+def test_stays_closed_below_min_calls(breaker):
+    for _ in range(breaker.min_calls - 1):
+        breaker.record_failure(RuntimeError("boom"))
+    assert _state(breaker) == CLOSED
+    assert breaker.allow()
+
+
+def test_opens_on_error_rate(breaker):
+    breaker.record_success(10)
+    breaker.record_success(10)
+    breaker.record_failure(TimeoutError("slow provider"))
+    assert _state(breaker) == CLOSED
+    breaker.record_failure(TimeoutError("slow provider"))
+    snapshot = breaker.snapshot()
+    assert snapshot["state"] == OPEN
+    assert snapshot["times_opened"] == 1
+    assert snapshot["last_failure"] == "TimeoutError: slow provider"
+
+
+def test_opens_on_slow_rate(breaker):
+    for latency in (10, 150, 200, 10):
+        breaker.record_success(latency)
+    assert _state(breaker) == OPEN
+
+
+def test_open_refuses_and_counts(breaker):
+    _trip(breaker)
+    assert breaker.is_open()
+    assert not breaker.allow()
+    assert not breaker.allow()
+    assert breaker.snapshot()["short_circuited"] == 2
+
+
+def test_half_open_after_cooldown_allows_limited_probes(breaker, clock):
+    _trip(breaker)
+    clock.now += breaker.open_seconds
+    assert not breaker.is_open()
+    assert breaker.allow()            # the probe
+    assert _state(breaker) == HALF_OPEN
+    assert not breaker.allow()        # only half_open_probes at a time
+
+
+def test_probe_success_closes(breaker, clock):
+    _trip(breaker)
+    clock.now += breaker.open_seconds
+    assert breaker.allow()
+    breaker.record_success(10)
+    assert _state(breaker) == CLOSED
+    assert breaker.snapshot()["window_calls"] == 0
+
+
+@pytest.mark.parametrize("outcome", ["failure", "slow"])
+def test_probe_failure_or_slow_reopens(breaker, clock, outcome):
+    _trip(breaker)
+    clock.now += breaker.open_seconds
+    assert breaker.allow()
+    if outcome == "failure":
+        breaker.record_failure(RuntimeError("still down"))
+    else:
+        breaker.record_success(breaker.slow_call_ms)
+    assert _state(breaker) == OPEN
+    assert breaker.snapshot()["times_opened"] == 2
+    assert not breaker.allow()
+
+
+def test_abandon_frees_probe_slot(breaker, clock):
+    _trip(breaker)
+    clock.now += breaker.open_seconds
+    assert breaker.allow()
+    assert not breaker.allow()
+    breaker.abandon()
+    assert breaker.allow()
@@ -0,0 +1,67 @@
+import json
+
+import numpy as np
+import pytest
+
+from services import columnar
+
+COLUMNS = {
+    "account_id": ["PK-ACC0001", "PK-ACC0002", None],
+    "amount": [1200.0, 80.0, 5000.0],
+    "tx_count_last_5s": [1, 20, 3],
+    "time_delta_ms": [60000.0, 80.0, 900.0],
+    "hour_of_day": [12, 3, 23],
+    "unique_recipients_last_10tx": [5, 1, 2],
+    "is_new_device": [False, True, False],
+}
+
+
+def _json(payload) -> bytes:
+    return json.dumps(payload).encode()
+
+
+def test_json_and_binary_decode_alike():
+    json_columns, json_n, json_scores = columnar.decode(_json({"columns": COLUMNS, "include_scores": True}),
+                                                        "application/json")
+    binary_columns, binary_n, binary_scores = columnar.decode(columnar.encode_binary(COLUMNS, include_scores=True),
+                                                              columnar.BINARY_CONTENT_TYPE)
+    assert json_n == binary_n == 3 and json_scores is binary_scores is True
+    for name in COLUMNS:
+        assert np.asarray(json_columns[name]).tolist() == np.asarray(binary_columns[name]).tolist()
+
+
+@pytest.mark.parametrize("payload", [
+    [1],
+    "columns",
+    {"columns": [1, 2]},
+    {"columns": {**COLUMNS, "amount": [[1.0, 2.0]] * 3}},
+    {"columns": {**COLUMNS, "account_id": [1, 2, 3]}},
+    {"columns": {**COLUMNS, "amount": [1.0, 2.0]}},
+    {"columns": {name: col for name, col in COLUMNS.items() if name != "amount"}},
+])
+def test_malformed_json_rejected(payload):
+    with pytest.raises(ValueError):
+        columnar.decode_json(_json(payload))
+
+
+def test_binary_numeric_column_sent_as_strings_rejected():
+    header = json.dumps({"n": 3, "numeric": [], "strings": COLUMNS}).encode()
+    with pytest.raises(ValueError):
+        columnar.decode_binary(len(header).to_bytes(4, "little") + header)
+
+
+def test_endpoint_rejects_malformed_batches(client):
+    for payload in ([1], {"columns": {**COLUMNS, "amount": [[1.0, 2.0]] * 3}}):
+        response = client.post("/api/analyze-transactions/columnar", content=_json(payload),
+                               headers={"Content-Type": "application/json"})
+        assert response.status_code == 422
+
+
+def test_endpoint_empty_batch(client):
+    empty = {name: [] for name in COLUMNS}
+    response = client.post("/api/analyze-transactions/columnar", content=_json({"columns": empty, "include_scores": True}),
+                           headers={"Content-Type": "application/json"})
+    assert response.status_code == 200
+    body = response.json()
+    assert body["total_analyzed"] == body["total_flagged"] == 0
+    assert body["flagged"]["index"] == [] and body["risk_scores"] == []
@@ -0,0 +1,47 @@
+import pytest
+
+from services import phishing_service
+from services.circuit_breaker import groq_breaker
+
+PHISHING = "URGENT: your Zindigi account is suspended. Share your OTP at http://zindigi-verify.example now."
+SAFE = "Lunch at 1 tomorrow? I'll book the table."
+
+
+@pytest.fixture
+def no_llm(monkeypatch):
+    monkeypatch.delenv("GROQ_API_KEY", raising=False)
+
+
+@pytest.mark.parametrize("text", [PHISHING, SAFE])
+def test_uncertain_band_answered_by_rules_without_llm(no_llm, text):
+    result = phishing_service.analyze_text(text, prob=0.5)
+    rules = phishing_service._rule_based_analysis(text)
+    assert result["served_by"] == "rule-based"
+    assert (result["is_phishing"], result["confidence"], result["risk_label"]) == \
+           (rules["is_phishing"], rules["confidence"], rules["risk_label"])
+    assert result["model_probability"] == 0.5
+
+
+@pytest.mark.parametrize("prob, is_phishing", [(0.95, True), (0.05, False)])
+def test_confident_probabilities_answered_by_classifier(no_llm, prob, is_phishing):
+    result = phishing_service.analyze_text(SAFE, prob=prob)
+    assert result["served_by"] == "local-model"
+    assert result["is_phishing"] is is_phishing
+
+
+@pytest.mark.parametrize("prob, escalates", [(0.24, False), (0.25, True), (0.74, True), (0.75, False)])
+def test_band_edges_escalate_only_with_llm(monkeypatch, prob, escalates):
+    monkeypatch.setattr(phishing_service, "GROQ_AVAILABLE", True)
+    monkeypatch.setenv("GROQ_API_KEY", "test-key")
+    assert phishing_service.would_escalate(prob) is escalates
+    monkeypatch.delenv("GROQ_API_KEY")
+    assert phishing_service.would_escalate(prob) is False
+
+
+def test_open_breaker_serves_rules_in_band(monkeypatch):
+    monkeypatch.setattr(phishing_service, "GROQ_AVAILABLE", True)
+    monkeypatch.setenv("GROQ_API_KEY", "test-key")
+    monkeypatch.setattr(groq_breaker, "allow", lambda: False)
+    result = phishing_service.analyze_text(PHISHING, prob=0.5)
+    assert result["served_by"] == "rule-based" and result["is_phishing"] is True
+    assert result["degraded"] is True and result["degraded_reason"] == "circuit_open"
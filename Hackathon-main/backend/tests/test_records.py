@@ -0,0 +1,82 @@
+import numpy as np
+
+from services.anomaly_engine import _columns_to_features
+from services.records import FEATURE_FIELDS, TX_DTYPE, TxBatch, TxRecord, record_from_columns
+
+ODD_ROWS = [
+    {},
+    {"amount": None, "hour_of_day": None, "is_new_device": None},
+    {"tx_count_last_5s": 3.7, "hour_of_day": 2.9, "unique_recipients_last_10tx": 1.2,
+     "amount": 5.5, "is_new_device": 2, "location_change": 0},
+    {"account_id": "PK-ACC0001", "sender_city": "Karachi", "time_delta_ms": 150},
+]
+
+
+def _fields(record: TxRecord) -> tuple:
+    return tuple(getattr(record, name) for name in TX_DTYPE.names)
+
+
+def test_record_defaults():
+    tx = TxRecord.from_dict({})
+    assert (tx.tx_count_last_5s, tx.time_delta_ms, tx.hour_of_day, tx.unique_recipients_last_10tx,
+            tx.amount, tx.is_new_device, tx.location_change) == (0, 100000.0, 12, 5, 1000.0, False, False)
+    assert tx.account_id is None and tx.sender_city is None
+
+
+def test_record_nulls_take_defaults():
+    tx = TxRecord.from_dict({"amount": None, "hour_of_day": None, "location_change": None})
+    assert (tx.amount, tx.hour_of_day, tx.location_change) == (1000.0, 12, False)
+
+
+def test_record_field_types():
+    tx = TxRecord.from_dict({"tx_count_last_5s": 3.7, "amount": 5, "hour_of_day": "4", "is_new_device": 1})
+    assert tx.tx_count_last_5s == 3 and type(tx.tx_count_last_5s) is int
+    assert tx.hour_of_day == 4 and type(tx.hour_of_day) is int
+    assert tx.amount == 5.0 and type(tx.amount) is float
+    assert tx.is_new_device is True
+
+
+def test_categorical_labels_are_interned():
+    a = TxRecord.from_dict({"sender_city": "".join(["Kar", "achi"])})
+    b = TxRecord.from_dict({"sender_city": "".join(["Kara", "chi"])})
+    assert a.sender_city is b.sender_city
+
+
+def test_batch_matches_records(transactions):
+    rows = transactions[:50] + ODD_ROWS
+    batch = TxBatch.from_dicts(rows)
+    assert len(batch) == len(rows)
+    for i, tx in enumerate(rows):
+        assert _fields(batch.record(i)) == _fields(TxRecord.from_dict(tx))
+
+
+def test_batch_defaults():
+    batch = TxBatch.from_dicts([{}, {"amount": None}])
+    for i in range(2):
+        assert _fields(batch.record(i)) == _fields(TxRecord())
+
+
+def test_feature_matrix_identical_on_every_ingest_path(transactions):
+    rows = transactions[:50] + ODD_ROWS[:3]
+    from_records = np.vstack([TxRecord.from_dict(tx).features() for tx in rows])
+    from_batch = TxBatch.from_dicts(rows).features()
+    columns = {name: [tx.get(name) for tx in rows] for name, _ in FEATURE_FIELDS}
+    from_columns = _columns_to_features(columns, len(rows))
+    assert np.array_equal(from_batch, from_records)
+    assert np.array_equal(from_columns, from_records)
+    assert from_batch[-1].tolist() == [3.0, 100000.0, 2.0, 1.0, 5.5, 1.0, 0.0]
+
+
+def test_from_records_round_trip(transactions):
+    records = [TxRecord.from_dict(tx) for tx in transactions[:20]]
+    batch = TxBatch.from_records(records)
+    assert [_fields(batch.record(i)) for i in range(len(records))] == [_fields(r) for r in records]
+    assert batch.take([3, 1]).column("account_id") == [records[3].account_id, records[1].account_id]
+
+
+def test_record_from_columns(transactions):
+    rows = transactions[:10]
+    columns = {name: [tx.get(name) for tx in rows] for name in TX_DTYPE.names}
+    X = TxBatch.from_dicts(rows).features()
+    for i, tx in enumerate(rows):
+        assert _fields(record_from_columns(columns, X, i)) == _fields(TxRecord.from_dict(tx))
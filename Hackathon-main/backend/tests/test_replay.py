@@ -0,0 +1,68 @@
+import csv
+import importlib.util
+import json
+import os
+
+import pytest
+
+from conftest import BACKEND_DIR
+
+_spec = importlib.util.spec_from_file_location("replay", os.path.join(BACKEND_DIR, "scripts", "replay.py"))
+replay = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(replay)
+
+
+@pytest.fixture(scope="module")
+def rows():
+    with open(os.path.join(BACKEND_DIR, "data", "transactions.json")) as f:
+        return json.load(f)[:200]
+
+
+def _write_jsonl(path, rows):
+    path.write_text("".join(json.dumps(tx) + "\n" for tx in rows))
+    return str(path)
+
+
+def test_null_and_missing_account_ids(tmp_path):
+    rows = [{"account_id": None, "amount": 1.0}, {"amount": 2.0}, {"account_id": "PK-ACC0001", "amount": 3.0}]
+    (tmp_path / "a.json").write_text(json.dumps(rows))
+    _write_jsonl(tmp_path / "a.jsonl", rows)
+    with open(tmp_path / "a.csv", "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=["account_id", "amount"])
+        writer.writeheader()
+        writer.writerows(rows)
+    for name in ("a.json", "a.jsonl", "a.csv"):
+        accounts = [account_id for account_id, _ in replay._iter_records(str(tmp_path / name))]
+        assert accounts == ["", "", "PK-ACC0001"]
+        assert {replay._shard_of(a, 3) for a in accounts[:2]} == {replay._shard_of("", 3)}
+
+
+def test_every_format_partitions_alike(tmp_path, rows):
+    (tmp_path / "a.json").write_text(json.dumps(rows))
+    _write_jsonl(tmp_path / "a.jsonl", rows)
+    for name in ("a.json", "a.jsonl"):
+        shards = [replay._shard_of(a, 4) for a, _ in replay._iter_records(str(tmp_path / name))]
+        assert shards == [replay._shard_of(tx["account_id"], 4) for tx in rows]
+
+
+def test_replay_reports_per_type_only_for_typed_labels(tmp_path, engine, rows):
+    typed = [{**tx, "attack_type": "Agentic Bot Drain"} if tx["label"] != "normal" else tx for tx in rows[:100]]
+    path = _write_jsonl(tmp_path / "replay.jsonl", typed + rows[100:] + [{**rows[0], "account_id": None}])
+    report = replay.replay([path], workers=2, batch_size=32)
+    assert report["rows"] == 201
+    confusion = report["confusion"]
+    assert confusion["tp"] + confusion["fp"] + confusion["fn"] + confusion["tn"] == 201
+    typed_attacks = sum(tx["label"] != "normal" for tx in rows[:100])
+    assert list(report["per_attack_type"]) == ["Agentic Bot Drain"]
+    assert report["per_attack_type"]["Agentic Bot Drain"]["total"] == typed_attacks
+
+
+def _crash(transactions):
+    os._exit(3)
+
+
+def test_crashed_worker_fails_the_replay(tmp_path, engine, rows, monkeypatch):
+    monkeypatch.setattr(engine, "decide_transactions", _crash)   # inherited by the forked workers
+    path = _write_jsonl(tmp_path / "replay.jsonl", rows)
+    with pytest.raises(RuntimeError, match="exited before reporting"):
+        replay.replay([path], workers=2, batch_size=8)
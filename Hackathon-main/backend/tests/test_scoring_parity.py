@@ -0,0 +1,139 @@
+"""Every scoring path must reach the same verdicts for the same batch."""
+import pytest
+
+from services import blocklist, sharding
+from services.records import TX_DTYPE
+
+VERDICT_KEYS = ("account_id", "amount", "risk_score", "reason", "status", "attack_type")
+
+
+def _verdicts(flagged: list) -> list:
+    return [tuple(entry[key] for key in VERDICT_KEYS) for entry in flagged]
+
+
+def _columns(transactions: list) -> dict:
+    return {name: [tx.get(name) for tx in transactions] for name in TX_DTYPE.names}
+
+
+@pytest.fixture
+def expire_auto_blocks(monkeypatch):
+    """Automatic blocks expire at once, here and in shard workers started after this fixture."""
+    monkeypatch.setenv("BLOCKLIST_AUTO_TTL_SECONDS", "0")
+    monkeypatch.setattr(blocklist, "AUTO_BLOCK_TTL_SECONDS", 0)
+
+
+@pytest.fixture
+def start_shards(engine):
+    """Starts shard workers on demand — after the in-process reference run, which they would take over."""
+    def start():
+        sharding.start(workers=2, rows=64)   # small shared-memory blocks: batches go through in chunks
+        return sharding
+
+    yield start
+    sharding.stop()
+
+
+def test_batch_triggers_blocks(engine, fresh_blocklist, transactions):
+    flagged = engine.analyze_transactions(transactions)
+    statuses = {entry["status"] for entry in flagged}
+    assert statuses == {"FLAGGED", "BLOCKED"}
+    assert any(entry["reason"].startswith("Blocklisted account") for entry in flagged)
+
+
+def test_batch_path_matches_single_transaction_scoring(engine, fresh_blocklist, transactions, expire_auto_blocks):
+    flagged = engine.analyze_transactions(transactions)
+    singles = [engine.score_single_transaction(tx) for tx in transactions]
+    expected = [
+        (r["account_id"], r["amount"], r["fraud_probability"], r["reason"],
+         "BLOCKED" if r["fraud_probability"] > 0.75 else "FLAGGED", r["attack_type"])
+        for r in singles if r["is_fraud"]
+    ]
+    assert _verdicts(flagged) == expected
+
+
+def test_empty_batch(engine):
+    assert engine.analyze_transactions([]) == []
+
+
+def test_decide_transactions_matches_row_path(engine, fresh_blocklist, transactions):
+    row = engine.analyze_transactions(transactions)
+    fresh_blocklist()
+    decisions = engine.decide_transactions(transactions)
+    assert len(decisions) == len(transactions)
+    decided = [
+        (tx["account_id"], tx["amount"], d["risk_score"], d["reason"], d["status"], d["attack_type"])
+        for tx, d in zip(transactions, decisions) if d["status"] != "ALLOWED"
+    ]
+    assert decided == _verdicts(row)
+
+
+def test_columnar_matches_row_path(engine, fresh_blocklist, transactions, expire_auto_blocks):
+    # The columnar path scores a batch at once, so its blocks only reach later batches;
+    # with blocks expiring immediately the two paths must agree row for row.
+    row = engine.analyze_transactions(transactions)
+    result = engine.analyze_columns(_columns(transactions), len(transactions), include_scores=True)
+    flagged = result["flagged"]
+    columnar = [tuple(flagged[key][k] for key in VERDICT_KEYS) for k in range(result["total_flagged"])]
+    assert columnar == _verdicts(row)
+    assert [transactions[i]["account_id"] for i in flagged["index"]] == [v[0] for v in columnar]
+
+
+def test_sharded_matches_row_path(engine, fresh_blocklist, transactions, start_shards):
+    row = engine.analyze_transactions(transactions)
+    blocked = blocklist.size()
+    fresh_blocklist()
+    shards = start_shards()
+    assert _verdicts(shards.score(transactions)) == _verdicts(row)
+    view = shards.blocklist_view()
+    assert view["size"] == blocked > 0
+
+
+def test_sharded_columnar_matches_row_path(engine, fresh_blocklist, transactions, start_shards):
+    # In sharded mode the columnar batch goes to the workers, with their per-row block semantics
+    row = engine.analyze_transactions(transactions)
+    scores = engine.analyze_columns(_columns(transactions), len(transactions), include_scores=True)["risk_scores"]
+    blocked = blocklist.size()
+    fresh_blocklist()
+    start_shards()
+    result = engine.analyze_columns(_columns(transactions), len(transactions), include_scores=True)
+    flagged = result["flagged"]
+    assert [tuple(flagged[key][k] for key in VERDICT_KEYS) for k in range(result["total_flagged"])] == _verdicts(row)
+    assert result["risk_scores"] == pytest.approx(scores)
+    assert blocklist.size() == 0 and sharding.blocklist_view()["size"] == blocked
+
+
+def test_sharded_view_and_unblock_include_local_blocks(engine, fresh_blocklist, start_shards):
+    # Rows scored here for a dead worker leave their blocks in this process's blocklist
+    shards = start_shards()
+    blocklist.block("account", "PK-ACC0001", ttl_seconds=60)
+    view = shards.blocklist_view()
+    assert view["size"] == 1 and view["entries"][0]["value"] == "PK-ACC0001"
+    assert shards.unblock("account", "PK-ACC0001") is True
+    assert blocklist.size() == 0
+    assert shards.unblock("account", "PK-ACC0001") is False
+
+
+def test_dead_shard_is_scored_locally_and_respawned(engine, fresh_blocklist, transactions, expire_auto_blocks,
+                                                     start_shards):
+    # Without lasting blocks the local fallback and the respawned worker start from the same state
+    row = engine.analyze_transactions(transactions)
+    shards = start_shards()
+    dead = shards._shards[0].process
+    dead.kill()
+    dead.join()
+    assert _verdicts(shards.score(transactions)) == _verdicts(row)
+    assert shards._shards[0].process is not dead and shards._shards[0].process.is_alive()
+    assert _verdicts(shards.score(transactions)) == _verdicts(row)
+
+
+def test_sharded_batches_reach_the_shadow_scorer(engine, fresh_blocklist, transactions, start_shards, monkeypatch):
+    from services import shadow
+
+    offered = []
+    monkeypatch.setattr(shadow, "offer", lambda X, risk, ms: offered.append((X, risk, ms)))
+    shards = start_shards()
+    result = engine.analyze_columns(_columns(transactions), len(transactions), include_scores=True)
+    shards.score(transactions)
+    assert [len(X) for X, _, _ in offered] == [len(transactions)] * 2
+    X, risk, ms = offered[0]
+    assert sorted(risk.tolist()) == pytest.approx(sorted(result["risk_scores"])) and ms > 0
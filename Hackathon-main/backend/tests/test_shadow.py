@@ -0,0 +1,111 @@
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from services import anomaly_engine, shadow
+
+
+def _slow_identity(X):
+    """Candidate transform (module-level so the scorer process can unpickle it) that makes each fit take ~2 s."""
+    if len(X) > 100:
+        time.sleep(2)
+    return X
+
+
+@pytest.fixture
+def scorer(monkeypatch):
+    monkeypatch.setattr(shadow, "SHADOW_SAMPLE_RATE", 1.0)
+    yield shadow
+    shadow.stop()
+
+
+def _refuse_training(*args, **kwargs):
+    raise AssertionError("out-of-range parameters reached the scorer process")
+
+
+@pytest.mark.parametrize("iso_params, xgb_params", [
+    ({"n_estimators": 10 ** 8}, None),
+    ({"n_jobs": 64}, None),
+    ({"contamination": "high"}, None),
+    ({"max_features": True}, None),
+    (None, {"max_depth": 100}),
+])
+def test_out_of_range_params_refused_before_training(monkeypatch, iso_params, xgb_params):
+    monkeypatch.setattr(shadow, "register", _refuse_training)
+    with pytest.raises(ValueError):
+        anomaly_engine.register_candidate("big", iso_params, xgb_params)
+
+
+def test_auto_params_accepted(monkeypatch):
+    monkeypatch.setattr(shadow, "register", lambda *args: "registered")
+    assert anomaly_engine.register_candidate("auto", {"max_samples": "auto", "contamination": "auto"}) == "registered"
+
+
+def test_candidate_endpoints_require_admin_token(client, monkeypatch):
+    from routes import auth
+
+    monkeypatch.setattr(shadow, "register", _refuse_training)
+    monkeypatch.setattr(auth, "ADMIN_TOKEN", None)
+    assert client.post("/api/shadow/candidates", json={"name": "c"}).status_code == 503
+    monkeypatch.setattr(auth, "ADMIN_TOKEN", "secret")
+    assert client.post("/api/shadow/candidates", json={"name": "c"}).status_code == 403
+    assert client.delete("/api/shadow/candidates/c").status_code == 403
+
+
+def test_out_of_range_params_are_a_400(client, admin_token, monkeypatch):
+    monkeypatch.setattr(shadow, "register", _refuse_training)
+    response = client.post("/api/shadow/candidates", json={"name": "big", "iso_params": {"n_estimators": 10 ** 8}},
+                           headers={"X-Admin-Token": admin_token})
+    assert response.status_code == 400
+
+
+def test_candidate_scores_sampled_traffic(scorer):
+    params = scorer.register("small", {"n_estimators": 20})
+    assert params["iso"]["n_estimators"] == 20
+    X = np.tile([[1.0, 60000.0, 12.0, 5.0, 2000.0, 0.0, 0.0], [20.0, 80.0, 3.0, 1.0, 5000.0, 1.0, 1.0]], (10, 1))
+    scorer.offer(X, np.tile([0.1, 0.9], 10), prod_ms=2.0)
+    deadline = time.time() + 10
+    while time.time() < deadline:
+        stats = scorer.get_shadow_stats()
+        if stats["candidates"]["small"]["window_rows"]:
+            break
+        time.sleep(0.1)
+    candidate = stats["candidates"]["small"]
+    assert stats["scorer_process"] == "running"
+    assert candidate["window_rows"] == 20 and candidate["errors"] == 0
+    assert scorer.unregister("small") is True
+    assert scorer.unregister("small") is False
+
+
+def test_rejected_params_raise_value_error(scorer):
+    with pytest.raises(ValueError):
+        scorer.register("bad", {"n_estimators": -1})   # past the API-side limits, straight to the model
+
+
+def test_stats_answered_while_a_candidate_trains(scorer):
+    scorer.register("small", {"n_estimators": 10})
+    fit = threading.Thread(target=scorer.register, args=("slow", {"n_estimators": 10}, None, _slow_identity))
+    fit.start()
+    time.sleep(0.5)                     # the slow fit is now running in the scorer process
+    t0 = time.perf_counter()
+    stats = scorer.get_shadow_stats()
+    assert time.perf_counter() - t0 < 1.0
+    assert list(stats["candidates"]) == ["small"]
+    fit.join()
+    assert set(scorer.get_shadow_stats()["candidates"]) == {"small", "slow"}
+
+
+def test_stop_does_not_wait_for_a_fit(scorer):
+    scorer.register("small", {"n_estimators": 10})
+    fit = threading.Thread(target=lambda: pytest.raises(RuntimeError, scorer.register, "slow",
+                                                        {"n_estimators": 10}, None, _slow_identity))
+    fit.start()
+    time.sleep(0.5)
+    t0 = time.perf_counter()
+    scorer.stop()
+    assert time.perf_counter() - t0 < 1.5
+    fit.join(timeout=5)
+    assert not fit.is_alive()
+    assert scorer.get_shadow_stats()["scorer_process"] == "stopped"
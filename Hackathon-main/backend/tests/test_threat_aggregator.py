@@ -0,0 +1,62 @@
+import pytest
+
+from services import threat_aggregator
+
+END = 3600 * 500_000          # aligned to every resolution
+
+
+@pytest.fixture(autouse=True)
+def _fresh_rings(monkeypatch):
+    monkeypatch.setattr(threat_aggregator, "_rings",
+                        [threat_aggregator._Ring(seconds, size) for seconds, size in threat_aggregator.RESOLUTIONS])
+
+
+def _flagged(blocked: int, flagged: int, attack_type: str = "Agentic Bot Drain") -> list:
+    return ([{"status": "BLOCKED", "attack_type": attack_type}] * blocked
+            + [{"status": "FLAGGED", "attack_type": None}] * flagged)
+
+
+@pytest.mark.parametrize("window, points, resolution, step, n_points", [
+    (300, 20, 1, 15, 20),                      # 5 min from the per-second ring
+    (10, 30, 1, 1, 10),                        # fewer points than asked: one per second
+    (3600, 60, 1, 60, 60),                     # exactly the per-second ring's span
+    (7200, 20, 60, 360, 20),                   # 2 h: past the per-second ring
+    (86400 * 10, 10, 3600, 86400, 10),         # 10 days from the per-hour ring
+    (86400 * 90, 30, 3600, 86400, 30),         # clamped to the 30 days kept
+])
+def test_resolution_and_step(window, points, resolution, step, n_points):
+    result = threat_aggregator.query(window, points, end=END)
+    assert (result["resolution_seconds"], result["step_seconds"], len(result["points"])) == (resolution, step, n_points)
+    assert result["window_seconds"] == min(window, 86400 * 30)
+    starts = [p["start"] for p in result["points"]]
+    assert starts == list(range(starts[0], starts[0] + step * n_points, step))
+    assert starts[-1] <= END < starts[-1] + step   # the current point is included
+
+
+def test_counts_merge_into_points_and_summary():
+    threat_aggregator.record(_flagged(2, 3), total=100, ts=END - 10)
+    threat_aggregator.record(_flagged(1, 0, "Account Takeover"), total=50, ts=END - 12)   # same 15 s point
+    threat_aggregator.record(_flagged(5, 5), total=10, ts=END - 400)   # outside a 5 min window
+    result = threat_aggregator.query(300, 20, end=END)
+    assert result["summary"] == {
+        "total": 150,
+        "by_status": {"BLOCKED": 3, "FLAGGED": 3, "ALLOWED": 144},
+        "by_attack_type": {"Agentic Bot Drain": 2, "Unclassified": 3, "Account Takeover": 1},
+    }
+    busy = [p for p in result["points"] if p["total"]]
+    assert [(p["total"], p["threats"], p["blocked"], p["flagged"]) for p in busy] == [(150, 6, 3, 3)]
+
+
+def test_coarse_rings_see_the_same_batches():
+    threat_aggregator.record(_flagged(1, 1), total=10, ts=END - 30)
+    for window in (300, 7200, 86400 * 7):
+        assert threat_aggregator.query(window, 10, end=END)["summary"]["total"] == 10
+
+
+def test_wrapped_slot_reads_as_empty():
+    # One hour later the per-second ring reuses the slot; the old bucket must not leak in
+    threat_aggregator.record(_flagged(1, 0), total=7, ts=END - 3600 - 5)
+    result = threat_aggregator.query(60, 60, end=END)
+    assert result["resolution_seconds"] == 1 and result["summary"]["total"] == 0
+    threat_aggregator.record(_flagged(0, 1), total=3, ts=END - 5)
+    assert threat_aggregator.query(60, 60, end=END)["summary"]["by_status"] == {"FLAGGED": 1, "ALLOWED": 2}
@@ -0,0 +1,58 @@
+from collections import defaultdict, deque
+
+import pytest
+
+from services import tracing
+
+
+@pytest.fixture(autouse=True)
+def _fresh_stats(monkeypatch):
+    monkeypatch.setattr(tracing, "_recent", deque(maxlen=tracing.RECENT_TRACES))
+    monkeypatch.setattr(tracing, "_route_stats", defaultdict(lambda: defaultdict(lambda: [0, 0.0, 0.0])))
+
+
+def _routes() -> dict:
+    return {route: stages["total"]["count"] for route, stages in tracing.get_trace_summary()["routes"].items()}
+
+
+def test_path_parameters_share_one_route(client):
+    for name in ("alpha", "beta", "gamma"):
+        client.delete(f"/api/shadow/candidates/{name}")
+    assert _routes() == {"/api/shadow/candidates/{name}": 3}
+
+
+def test_unmatched_urls_share_one_bucket(client):
+    for i in range(5):
+        assert client.get(f"/api/no-such-route/{i}").status_code == 404
+    assert _routes() == {"<unmatched>": 5}
+
+
+def test_app_level_and_router_routes_keyed_by_full_path(client):
+    client.get("/health")
+    client.get("/api/shadow")
+    assert _routes() == {"/health": 1, "/api/shadow": 1}
+
+
+def test_summary_filters_by_route(client):
+    client.get("/health")
+    client.get("/api/shadow")
+    summary = tracing.get_trace_summary(route="/health")
+    assert list(summary["routes"]) == ["/health"]
+    assert [t["route"] for t in summary["slowest"]] == ["/health"]
+
+
+def test_server_timing_only_when_asked(client):
+    assert "server-timing" not in client.get("/health").headers
+    header = client.get("/health", headers={"X-Trace": "1"}).headers["server-timing"]
+    assert "total;dur=" in header
+
+
+def test_spans_aggregate_repeated_stages():
+    trace = tracing.start_trace("POST", "/api/x")
+    for _ in range(3):
+        with tracing.span("score"):
+            pass
+    tracing.finish_trace(trace, "/api/x", 200)
+    spans = tracing.get_trace_summary()["slowest"][0]["spans"]
+    assert [(s["name"], s["calls"]) for s in spans] == [("score", 3)]
+    assert 'score;desc="x3"' in tracing.server_timing_header(trace, 1.0)
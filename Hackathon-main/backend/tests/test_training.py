@@ -0,0 +1,48 @@
+import json
+import os
+
+import pytest
+
+from conftest import BACKEND_DIR
+
+
+@pytest.fixture
+def fits(engine, monkeypatch):
+    """The n_jobs of every _train_models call (the models are still trained)."""
+    calls = []
+    train = engine._train_models
+
+    def recording(X, y, iso_params=None, xgb_params=None, n_jobs=engine.TRAIN_N_JOBS):
+        calls.append(n_jobs)
+        return train(X, y, iso_params, xgb_params, n_jobs=n_jobs)
+
+    monkeypatch.setattr(engine, "_train_models", recording)
+    return calls
+
+
+def test_api_process_fits_on_all_cores(engine, fits):
+    engine.load_and_train()
+    assert fits == [engine.TRAIN_N_JOBS]
+
+
+def test_worker_fits_use_one_core(engine, fits):
+    engine.load_and_train(n_jobs=1)
+    assert fits == [1]
+
+
+def test_replay_workers_fit_on_one_core(engine, monkeypatch, tmp_path):
+    from test_replay import replay
+
+    train = engine.load_and_train
+
+    def single_core_only(n_jobs=engine.TRAIN_N_JOBS):
+        if n_jobs != 1:
+            os._exit(3)            # fails the replay: "exited before reporting"
+        train(n_jobs=n_jobs)
+
+    monkeypatch.setattr(engine, "load_and_train", single_core_only)   # inherited by the forked workers
+    with open(os.path.join(BACKEND_DIR, "data", "transactions.json")) as f:
+        rows = json.load(f)[:20]
+    path = tmp_path / "replay.jsonl"
+    path.write_text("".join(json.dumps(tx) + "\n" for tx in rows))
+    assert replay.replay([str(path)], workers=2, batch_size=8)["rows"] == 20
@@ -1,7 +1,18 @@
+import { useEffect, useState } from 'react'
 import { AreaChart, Area, XAxis, YAxis, CartesianGrid, Tooltip, ResponsiveContainer } from 'recharts'
 import { motion } from 'framer-motion'
+import { getThreatTimeline } from '../../lib/api'
+import type { ThreatTimelinePoint } from '../../lib/api'
 
-interface ThreatChartProps { timeline: { time: string; threats: number; total: number }[] }
+interface ThreatChartProps { timeline: ThreatTimelinePoint[] }
+
+// 5m is the live view already carried by /stream-status; longer windows are fetched on their own
+const WINDOWS = [
+  { key: '5m', label: 'Last 5 min · 15s buckets', seconds: 300, points: 20 },
+  { key: '1h', label: 'Last hour · 2 min buckets', seconds: 3600, points: 30 },
+  { key: '24h', label: 'Last 24h · hourly', seconds: 86400, points: 24 },
+  { key: '7d', label: 'Last 7 days · 6h buckets', seconds: 7 * 86400, points: 28 },
+]
 
 const CustomTooltip = ({ active, payload, label }: any) => {
   if (!active || !payload?.length) return null
@@ -14,16 +25,40 @@ const CustomTooltip = ({ active, payload, label }: any) => {
 }
 
 export function ThreatChart({ timeline }: ThreatChartProps) {
-  const data = timeline.length > 0 ? timeline : Array.from({ length: 12 }, () => ({ time: `--:--`, threats: 0, total: 0 }))
+  const [windowKey, setWindowKey] = useState('5m')
+  const [fetched, setFetched] = useState<ThreatTimelinePoint[]>([])
+  const selected = WINDOWS.find(w => w.key === windowKey)!
+
+  useEffect(() => {
+    if (windowKey === '5m') return
+    let cancelled = false
+    const load = () => getThreatTimeline(selected.seconds, selected.points)
+      .then(r => { if (!cancelled) setFetched(r.points) })
+      .catch(() => {})
+    load()
+    const interval = setInterval(load, 15000)
+    return () => { cancelled = true; clearInterval(interval) }
+  }, [windowKey, selected.seconds, selected.points])
+
+  const points = windowKey === '5m' ? timeline : fetched
+  const data = points.length > 0 ? points : Array.from({ length: 12 }, () => ({ time: `--:--`, threats: 0, total: 0 }))
   return (
     <motion.div initial={{ opacity: 0 }} animate={{ opacity: 1 }} transition={{ delay: 0.2 }}
       style={{ background: 'var(--bg-card)', border: '1px solid var(--border)', borderRadius: 10, padding: '20px 20px 12px', boxShadow: 'var(--shadow-sm)' }}>
       <div style={{ display: 'flex', justifyContent: 'space-between', alignItems: 'center', marginBottom: 16 }}>
         <div>
           <div style={{ fontSize: 13, fontWeight: 600, color: 'var(--ink-1)', fontFamily: 'Geist Mono, serif' }}>Threat Timeline</div>
-          <div style={{ fontSize: 11, fontFamily: 'Geist Mono, monospace', color: 'var(--ink-4)', marginTop: 2 }}>Last 20 detection events · live</div>
+          <div style={{ fontSize: 11, fontFamily: 'Geist Mono, monospace', color: 'var(--ink-4)', marginTop: 2 }}>{selected.label} · live</div>
         </div>
         <div style={{ display: 'flex', gap: 14, fontSize: 11, fontFamily: 'Geist Mono, monospace', color: 'var(--ink-4)' }}>
+          <span style={{ display: 'flex', gap: 4 }}>
+            {WINDOWS.map(w => (
+              <button key={w.key} onClick={() => { setFetched([]); setWindowKey(w.key) }}
+                style={{ background: w.key === windowKey ? 'var(--bg-subtle)' : 'transparent', border: '1px solid var(--border)', borderRadius: 4, padding: '1px 6px', fontSize: 10, fontFamily: 'Geist Mono, monospace', color: w.key === windowKey ? 'var(--ink-1)' : 'var(--ink-4)', cursor: 'pointer' }}>
+                {w.key}
+              </button>
+            ))}
+          </span>
           <span style={{ display: 'flex', alignItems: 'center', gap: 5 }}><span style={{ width: 10, height: 2, background: 'var(--cobalt-mid)', display: 'inline-block', borderRadius: 1 }} />Total TX</span>
           <span style={{ display: 'flex', alignItems: 'center', gap: 5 }}><span style={{ width: 10, height: 2, background: 'var(--danger)', display: 'inline-block', borderRadius: 1 }} />Threats</span>
         </div>
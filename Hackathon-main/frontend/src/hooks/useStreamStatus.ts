@@ -10,6 +10,8 @@ const DEFAULT_STATUS: StreamStatus = {
   recent_alerts: [],
   threat_timeline: [],
   total_processed: 0,
+  short_circuited: 0,
+  blocklist_size: 0,
 }
 
 export function useStreamStatus(pollInterval = 3000) {
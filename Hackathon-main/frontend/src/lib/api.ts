@@ -15,6 +15,7 @@ export interface Transaction {
   hour_of_day: number
   unique_recipients_last_10tx: number
   recipient_id: string
+  device_id?: string
 }
 
 export interface FlaggedTransaction {
@@ -26,14 +27,34 @@ export interface FlaggedTransaction {
   status: string
 }
 
+export interface ThreatTimelinePoint {
+  time: string
+  threats: number
+  total: number
+  start?: number
+  blocked?: number
+  flagged?: number
+  by_attack_type?: Record<string, number>
+}
+
+export interface ThreatTimeline {
+  window_seconds: number
+  step_seconds: number
+  resolution_seconds: number
+  points: ThreatTimelinePoint[]
+  summary: { total: number; by_status: Record<string, number>; by_attack_type: Record<string, number> }
+}
+
 export interface StreamStatus {
   active_threats: number
   blocked_today: number
   transactions_per_second: number
   risk_level: 'LOW' | 'MEDIUM' | 'HIGH' | 'CRITICAL'
   recent_alerts: FlaggedTransaction[]
-  threat_timeline: { time: string; threats: number; total: number }[]
+  threat_timeline: ThreatTimelinePoint[]
   total_processed: number
+  short_circuited: number
+  blocklist_size: number
 }
 
 export interface PhishingResult {
@@ -43,6 +64,8 @@ export interface PhishingResult {
   markers: string[]
   explanation: string
   recommendation: string
+  served_by?: 'local-model' | 'rule-based' | 'llm'
+  model_probability?: number
 }
 
 export interface SimulateAttackResult {
@@ -51,6 +74,24 @@ export interface SimulateAttackResult {
   flagged: FlaggedTransaction[]
 }
 
+export interface BlocklistEntry {
+  kind: 'account' | 'recipient' | 'device'
+  value: string
+  reason: string
+  risk_score: number
+  attack_type: string | null
+  blocked_at: number
+  expires_at: number
+  hits: number
+}
+
+export interface Blocklist {
+  entries: BlocklistEntry[]
+  size: number
+  short_circuited: number
+  short_circuited_by_kind: Record<string, number>
+}
+
 export const getStreamStatus = (): Promise<StreamStatus> =>
   api.get('/stream-status').then(r => r.data)
 
@@ -60,4 +101,46 @@ export const analyzeText = (text: string): Promise<PhishingResult> =>
 export const simulateAttack = (): Promise<SimulateAttackResult> =>
   api.post('/simulate-attack').then(r => r.data)
 
+export const getThreatTimeline = (window: number, points: number): Promise<ThreatTimeline> =>
+  api.get('/threat-timeline', { params: { window, points } }).then(r => r.data)
+
+export const getBlocklist = (): Promise<Blocklist> =>
+  api.get('/blocklist').then(r => r.data)
+
+export const unblock = (kind: BlocklistEntry['kind'], value: string) =>
+  api.post('/blocklist/unblock', { kind, value }).then(r => r.data)
+
+export interface ChatHistoryItem { role: 'user' | 'assistant'; content: string }
+
+export type ChatStreamEvent =
+  | { event: 'guard'; data: any }
+  | { event: 'token'; data: { token: string } }
+  | { event: 'done'; data: { reply: string; blocked: boolean } }
+
+/** POST /api/chat as Server-Sent Events; calls onEvent for each guard/token/done event. */
+export async function streamChat(history: ChatHistoryItem[], onEvent: (e: ChatStreamEvent) => void): Promise<void> {
+  const res = await fetch('/api/chat', {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json', Accept: 'text/event-stream' },
+    body: JSON.stringify({ messages: history }),
+  })
+  if (!res.ok || !res.body) throw new Error(`chat stream failed: ${res.status}`)
+  const reader = res.body.getReader()
+  const decoder = new TextDecoder()
+  let buffer = ''
+  for (;;) {
+    const { value, done } = await reader.read()
+    if (done) break
+    buffer += decoder.decode(value, { stream: true })
+    let sep
+    while ((sep = buffer.indexOf('\n\n')) !== -1) {
+      const frame = buffer.slice(0, sep)
+      buffer = buffer.slice(sep + 2)
+      const event = frame.match(/^event: (.*)$/m)?.[1]
+      const data = frame.match(/^data: (.*)$/m)?.[1]
+      if (event && data) onEvent({ event, data: JSON.parse(data) } as ChatStreamEvent)
+    }
+  }
+}
+
 export default api